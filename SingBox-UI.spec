@@ -15,6 +15,8 @@ qrc_file = Path('resources/app.qrc')
 if not resources_rc_path.exists() and qrc_file.exists():
     print("[spec] Compiling QRC resources...")
     commands = [
+        # build_qrc.py embeds a subset of the icon font (only glyphs from MDI_ICONS)
+        [sys.executable, 'scripts/build_qrc.py'],
         ['py', '-m', 'PyQt5.pyrcc_main', str(qrc_file), '-o', str(resources_rc_path)],
         ['python', '-m', 'PyQt5.pyrcc_main', str(qrc_file), '-o', str(resources_rc_path)],
         ['pyrcc5', str(qrc_file), '-o', str(resources_rc_path)],
@@ -63,7 +65,8 @@ a = Analysis(
     datas=all_datas,  # Includes locales (fonts and Ace Editor files are in QRC)
     hiddenimports=[
         'scripts.resources_rc',  # Critical: registers Qt resources (icon and fonts)
-        'requests',
+        'requests',  # Imported lazily (utils.lazy_import) - not visible to the analysis
+        'zipfile',  # Imported lazily by core.downloader
         'winreg',
         'config',
         'config.paths',
@@ -96,6 +99,8 @@ a = Analysis(
         'ui.design',
         'ui.design.base',
         'ui.design.component',
+        'ui.design.component.dialog',  # Imported lazily on first dialog
+        'core.latency_tester',  # Imported lazily by workers.latency_worker
     ],
     hookspath=[],
     hooksconfig={},
@@ -8,6 +8,7 @@ from ui.styles import StyleSheet, theme
 from utils.icon_manager import set_application_icon
 from utils.theme_manager import set_theme, get_theme_manager
 from managers.settings import SettingsManager
+from utils.startup_trace import STARTUP_TRACE
 
 # Импортируем ресурсы (QRC) для доступа к шрифтам
 try:
@@ -44,12 +45,15 @@ def create_application() -> QApplication:
             pass  # Игнорируем ошибки, если не удалось установить
     
     # Загружаем настройки и применяем тему
-    settings = SettingsManager()
-    theme_name = settings.get("theme", "dark")
-    set_theme(theme_name)
-    theme.reload_theme()
-    
-    apply_theme(app)
+    with STARTUP_TRACE.phase("theme load"):
+        settings = SettingsManager()
+        theme_name = settings.get("theme", "dark")
+        set_theme(theme_name)
+        theme.reload_theme()
+        
+        apply_theme(app)
+        # Иконки навигации, заголовка и страниц - до создания окна
+        IconHelper.warm_up()
     return app
 
 
@@ -82,8 +86,8 @@ def apply_theme(app: QApplication) -> None:
     palette.setColor(QPalette.HighlightedText, bg_primary)
     app.setPalette(palette)
     
-    # Используем новую систему стилей
-    app.setStyleSheet(StyleSheet.global_styles())
+    # Используем новую систему стилей (тот же QSS не переустанавливаем - это перерисовка всех окон)
+    StyleSheet.apply(app, StyleSheet.global_styles())
 
 
 def apply_dark_theme(app: QApplication) -> None:
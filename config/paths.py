@@ -35,6 +35,8 @@ CORE_DIR = DATA_DIR / "core"
 LOG_DIR = DATA_DIR / "logs"
 LOCALES_DIR = DATA_DIR / "locales"
 THEMES_DIR = DATA_DIR / "themes"
+CACHE_DIR = DATA_DIR / "cache"
+SUBSCRIPTION_CACHE_DIR = CACHE_DIR / "subscriptions"
 
 # Ресурсы (для разработки - исходники)
 SOURCE_RESOURCES_DIR = ROOT / "resources"
@@ -50,11 +52,15 @@ CONFIG_FILE = DATA_DIR / "config.json"
 LOG_FILE = LOG_DIR / "singbox-ui.log"
 DEBUG_LOG_FILE = LOG_DIR / "debug.log"  # Deprecated: все логи теперь пишутся в LOG_FILE (singbox-ui.log)
 SINGBOX_CORE_LOG_FILE = LOG_DIR / "singbox.log"
+STRUCTURED_LOG_FILE = LOG_DIR / "singbox-ui.jsonl"  # Структурированный лог приложения (по записи JSON на строку)
+STALL_LOG_FILE = LOG_DIR / "stalls.log"  # Зависания главного потока со стеками (отладочный сторож)
+STALL_HISTOGRAM_FILE = LOG_DIR / "stalls-histogram.json"  # Гистограмма длительностей зависаний
+STARTUP_TRACE_FILE = LOG_DIR / "startup-trace.json"  # Трасса запуска (--trace-startup) в формате Chrome Trace
 
 
 def ensure_dirs():
     """Создает все необходимые папки и проверяет их создание"""
-    dirs_to_create = [DATA_DIR, CORE_DIR, LOG_DIR, LOCALES_DIR, THEMES_DIR]
+    dirs_to_create = [DATA_DIR, CORE_DIR, LOG_DIR, LOCALES_DIR, THEMES_DIR, SUBSCRIPTION_CACHE_DIR]
     for p in dirs_to_create:
         try:
             p.mkdir(parents=True, exist_ok=True)
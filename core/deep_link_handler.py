@@ -6,11 +6,14 @@ import sys
 from urllib.parse import urlparse, unquote, parse_qs
 from typing import TYPE_CHECKING
 from utils.i18n import tr
-from ui.design.component import show_info_dialog
+from utils.lazy_import import lazy_import
 
 if TYPE_CHECKING:
     from main import MainWindow
 
+# Диалоги загружаются при первом показе, а не при запуске приложения
+dialogs = lazy_import("ui.design.component.dialog")
+
 
 class DeepLinkHandler:
     """Обработчик deep links"""
@@ -166,7 +169,7 @@ class DeepLinkHandler:
         ]
         if url in existing_urls:
             self.main_window.log(tr("messages.subscription_already_exists"))
-            show_info_dialog(
+            dialogs.show_info_dialog(
                 self.main_window,
                 tr("messages.subscription_exists_title"),
                 tr("messages.subscription_exists_text")
@@ -180,7 +183,7 @@ class DeepLinkHandler:
             self.main_window.log(tr("profile.added", name=name))
             
             # Показываем уведомление
-            show_info_dialog(
+            dialogs.show_info_dialog(
                 self.main_window,
                 tr("messages.subscription_imported_title"),
                 tr("messages.subscription_imported_text", name=name),
@@ -193,7 +196,7 @@ class DeepLinkHandler:
             from utils.logger import log_to_file
             log_to_file(f"[Deep Link] Error importing subscription: {e}")
             self.main_window.log(tr("messages.subscription_import_error", error=str(e)))
-            show_info_dialog(
+            dialogs.show_info_dialog(
                 self.main_window,
                 tr("messages.subscription_import_error_title"),
                 tr("messages.subscription_import_error_text", error=str(e))
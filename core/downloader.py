@@ -1,11 +1,14 @@
 """Загрузка и установка SingBox"""
-import requests
-import zipfile
 import shutil
 from pathlib import Path
 from PyQt5.QtCore import QThread, pyqtSignal
 from config.paths import CORE_DIR, CORE_EXE
 from utils.i18n import tr
+from utils.lazy_import import lazy_import
+
+# Сеть и архивы нужны только при загрузке ядра
+requests = lazy_import("requests")
+zipfile = lazy_import("zipfile")
 
 # Импортируем log_to_file если доступен
 try:
@@ -0,0 +1,197 @@
+"""Проверка задержки до серверов профиля (DNS, TCP connect, TLS handshake)"""
+import asyncio
+import socket
+import ssl
+import time
+from typing import Optional, List, Dict, Any, Callable
+
+# Служебные outbound без собственного сервера
+SERVICE_OUTBOUND_TYPES = {"direct", "block", "dns", "selector", "urltest"}
+# Протоколы поверх UDP - TCP-подключением их не проверить
+UDP_OUTBOUND_TYPES = {"hysteria", "hysteria2", "tuic", "wireguard"}
+
+DEFAULT_CONCURRENCY = 64
+DEFAULT_TIMEOUT = 5.0  # секунд на каждую стадию проверки
+
+# Коды ошибок проверки
+ERROR_TIMEOUT = "timeout"
+ERROR_DNS = "dns"
+ERROR_REFUSED = "refused"
+ERROR_TLS = "tls"
+ERROR_UDP = "udp"
+
+
+def extract_endpoints(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Извлечь серверы из outbounds конфига sing-box
+
+    Args:
+        config: Распарсенный конфиг sing-box
+
+    Returns:
+        Список серверов: tag, type, server, port, tls, server_name, udp
+    """
+    endpoints = []
+    outbounds = config.get("outbounds") if isinstance(config, dict) else None
+    for outbound in outbounds or []:
+        if not isinstance(outbound, dict):
+            continue
+        outbound_type = outbound.get("type", "")
+        if outbound_type in SERVICE_OUTBOUND_TYPES:
+            continue
+        server = outbound.get("server")
+        port = outbound.get("server_port")
+        if not server or not port:
+            continue
+        try:
+            port = int(port)
+        except (TypeError, ValueError):
+            continue
+        tls = outbound.get("tls") if isinstance(outbound.get("tls"), dict) else {}
+        endpoints.append({
+            "tag": outbound.get("tag") or f"{server}:{port}",
+            "type": outbound_type,
+            "server": server,
+            "port": port,
+            "tls": bool(tls.get("enabled")),
+            "server_name": tls.get("server_name") or server,
+            "udp": outbound_type in UDP_OUTBOUND_TYPES,
+        })
+    return endpoints
+
+
+def _make_ssl_context() -> ssl.SSLContext:
+    """
+    SSL-контекст для замера рукопожатия
+
+    Сертификат не проверяется: измеряется время рукопожатия, а не доверие к серверу
+    (у reality и самоподписанных серверов проверка все равно не пройдет).
+    """
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class _ProbeProtocol(asyncio.Protocol):
+    """Пустой протокол: нужен только факт подключения"""
+
+
+async def probe_endpoint(
+    endpoint: Dict[str, Any],
+    timeout: float = DEFAULT_TIMEOUT,
+    ssl_context: Optional[ssl.SSLContext] = None
+) -> Dict[str, Any]:
+    """
+    Проверить один сервер
+
+    Returns:
+        Результат: поля сервера + dns_ms, tcp_ms, tls_ms, total_ms (мс или None) и error (код ошибки или None)
+    """
+    result = dict(endpoint)
+    result.update({"dns_ms": None, "tcp_ms": None, "tls_ms": None, "total_ms": None, "error": None})
+    if endpoint.get("udp"):
+        result["error"] = ERROR_UDP
+        return result
+
+    loop = asyncio.get_running_loop()
+    transport = None
+    stage = ERROR_DNS
+    try:
+        started = time.perf_counter()
+        infos = await asyncio.wait_for(
+            loop.getaddrinfo(endpoint["server"], endpoint["port"], type=socket.SOCK_STREAM),
+            timeout
+        )
+        if not infos:
+            raise OSError("no address")
+        family, sock_type, proto, _, sockaddr = infos[0]
+        result["dns_ms"] = (time.perf_counter() - started) * 1000
+
+        stage = ERROR_REFUSED
+        connect_started = time.perf_counter()
+        transport, protocol = await asyncio.wait_for(
+            loop.create_connection(_ProbeProtocol, sockaddr[0], sockaddr[1], family=family, proto=proto),
+            timeout
+        )
+        result["tcp_ms"] = (time.perf_counter() - connect_started) * 1000
+
+        if endpoint.get("tls"):
+            stage = ERROR_TLS
+            tls_started = time.perf_counter()
+            transport = await asyncio.wait_for(
+                loop.start_tls(
+                    transport, protocol, ssl_context or _make_ssl_context(),
+                    server_hostname=endpoint.get("server_name") or endpoint["server"]
+                ),
+                timeout
+            )
+            result["tls_ms"] = (time.perf_counter() - tls_started) * 1000
+
+        result["total_ms"] = result["tcp_ms"] + (result["tls_ms"] or 0)
+    except asyncio.TimeoutError:
+        result["error"] = ERROR_TIMEOUT
+    except Exception:
+        result["error"] = stage
+    finally:
+        if transport is not None:
+            transport.close()
+    return result
+
+
+async def probe_all(
+    endpoints: List[Dict[str, Any]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Параллельно проверить серверы с ограничением числа одновременных подключений
+
+    Args:
+        endpoints: Серверы из extract_endpoints()
+        concurrency: Максимум одновременных проверок
+        timeout: Таймаут каждой стадии в секундах
+        on_result: Вызывается для каждого сервера по мере готовности
+
+    Returns:
+        Результаты в порядке endpoints
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    ssl_context = _make_ssl_context()
+
+    async def probe(endpoint: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            result = await probe_endpoint(endpoint, timeout, ssl_context)
+        if on_result:
+            on_result(result)
+        return result
+
+    return list(await asyncio.gather(*(probe(endpoint) for endpoint in endpoints)))
+
+
+def rank_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Сортировка: доступные серверы по возрастанию задержки, затем недоступные"""
+    return sorted(
+        results,
+        key=lambda r: (r["error"] is not None, r["total_ms"] if r["total_ms"] is not None else 0.0, r["tag"])
+    )
+
+
+def run_latency_test(
+    config: Dict[str, Any],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    timeout: float = DEFAULT_TIMEOUT,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Проверить все серверы конфига (блокирующий вызов, для фонового потока)
+
+    Returns:
+        Ранжированные результаты (см. rank_results)
+    """
+    endpoints = extract_endpoints(config)
+    if not endpoints:
+        return []
+    results = asyncio.run(probe_all(endpoints, concurrency, timeout, on_result))
+    return rank_results(results)
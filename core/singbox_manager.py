@@ -2,152 +2,397 @@
 import subprocess
 import sys
 import io
+import json
+import time
+import threading
 from pathlib import Path
-from typing import Optional
-from PyQt5.QtCore import QThread, pyqtSignal
+from typing import Optional, TYPE_CHECKING
+from PyQt5.QtCore import QThread, QObject, pyqtSignal
 from config.paths import CORE_EXE, CONFIG_FILE, CORE_DIR, SINGBOX_CORE_LOG_FILE
+from utils.i18n import tr
+from utils.log_writer import BatchLogWriter, pump_lines
+from utils.log_rotation import LOG_ROTATOR
+from utils.log_buffer import LogRingBuffer, SINGBOX_LOG_BUFFER
+from utils.log_levels import SingBoxLevelFilter
+
+# Импортируем log_to_file если доступен
+try:
+    from utils.logger import log_to_file
+except ImportError:
+    # Если модуль еще не загружен, используем простой print
+    def log_to_file(msg: str, log_file=None):
+        print(msg)
+
+from managers.subscriptions import config_hash
+
+if TYPE_CHECKING:
+    from managers.subscriptions import SubscriptionManager
 
 
 class SingBoxLogReaderThread(QThread):
-    """Поток для чтения логов из stdout/stderr процесса sing-box"""
+    """
+    Поток для чтения логов из stdout/stderr процесса sing-box
+    
+    Pipe читается без пауз между строками, запись в файл идет через
+    постоянно открытый файл с пакетным сбросом (см. BatchLogWriter),
+    чтобы при debug-уровне логов pipe не переполнялся и не тормозил ядро.
     
-    def __init__(self, process: subprocess.Popen, log_file: Path):
+    Уровень строки разбирается один раз при приеме: строки ниже disk_level
+    не пишутся в файл, ниже ui_level - не форматируются и не попадают в окно логов.
+    """
+    
+    def __init__(
+        self,
+        process: subprocess.Popen,
+        log_file: Path,
+        log_buffer: LogRingBuffer = SINGBOX_LOG_BUFFER,
+        disk_level: str = "trace",
+        ui_level: str = "trace"
+    ):
         """
         Инициализация потока чтения логов
         
         Args:
             process: Процесс sing-box
             log_file: Путь к файлу для сохранения логов
+            log_buffer: Буфер строк для окна логов
+            disk_level: Минимальный уровень строк для файла (trace/debug/info/warn/error/fatal)
+            ui_level: Минимальный уровень строк для окна логов
         """
         super().__init__()
         self.process = process
         self.log_file = log_file
         self.running = True
-        
-        # Убеждаемся что папка существует
-        log_file.parent.mkdir(parents=True, exist_ok=True)
+        # Устанавливается, когда ядро сообщило о готовности ("sing-box started")
+        self.started_event = threading.Event()
+        self.writer = BatchLogWriter(log_file, rotator=LOG_ROTATOR)
+        self.log_buffer = log_buffer
+        self.level_filter = SingBoxLevelFilter(disk_level, ui_level)
     
     def run(self) -> None:
-        """Чтение логов из процесса"""
+        """Чтение логов из процесса (до EOF, т.е. до завершения процесса)"""
+        if not self.process.stdout:
+            return
         try:
-            if not self.process.stdout:
-                return
-            
-            # Читаем логи построчно
-            while self.running and self.process.poll() is None:
-                try:
-                    # Читаем байты
-                    line_bytes = self.process.stdout.readline()
-                    if not line_bytes:
-                        # Если строка пустая, процесс может завершиться или нет данных
-                        self.msleep(100)
-                        continue
-                    
-                    # Декодируем в строку
-                    try:
-                        line = line_bytes.decode('utf-8', errors='replace').rstrip()
-                    except Exception:
-                        # Если не удалось декодировать, пробуем другие кодировки
-                        try:
-                            line = line_bytes.decode('cp1251', errors='replace').rstrip()
-                        except Exception:
-                            line = line_bytes.decode('latin1', errors='replace').rstrip()
-                    
-                    if line:
-                        self._write_log_line(line)
-                    
-                    # Небольшая задержка, чтобы не нагружать CPU слишком сильно
-                    self.msleep(10)
-                
-                except Exception as e:
-                    # Если произошла ошибка чтения, проверяем, не завершился ли процесс
-                    if self.process.poll() is not None:
-                        break
-                    # Небольшая задержка перед повторной попыткой
-                    self.msleep(100)
-        
+            self.writer.open()
+            pump_lines(
+                self.process.stdout,
+                None,
+                on_line=self._on_line,
+                should_stop=lambda: not self.running
+            )
         except Exception as e:
-            # Импортируем log_to_file если доступен
-            try:
-                from utils.logger import log_to_file
-                log_to_file(f"Ошибка при чтении логов sing-box: {e}")
-            except ImportError:
-                pass
+            log_to_file(f"Ошибка при чтении логов sing-box: {e}")
+        finally:
+            self.writer.close()
+            summary = self.level_filter.summary()
+            if summary:
+                log_to_file(f"[SingBox Logs] Отброшено строк ниже порога уровня - {summary}")
     
-    def _write_log_line(self, line: str):
-        """Записать строку лога в файл (как есть, без преобразований)"""
-        # Записываем логи SingBox такими, какие они есть от процесса
-        try:
-            with self.log_file.open("a", encoding="utf-8") as f:
-                f.write(line + "\n")
-        except Exception:
-            pass
+    def _on_line(self, line: str) -> None:
+        """Отслеживание готовности ядра, фильтр по уровню, запись в файл и окно логов"""
+        if not self.started_event.is_set() and "sing-box started" in line:
+            self.started_event.set()
+        to_disk, to_ui = self.level_filter.classify(line)
+        if to_disk:
+            self.writer.write_line(line)
+        if to_ui:
+            self.log_buffer.append(line)
     
     def stop(self):
-        """Остановка чтения логов"""
+        """Остановка чтения логов (буфер сразу сбрасывается на диск)"""
         self.running = False
+        self.writer.flush()
+
 
+def _spawn_singbox(core_exe: Path, config_file: Path, core_dir: Path) -> subprocess.Popen:
+    """Запуск процесса sing-box со скрытым окном консоли и stdout/stderr в pipe"""
+    # Скрываем окно консоли
+    startupinfo = None
+    if sys.platform == "win32":
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+    
+    # Перенаправляем stdout и stderr в pipe для чтения логов
+    return subprocess.Popen(
+        [str(core_exe), "run", "-c", str(config_file)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,  # Объединяем stderr с stdout
+        cwd=str(core_dir),
+        startupinfo=startupinfo,
+        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
+        bufsize=-1,  # Буферизованное чтение: readline() без системного вызова на каждый байт
+    )
+
+
+class StartCancelled(Exception):
+    """Запуск отменен пользователем"""
 
-class StartSingBoxThread(QThread):
-    """Поток для запуска SingBox без блокировки UI"""
-    finished = pyqtSignal(object, object)  # (subprocess.Popen, SingBoxLogReaderThread)
+
+class StartSingBoxPipeline(QThread):
+    """
+    Поэтапный запуск SingBox без блокировки UI
+    
+    Стадии: fetch -> validate -> write -> spawn -> readiness.
+    О каждой стадии сообщает сигналами stage_started/stage_finished (с длительностью),
+    весь запуск можно отменить через cancel() - уже запущенный процесс будет остановлен
+    в этом же потоке. Скачивание подписки идет через собственную HTTP-сессию,
+    которую cancel() закрывает, поэтому отмена не ждет таймаута запроса.
+    """
+    STAGES = ("fetch", "validate", "write", "spawn", "readiness")
+    
+    # Сколько ждать строки "sing-box started" от ядра, прежде чем считать его готовым
+    READY_TIMEOUT = 1.5
+    # Период проверки отмены во время скачивания подписки
+    CANCEL_POLL_INTERVAL = 0.05
+    
+    stage_started = pyqtSignal(str, int, int)  # стадия, номер стадии, всего стадий
+    stage_finished = pyqtSignal(str, float)  # стадия, длительность в мс
+    ready = pyqtSignal(object, object)  # (subprocess.Popen, SingBoxLogReaderThread)
     error = pyqtSignal(str)
+    cancelled = pyqtSignal()
     
-    def __init__(self, core_exe: Path, config_file: Path, core_dir: Path):
+    def __init__(
+        self,
+        subs_manager: 'SubscriptionManager',
+        index: int,
+        use_cache: bool = True,
+        disk_log_level: str = "trace",
+        ui_log_level: str = "trace",
+        core_exe: Path = CORE_EXE,
+        config_file: Path = CONFIG_FILE,
+        core_dir: Path = CORE_DIR,
+        parent: Optional[QObject] = None
+    ):
         """
-        Инициализация потока запуска sing-box
+        Инициализация конвейера запуска
         
         Args:
+            subs_manager: Менеджер профилей
+            index: Индекс запускаемого профиля
+            use_cache: Стартовать подписку из последнего скачанного конфига, если он есть
+            disk_log_level: Минимальный уровень логов ядра для singbox.log
+            ui_log_level: Минимальный уровень логов ядра для окна логов
             core_exe: Путь к sing-box.exe
             config_file: Путь к config.json
             core_dir: Рабочая директория
+            parent: Родительский объект Qt
         """
-        super().__init__()
+        super().__init__(parent)
+        self.subs_manager = subs_manager
+        self.index = index
+        self.use_cache = use_cache
+        self.disk_log_level = disk_log_level
+        self.ui_log_level = ui_log_level
         self.core_exe = core_exe
         self.config_file = config_file
         self.core_dir = core_dir
+        self.from_cache = False  # Конфиг подписки взят из кэша (нужно обновить в фоне)
+        self.timings = {}  # стадия -> длительность в мс
+        self.content_hash: Optional[str] = None
+        self._cancelled = False
+        # HTTP-сессия и текущий ответ скачивания подписки (закрываются в cancel())
+        self._session = None
+        self._response = None
+        self._http_lock = threading.Lock()
+    
+    def cancel(self) -> None:
+        """
+        Отменить запуск (проверяется между стадиями, во время скачивания и ожидания готовности)
+        
+        Безопасно вызывать из главного потока: только закрывает соединение
+        скачивания и не ждет остановки ядра.
+        """
+        self._cancelled = True
+        with self._http_lock:
+            response, session = self._response, self._session
+        for closable in (response, session):
+            if closable is not None:
+                try:
+                    closable.close()
+                except Exception:
+                    pass
+    
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+    
+    def _check_cancel(self) -> None:
+        if self._cancelled:
+            raise StartCancelled()
+    
+    def _run_stage(self, name: str, func):
+        """Выполнить стадию с замером времени"""
+        self._check_cancel()
+        self.stage_started.emit(name, self.STAGES.index(name) + 1, len(self.STAGES))
+        started = time.perf_counter()
+        result = func()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.timings[name] = elapsed_ms
+        self.stage_finished.emit(name, elapsed_ms)
+        return result
     
     def run(self) -> None:
-        """Запуск sing-box процесса"""
+        """Выполнение стадий запуска"""
+        proc = None
+        log_reader = None
         try:
-            # Скрываем окно консоли
-            startupinfo = None
-            if sys.platform == "win32":
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-            # Перенаправляем stdout и stderr в pipe для чтения логов
-            proc = subprocess.Popen(
-                [str(self.core_exe), "run", "-c", str(self.config_file)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,  # Объединяем stderr с stdout
-                cwd=str(self.core_dir),
-                startupinfo=startupinfo,
-                creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0,
-                bufsize=0,  # Небуферизованный режим для немедленного чтения
-            )
-            
-            # Создаем поток для чтения логов
-            log_reader = SingBoxLogReaderThread(proc, SINGBOX_CORE_LOG_FILE)
-            log_reader.start()
-            
-            # Небольшая задержка, чтобы процесс успел запуститься
-            import time
-            time.sleep(0.2)
-            
-            # Проверяем, что процесс все еще запущен
-            if proc.poll() is None:
-                # Процесс запущен успешно
-                self.finished.emit(proc, log_reader)
-            else:
-                # Процесс завершился сразу после запуска
-                log_reader.stop()
-                log_reader.wait(1000)  # Ждем остановки потока чтения логов
-                returncode = proc.returncode if proc.returncode is not None else -1
-                self.error.emit(f"Процесс завершился сразу после запуска с кодом {returncode}")
+            content = self._run_stage("fetch", self._fetch)
+            self._run_stage("validate", lambda: self._validate(content))
+            self._run_stage("write", lambda: self._write(content))
+            proc, log_reader = self._run_stage("spawn", self._spawn)
+            self._run_stage("readiness", lambda: self._wait_ready(proc, log_reader))
+            # Отмена во время последней стадии - ядро останавливается здесь, а не в главном потоке
+            self._check_cancel()
+            self.ready.emit(proc, log_reader)
+        except StartCancelled:
+            self._shutdown(proc, log_reader)
+            self.cancelled.emit()
         except Exception as e:
+            self._shutdown(proc, log_reader)
             self.error.emit(str(e))
+    
+    def _fetch(self) -> bytes:
+        """Получение содержимого конфига (кэш подписки, сеть или готовый конфиг профиля)"""
+        if not self.subs_manager.is_subscription(self.index):
+            content = self.subs_manager.get_profile_config(self.index)
+            if content is None:
+                raise RuntimeError("Конфиг не найден в профиле")
+            return content
+        
+        if self.use_cache:
+            content = self.subs_manager.get_cached_config(self.index)
+            if content is not None:
+                self.from_cache = True
+                # Хэш посчитан при скачивании (одним проходом с проверкой JSON)
+                self.content_hash = self.subs_manager.get_cached_config_hash(self.index)
+                return content
+        
+        log_to_file(tr("messages.downloading_config"))
+        content = self._fetch_cancellable()
+        if content is None:
+            raise RuntimeError(tr("messages.config_error"))
+        # Скачанный конфиг уже в кэше вместе с хэшем
+        self.content_hash = self.subs_manager.get_cached_config_hash(self.index)
+        return content
+    
+    def _on_response(self, response) -> None:
+        """Запомнить ответ, чтобы cancel() мог прервать чтение тела"""
+        with self._http_lock:
+            self._response = response
+        if self._cancelled:
+            response.close()
+    
+    def _fetch_cancellable(self) -> Optional[bytes]:
+        """
+        Скачивание подписки с проверкой отмены
+        
+        Запрос выполняется во вспомогательном потоке через собственную сессию.
+        При отмене сессия и ответ закрываются, а конвейер сразу выходит, не дожидаясь
+        соединения, которое еще не установлено (оно завершится само по таймауту
+        и в худшем случае лишь обновит кэш подписки).
+        """
+        with self._http_lock:
+            self._session = self.subs_manager.new_session()
+        result = {}
+        
+        def fetch():
+            result["content"] = self.subs_manager.fetch_config(
+                self.index, session=self._session, on_response=self._on_response
+            )
+        
+        fetch_thread = threading.Thread(target=fetch, name="start-fetch", daemon=True)
+        fetch_thread.start()
+        try:
+            while fetch_thread.is_alive():
+                self._check_cancel()
+                fetch_thread.join(self.CANCEL_POLL_INTERVAL)
+            self._check_cancel()
+            return result.get("content")
+        finally:
+            if not fetch_thread.is_alive():
+                with self._http_lock:
+                    session, self._session, self._response = self._session, None, None
+                session.close()
+    
+    def _validate(self, content: bytes) -> None:
+        """Проверка наличия ядра и содержимого конфига"""
+        if not self.core_exe.exists():
+            raise RuntimeError(tr("messages.no_core"))
+        if not content.strip():
+            raise RuntimeError("Пустой конфиг")
+        if self.content_hash is not None:
+            # Конфиг подписки разобран и проверен при скачивании - повторный разбор не нужен
+            return
+        parsed = None
+        try:
+            parsed = json.loads(content.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError) as e:
+            # Не блокируем запуск - окончательное решение за самим sing-box
+            log_to_file(f"[Start] Конфиг не является валидным JSON: {e}")
+        # Хэш примененного конфига - по нему автообновление пропускает перезагрузку без изменений
+        self.content_hash = config_hash(content, parsed)
+    
+    def _write(self, content: bytes) -> None:
+        """Запись config.json"""
+        if not self.subs_manager.write_config_file(content, self.index, self.content_hash):
+            raise RuntimeError(f"Не удалось записать {self.config_file}")
+    
+    def _spawn(self):
+        """Запуск процесса и потока чтения логов"""
+        proc = _spawn_singbox(self.core_exe, self.config_file, self.core_dir)
+        log_reader = SingBoxLogReaderThread(
+            proc,
+            SINGBOX_CORE_LOG_FILE,
+            disk_level=self.disk_log_level,
+            ui_level=self.ui_log_level
+        )
+        log_reader.start()
+        return proc, log_reader
+    
+    def _wait_ready(self, proc: subprocess.Popen, log_reader: SingBoxLogReaderThread) -> None:
+        """
+        Ожидание готовности ядра
+        
+        Готовность - строка "sing-box started" в выводе ядра. Если логирование в конфиге
+        выключено, считаем ядро готовым, когда процесс прожил READY_TIMEOUT секунд.
+        """
+        deadline = time.monotonic() + self.READY_TIMEOUT
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                returncode = proc.returncode if proc.returncode is not None else -1
+                raise RuntimeError(f"Процесс завершился сразу после запуска с кодом {returncode}")
+            self._check_cancel()
+            if log_reader.started_event.wait(0.05):
+                return
+    
+    def _shutdown(self, proc: Optional[subprocess.Popen], log_reader: Optional[SingBoxLogReaderThread]) -> None:
+        """Остановка частично запущенного ядра при ошибке или отмене"""
+        stop_singbox_process(proc, log_reader)
+
+
+def stop_singbox_process(
+    proc: Optional[subprocess.Popen],
+    log_reader: Optional[SingBoxLogReaderThread] = None
+) -> None:
+    """
+    Остановка процесса sing-box и потока чтения его логов
+    
+    Блокирует до нескольких секунд (ожидание потока и процесса) -
+    вызывать из фонового потока.
+    """
+    if log_reader:
+        log_reader.stop()
+        log_reader.wait(1000)  # Ждем остановки потока чтения логов
+    if proc and proc.poll() is None:
+        try:
+            proc.terminate()
+            proc.wait(timeout=5)
+        except Exception:
+            try:
+                proc.kill()
+            except Exception:
+                pass
 
 
 def reload_singbox_config(core_exe: Path, config_file: Path, core_dir: Path) -> bool:
@@ -1,12 +1,16 @@
 """Главный файл приложения SingBox-UI"""
 import sys
+
+# Трассировка запуска (--trace-startup) включается до остальных импортов, чтобы учесть и их время
+from utils.startup_trace import STARTUP_TRACE
+STARTUP_TRACE.enable_from_argv()
+STARTUP_TRACE.begin("module imports")
+
 import subprocess
 import ctypes
 import os
-import zipfile
-import shutil
-import tempfile
 import time
+import threading
 import atexit
 from pathlib import Path
 from typing import Optional
@@ -108,25 +112,16 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, QByteArray
 from PyQt5.QtNetwork import QLocalServer, QLocalSocket
 from PyQt5.QtGui import QFont, QPalette, QColor, QIcon
-from utils.icon_helper import icon
+from utils.icon_helper import icon, IconHelper
+from utils.lazy_import import lazy_import
 
 # Импорты новых UI компонентов
 from ui.design.component import NavButton, Container, Label, Button
 from ui.design import CardWidget, TitleBar
 from ui.styles import StyleSheet, theme
 from ui.tray_manager import TrayManager
-from ui.design.component import (
-    show_info_dialog,
-    show_confirm_dialog,
-    show_input_dialog,
-    show_add_subscription_dialog,
-    show_add_profile_dialog,
-    show_edit_profile_dialog,
-    show_language_selection_dialog,
-    show_kill_all_confirm_dialog,
-    show_kill_all_success_dialog,
-    DownloadDialog
-)
+# Диалоги (и редактор конфига на WebEngine) загружаются при первом показе диалога
+dialogs = lazy_import("ui.design.component.dialog")
 
 # Импорты из архитектуры проекта
 from config.paths import (
@@ -142,18 +137,26 @@ from core.downloader import DownloadThread
 from core.deep_link_handler import DeepLinkHandler
 from core.protocol import register_protocols, unregister_protocols
 from core.restart_manager import restart_application
-from core.singbox_manager import StartSingBoxThread, reload_singbox_config
+from core.singbox_manager import StartSingBoxPipeline, reload_singbox_config, stop_singbox_process
 from workers.init_worker import InitOperationsWorker
 from workers.version_worker import CheckVersionWorker, CheckAppVersionWorker
-import requests
-from datetime import datetime
-from utils.logger import log_to_file, set_main_window
+from workers.subscription_worker import SubscriptionRefreshWorker, SubscriptionBulkRefreshWorker
+from workers.latency_worker import LatencyTestWorker
+from utils.logger import log_to_file, set_main_window, shutdown_logging, set_structured_logging, set_log_level, log_level_from_name
+from utils.log_rotation import LOG_ROTATOR
 from utils.icon_manager import get_icon, set_window_icon
 
 
 class MainWindow(QMainWindow):
     """Главное окно приложения"""
     
+    # Индексы страниц в стеке
+    PAGE_PROFILE = 0
+    PAGE_HOME = 1
+    PAGE_SETTINGS = 2
+    # Задержка перед созданием остальных страниц в простое после запуска, мс
+    PAGE_PREBUILD_DELAY_MS = 300
+    
     def __init__(self):
         super().__init__()
         ensure_dirs()
@@ -162,6 +165,14 @@ class MainWindow(QMainWindow):
         
         self.settings = SettingsManager()
         self.subs = SubscriptionManager()
+        self.subs.max_download_size = int(self.settings.get("subscription_max_size_mb", 16)) * 1024 * 1024
+        self.subs.pretty_print = bool(self.settings.get("subscription_pretty_print", False))
+        LOG_ROTATOR.configure(
+            max_bytes=int(self.settings.get("log_max_size_mb", 10)) * 1024 * 1024,
+            max_segments=int(self.settings.get("log_max_segments", 5))
+        )
+        set_log_level(log_level_from_name(self.settings.get("log_level", "debug")))
+        set_structured_logging(bool(self.settings.get("log_structured", False)))
         self.system_settings = SystemSettingsManager(self.settings)
         self.tray_manager = TrayManager(self)
         self.log_ui_manager = LogUIManager(self)
@@ -179,7 +190,7 @@ class MainWindow(QMainWindow):
             # Сначала устанавливаем английский для отображения диалога
             set_language("en")
             # Показываем диалог выбора языка
-            language = show_language_selection_dialog(self)
+            language = dialogs.show_language_selection_dialog(self)
             # Сохраняем выбранный язык
             self.settings.set("language", language)
             self.settings.save()
@@ -192,6 +203,7 @@ class MainWindow(QMainWindow):
         # Загружаем сохраненный индекс выбранного профиля из настроек
         self.current_sub_index: int = self.settings.get("current_sub_index", -1)
         self.running_sub_index: int = -1  # Индекс запущенного профиля (-1 если не запущен)
+        self.config_reload_stats = {"applied": 0, "skipped": 0}  # Решения автообновления: применено / пропущено без изменений
         self.cached_latest_version = None  # Кэш последней версии
         self.version_check_failed_count = 0  # Счетчик неудачных проверок
         self.version_check_retry_timer = None  # Таймер для повторных попыток проверки версии
@@ -219,19 +231,24 @@ class MainWindow(QMainWindow):
         self.title_bar = TitleBar(self)
         root.addWidget(self.title_bar)
 
-        # Стек страниц
+        # Стек страниц: страница создается при первом переключении на нее
+        # (или в простое после запуска), до этого в стеке стоит пустая заглушка.
+        # Атрибут page_* появляется только после создания страницы - проверки
+        # hasattr(self, 'page_*') пропускают еще не созданные страницы.
         self.stack = QStackedWidget()
         self.stack.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         from ui.pages import ProfilePage, HomePage, SettingsPage
-        self.page_profile = ProfilePage(self)
-        self.page_home = HomePage(self)
-        self.page_settings = SettingsPage(self)
-        self.stack.addWidget(self.page_profile)
-        self.stack.addWidget(self.page_home)
-        self.stack.addWidget(self.page_settings)
-
-        # По умолчанию открываем home (индекс 1)
-        self.stack.setCurrentIndex(1)
+        self._page_factories = {
+            self.PAGE_PROFILE: ("page_profile", ProfilePage),
+            self.PAGE_HOME: ("page_home", HomePage),
+            self.PAGE_SETTINGS: ("page_settings", SettingsPage),
+        }
+        for _ in self._page_factories:
+            self.stack.addWidget(QWidget())
+
+        # По умолчанию открываем home - она создается сразу
+        self._ensure_page(self.PAGE_HOME)
+        self.stack.setCurrentIndex(self.PAGE_HOME)
         
         # Нижняя навигация
         nav = Container()
@@ -301,6 +318,8 @@ class MainWindow(QMainWindow):
         # Инициализация
         # Выносим тяжелые операции в потоки, чтобы не блокировать UI
         QTimer.singleShot(0, self._init_async_operations)
+        # Остальные страницы создаются после первой отрисовки окна
+        QTimer.singleShot(self.PAGE_PREBUILD_DELAY_MS, self._prebuild_pages)
         
         # Обновляем UI элементы, которые не требуют данных
         self.update_big_button_state()
@@ -314,13 +333,11 @@ class MainWindow(QMainWindow):
             running_index = -1
             current_index = -1
             
-            # Безопасная проверка наличия page_profile и sub_list
-            if hasattr(self, 'page_profile'):
-                if hasattr(self.page_profile, 'sub_list'):
-                    if self.page_profile.sub_list.count() > 0:
-                        if running:
-                            running_index = self.running_sub_index
-                        current_index = self.current_sub_index
+            # Страница профилей может быть еще не создана - смотрим на сами профили
+            if self.subs.data.get("profiles"):
+                if running:
+                    running_index = self.running_sub_index
+                current_index = self.current_sub_index
             
             log_to_file(f"[Init] Индексы: running={running_index}, current={current_index}")
             
@@ -329,6 +346,7 @@ class MainWindow(QMainWindow):
             self._init_thread.version_checked.connect(self._on_version_checked)
             self._init_thread.profile_info_loaded.connect(self._on_profile_info_loaded)
             self._init_thread.cleanup_finished.connect(self._on_cleanup_finished)
+            STARTUP_TRACE.trace_worker("InitOperationsWorker", self._init_thread)
             self._init_thread.start()
             log_to_file("[Init] InitOperationsWorker запущен")
             
@@ -386,6 +404,7 @@ class MainWindow(QMainWindow):
         
         self._version_thread = CheckVersionWorker()
         self._version_thread.version_info_ready.connect(self._on_version_info_ready)
+        STARTUP_TRACE.trace_worker("CheckVersionWorker", self._version_thread)
         self._version_thread.start()
     
     def _on_version_info_ready(self, current_version, latest_version):
@@ -434,6 +453,10 @@ class MainWindow(QMainWindow):
         
         self._app_version_thread = CheckAppVersionWorker()
         self._app_version_thread.app_version_ready.connect(self._on_app_version_ready)
+        STARTUP_TRACE.trace_worker("CheckAppVersionWorker", self._app_version_thread)
+        if STARTUP_TRACE.enabled:
+            # Проверка версии приложения - последний этап запуска: после нее трасса записывается
+            self._app_version_thread.finished.connect(STARTUP_TRACE.finish)
         self._app_version_thread.start()
     
     def _on_app_version_ready(self, latest_version):
@@ -470,19 +493,54 @@ class MainWindow(QMainWindow):
         self.log_cleanup_timer = QTimer(self)
         self.log_cleanup_timer.timeout.connect(self.cleanup_logs_if_needed)
         self.log_cleanup_timer.start(60 * 60 * 1000)
-        
-        self.logs_refresh_timer = QTimer(self)
-        self.logs_refresh_timer.timeout.connect(self.refresh_logs_from_files)
-        self.logs_refresh_timer.start(1000)
 
 
     # Навигация
     def switch_page(self, index: int):
-        """Переключение страниц"""
+        """Переключение страниц (страница создается при первом переключении на нее)"""
+        self._ensure_page(index)
         self.stack.setCurrentIndex(index)
         for i, btn in enumerate([self.btn_nav_profile, self.btn_nav_home, self.btn_nav_settings]):
             btn.setChecked(i == index)
 
+    def _ensure_page(self, index: int) -> Optional[QWidget]:
+        """
+        Создать страницу, если она еще не создана, и поставить ее в стек вместо заглушки
+        
+        Returns:
+            Страница или None для неизвестного индекса
+        """
+        if index not in self._page_factories:
+            return None
+        attr, factory = self._page_factories[index]
+        page = getattr(self, attr, None)
+        if page is not None:
+            return page
+        
+        with STARTUP_TRACE.phase(factory.__name__):
+            page = factory(self)
+        placeholder = self.stack.widget(index)
+        current = self.stack.currentWidget()
+        self.stack.removeWidget(placeholder)
+        self.stack.insertWidget(index, page)
+        self.stack.setCurrentWidget(page if current is placeholder else current)
+        placeholder.deleteLater()
+        setattr(self, attr, page)
+        
+        # Страница построена по текущим настройкам, теме и языку; список профилей заполняем отдельно
+        if index == self.PAGE_PROFILE:
+            page.refresh_subscriptions()
+        log_to_file(f"[UI] Страница создана: {factory.__name__}")
+        return page
+    
+    def _prebuild_pages(self):
+        """Создать следующую несозданную страницу; по одной за проход цикла событий, чтобы не блокировать ввод"""
+        for index, (attr, _) in self._page_factories.items():
+            if not hasattr(self, attr):
+                self._ensure_page(index)
+                QTimer.singleShot(0, self._prebuild_pages)
+                return
+    
     # Подписки
     def refresh_subscriptions_ui(self):
         """Обновление списка подписок"""
@@ -549,7 +607,7 @@ class MainWindow(QMainWindow):
 
     def on_add_sub(self):
         """Добавление профиля (подписка или готовый конфиг)"""
-        name, url, config, profile_type, ok = show_add_profile_dialog(self)
+        name, url, config, profile_type, ok = dialogs.show_add_profile_dialog(self)
         if ok and name:
             # Сохраняем текущий выбранный профиль
             saved_index = self.current_sub_index
@@ -584,8 +642,8 @@ class MainWindow(QMainWindow):
             return
         
         # Используем красивое диалоговое окно
-        if show_kill_all_success_dialog(self, tr("profile.delete_question"),
-                                        tr("profile.delete_confirm", name=sub['name'])):
+        if dialogs.show_kill_all_success_dialog(self, tr("profile.delete_question"),
+                                                tr("profile.delete_confirm", name=sub['name'])):
             was_running = self.running_sub_index == row
             self.subs.remove(row)
             
@@ -625,7 +683,7 @@ class MainWindow(QMainWindow):
         saved_index = self.current_sub_index
         
         # Диалог редактирования профиля
-        name, url, config, profile_type, ok = show_edit_profile_dialog(self, profile)
+        name, url, config, profile_type, ok = dialogs.show_edit_profile_dialog(self, profile)
         
         if ok and name:
             old_name = profile.get("name", "")
@@ -652,8 +710,67 @@ class MainWindow(QMainWindow):
                 self.current_sub_index = saved_index
             self.log(tr("profile.profile_updated", name=name))
     
+    def on_refresh_all_subs(self):
+        """Параллельное обновление всех подписок"""
+        if hasattr(self, '_bulk_refresh_thread') and self._bulk_refresh_thread.isRunning():
+            return
+        
+        self.log(tr("profile.refresh_all_started"))
+        if hasattr(self, 'page_profile') and hasattr(self.page_profile, 'btn_refresh_all'):
+            self.page_profile.btn_refresh_all.setEnabled(False)
+        
+        self._bulk_refresh_thread = SubscriptionBulkRefreshWorker(self.subs)
+        self._bulk_refresh_thread.profile_refreshed.connect(self._on_profile_refreshed)
+        self._bulk_refresh_thread.all_refreshed.connect(self._on_all_subs_refreshed)
+        self._bulk_refresh_thread.error.connect(self._on_all_subs_refresh_error)
+        self._bulk_refresh_thread.start()
+    
+    def _on_profile_refreshed(self, result: dict):
+        """Результат обновления одной подписки"""
+        status_text = {
+            SubscriptionManager.FETCH_UPDATED: tr("profile.refresh_status_updated"),
+            SubscriptionManager.FETCH_NOT_MODIFIED: tr("profile.refresh_status_not_modified"),
+        }.get(result["status"], tr("profile.refresh_status_error"))
+        log_to_file(
+            f"[Refresh All] {result['name']}: {result['status']}, "
+            f"{result['latency_ms']:.0f} мс, {result['size']} байт"
+        )
+        if hasattr(self, 'page_profile') and hasattr(self.page_profile, 'set_refresh_status'):
+            self.page_profile.set_refresh_status(
+                result["index"],
+                tr("profile.refresh_status",
+                   status=status_text,
+                   latency=f"{result['latency_ms']:.0f}",
+                   size=f"{result['size'] / 1024:.1f}")
+            )
+    
+    def _on_all_subs_refreshed(self, results: list, elapsed_ms: float):
+        """Все подписки обновлены"""
+        if hasattr(self, 'page_profile') and hasattr(self.page_profile, 'btn_refresh_all'):
+            self.page_profile.btn_refresh_all.setEnabled(True)
+        counts = {status: 0 for status in (
+            SubscriptionManager.FETCH_UPDATED,
+            SubscriptionManager.FETCH_NOT_MODIFIED,
+            SubscriptionManager.FETCH_ERROR
+        )}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        self.log(tr(
+            "profile.refresh_all_done",
+            updated=counts[SubscriptionManager.FETCH_UPDATED],
+            not_modified=counts[SubscriptionManager.FETCH_NOT_MODIFIED],
+            failed=counts[SubscriptionManager.FETCH_ERROR],
+            seconds=f"{elapsed_ms / 1000:.1f}"
+        ))
+    
+    def _on_all_subs_refresh_error(self, error_msg: str):
+        """Ошибка потока обновления всех подписок"""
+        log_to_file(f"[Refresh All] {error_msg}")
+        if hasattr(self, 'page_profile') and hasattr(self.page_profile, 'btn_refresh_all'):
+            self.page_profile.btn_refresh_all.setEnabled(True)
+    
     def on_test_sub(self):
-        """Тест подписки"""
+        """Проверка задержки до серверов выбранного профиля"""
         if not hasattr(self, 'page_profile') or not hasattr(self.page_profile, 'sub_list'):
             return
         row = self.page_profile.sub_list.currentRow()
@@ -662,34 +779,68 @@ class MainWindow(QMainWindow):
             return
         if row >= self.page_profile.sub_list.count():
             return
-        
-        # Получаем название подписки для отображения
-        sub = self.subs.get(row)
-        sub_name = sub.get("name", "Unknown") if sub else "Unknown"
+        if hasattr(self, '_latency_thread') and self._latency_thread.isRunning():
+            return
         
         self.log(tr("profile.test_loading"))
+        if hasattr(self.page_profile, 'btn_test_sub'):
+            self.page_profile.btn_test_sub.setEnabled(False)
         
-        try:
-            ok = self.subs.apply_config(row)
-            if ok:
-                self.log(tr("profile.test_success"))
-                # Показываем успешное сообщение
-                show_info_dialog(
-                    self,
-                    tr("profile.test"),
-                    f"{tr('profile.test_success')}\n\nSubscription '{sub_name}' works correctly. Config downloaded successfully.",
-                    success=True
-                )
-            else:
-                self.log(tr("profile.test_error"))
-                # Показываем ошибку
-                show_info_dialog(
-                    self,
-                    tr("profile.test"),
-                    f"{tr('profile.test_error')}\n\nFailed to download config from subscription '{sub_name}'. Please check the URL."
+        self._latency_thread = LatencyTestWorker(self.subs, row)
+        self._latency_thread.test_finished.connect(self._on_latency_test_finished)
+        self._latency_thread.error.connect(self._on_latency_test_error)
+        self._latency_thread.start()
+    
+    def _format_latency_result(self, rank: int, result: dict) -> str:
+        """Строка результата проверки сервера для списка"""
+        if result["error"] is None:
+            if result["tls_ms"] is not None:
+                return tr(
+                    "profile.latency_row_tls", rank=rank, tag=result["tag"], type=result["type"],
+                    total=f"{result['total_ms']:.0f}", tcp=f"{result['tcp_ms']:.0f}", tls=f"{result['tls_ms']:.0f}"
                 )
-        finally:
-            pass
+            return tr(
+                "profile.latency_row", rank=rank, tag=result["tag"], type=result["type"],
+                total=f"{result['total_ms']:.0f}"
+            )
+        error_text = {
+            "timeout": tr("profile.latency_error_timeout"),
+            "dns": tr("profile.latency_error_dns"),
+            "refused": tr("profile.latency_error_refused"),
+            "tls": tr("profile.latency_error_tls"),
+            "udp": tr("profile.latency_error_udp"),
+        }.get(result["error"], result["error"])
+        return tr("profile.latency_row_error", rank=rank, tag=result["tag"], type=result["type"], error=error_text)
+    
+    def _on_latency_test_finished(self, index: int, results: list, elapsed_ms: float):
+        """Результаты проверки задержки готовы"""
+        if hasattr(self, 'page_profile') and hasattr(self.page_profile, 'btn_test_sub'):
+            self.page_profile.btn_test_sub.setEnabled(True)
+        sub = self.subs.get(index)
+        sub_name = sub.get("name", "Unknown") if sub else "Unknown"
+        if not results:
+            self.log(tr("profile.latency_no_servers"))
+            dialogs.show_info_dialog(self, tr("profile.test"), tr("profile.latency_no_servers"))
+            return
+        
+        reachable = sum(1 for r in results if r["error"] is None)
+        summary = tr(
+            "profile.latency_summary",
+            reachable=reachable,
+            total=len(results),
+            seconds=f"{elapsed_ms / 1000:.1f}"
+        )
+        self.log(tr("profile.test_success") + " " + summary)
+        rows = [self._format_latency_result(rank, result) for rank, result in enumerate(results, 1)]
+        dialogs.show_latency_results_dialog(self, tr("profile.latency_title", name=sub_name), summary, rows)
+    
+    def _on_latency_test_error(self, error_msg: str):
+        """Ошибка потока проверки задержки"""
+        log_to_file(f"[Latency Test] {error_msg}")
+        if hasattr(self, 'page_profile') and hasattr(self.page_profile, 'btn_test_sub'):
+            self.page_profile.btn_test_sub.setEnabled(True)
+        self.log(tr("profile.test_error"))
+        dialogs.show_info_dialog(self, tr("profile.test"), tr("profile.test_error"))
     
     def _log_version_debug(self, msg: str):
         """Логирование версий в debug логи"""
@@ -774,7 +925,7 @@ class MainWindow(QMainWindow):
             return
         
         # Используем диалог подтверждения с правильными кнопками
-        if show_confirm_dialog(
+        if dialogs.show_confirm_dialog(
             self,
             tr("app.update_title"),
             tr("app.update_message", version=self.cached_app_latest_version, current=self.app_version),
@@ -798,7 +949,7 @@ class MainWindow(QMainWindow):
         updater_exe = DATA_DIR / "updater.exe"
         
         if not updater_exe.exists():
-            show_info_dialog(self, tr("app.update_error_title"), f"updater.exe not found at {updater_exe}")
+            dialogs.show_info_dialog(self, tr("app.update_error_title"), f"updater.exe not found at {updater_exe}")
             return
         
         log_to_file(f"[App Update] Starting updater.exe (target={self.cached_app_latest_version or 'latest main'})")
@@ -818,7 +969,7 @@ class MainWindow(QMainWindow):
             QApplication.quit()
         except Exception as e:
             log_to_file(f"[App Update] Error starting updater: {e}")
-            show_info_dialog(self, tr("app.update_error_title"), f"Error starting updater: {e}")
+            dialogs.show_info_dialog(self, tr("app.update_error_title"), f"Error starting updater: {e}")
     
     def update_profile_info(self):
         """Обновление информации о профиле"""
@@ -902,7 +1053,7 @@ class MainWindow(QMainWindow):
         # Определяем режим и сообщение
         if is_update and current_version and latest_version:
             # Режим обновления - показываем диалог подтверждения
-            if show_confirm_dialog(
+            if dialogs.show_confirm_dialog(
                 self,
                 tr("download.title"),
                 tr("download.update_available", latest_version=latest_version, current_version=current_version),
@@ -910,18 +1061,18 @@ class MainWindow(QMainWindow):
                 no_text=tr("download.cancel")
             ):
                 # Пользователь хочет обновиться - показываем диалог загрузки
-                dialog = DownloadDialog(self, self._start_download_from_dialog)
+                dialog = dialogs.DownloadDialog(self, self._start_download_from_dialog)
                 dialog.exec_()
         elif not CORE_EXE.exists():
             # Ядра нет - показываем диалог установки
-            dialog = DownloadDialog(self, self._start_download_from_dialog, message=tr("download.core_required"))
+            dialog = dialogs.DownloadDialog(self, self._start_download_from_dialog, message=tr("download.core_required"))
             dialog.exec_()
         else:
             # Обычная установка (не должно происходить, но на всякий случай)
-            dialog = DownloadDialog(self, self._start_download_from_dialog)
+            dialog = dialogs.DownloadDialog(self, self._start_download_from_dialog)
             dialog.exec_()
     
-    def _start_download_from_dialog(self, dialog: DownloadDialog):
+    def _start_download_from_dialog(self, dialog: "dialogs.DownloadDialog"):
         """Запуск загрузки из диалога (коллбэк)"""
         dialog.download_thread = DownloadThread()
         dialog.download_thread.progress.connect(dialog.progress_bar.setValue)
@@ -930,7 +1081,7 @@ class MainWindow(QMainWindow):
         )
         dialog.download_thread.start()
     
-    def _on_download_finished(self, success: bool, message: str, dialog: DownloadDialog):
+    def _on_download_finished(self, success: bool, message: str, dialog: "dialogs.DownloadDialog"):
         """Завершение загрузки"""
         dialog.on_download_finished(success, message)
         if success:
@@ -1083,7 +1234,13 @@ class MainWindow(QMainWindow):
         if hasattr(self.page_home, 'big_btn') and hasattr(self.page_home.big_btn, 'set_running'):
             self.page_home.big_btn.set_running(running)
         
-        if running:
+        if self.is_starting():
+            # Идет запуск - кнопка активна и отменяет запуск
+            if hasattr(self.page_home, 'btn_container'):
+                self.page_home.btn_container.show()
+            self.page_home.big_btn.setEnabled(True)
+            self.page_home.big_btn.setText(tr("home.button_cancel"))
+        elif running:
             # Если запущен - кнопка всегда видна и активна (можно остановить), даже если профиль не выбран
             if hasattr(self.page_home, 'btn_container'):
                 self.page_home.btn_container.show()
@@ -1097,9 +1254,8 @@ class MainWindow(QMainWindow):
                 self.page_home.big_btn.setText(tr("home.button_stop"))
         else:
             # Если не запущен - нужен выбранный профиль для запуска
-            has_sub = False
-            if hasattr(self, 'page_profile') and hasattr(self.page_profile, 'sub_list'):
-                has_sub = self.page_profile.sub_list.count() > 0 and self.current_sub_index >= 0
+            # Страница профилей может быть еще не создана - смотрим на сами профили
+            has_sub = bool(self.subs.data.get("profiles")) and self.current_sub_index >= 0
             
             if has_sub and core_ok:
                 # Профиль выбран и core доступен - показываем кнопку
@@ -1118,6 +1274,11 @@ class MainWindow(QMainWindow):
 
     def on_big_button(self):
         """Обработка нажатия большой кнопки"""
+        if self.is_starting():
+            # Повторное нажатие во время запуска - отмена
+            self.cancel_start()
+            return
+        
         running = self.proc and self.proc.poll() is None
         
         if running:
@@ -1136,44 +1297,76 @@ class MainWindow(QMainWindow):
             self.start_singbox()
 
     # Запуск/остановка
+    def is_starting(self) -> bool:
+        """Выполняется ли сейчас запуск sing-box"""
+        thread = getattr(self, 'start_thread', None)
+        return thread is not None and not thread.is_cancelled()
+    
     def start_singbox(self):
-        """Запуск SingBox"""
-        if not CORE_EXE.exists():
-            self.log(tr("messages.no_core"))
-            self.update_version_info()
+        """Запуск SingBox (все стадии выполняются в фоновом потоке)"""
+        if self.is_starting():
             return
-        if not hasattr(self, 'page_profile') or not hasattr(self.page_profile, 'sub_list'):
-            return
-        if self.current_sub_index < 0 or self.page_profile.sub_list.count() == 0:
+        if self.current_sub_index < 0 or not self.subs.data.get("profiles"):
             self.log(tr("messages.no_subscription"))
             return
         
-        log_to_file(tr("messages.downloading_config"))
-        ok = self.subs.apply_config(self.current_sub_index)
-        if not ok:
-            self.log(tr("messages.config_error"))
-            return
-        
-        # Запускаем в отдельном потоке чтобы не блокировать UI
         self.log(tr("messages.starting"))
-        # Отключаем кнопку на время запуска
-        if hasattr(self, 'page_home') and hasattr(self.page_home, 'big_btn'):
-            self.page_home.big_btn.setEnabled(False)
         
-        self.start_thread = StartSingBoxThread(CORE_EXE, CONFIG_FILE, CORE_DIR)
-        self.start_thread.finished.connect(self.on_singbox_started)
+        # Стартуем из последнего известного конфига, подписку обновляем в фоне после запуска
+        self.start_thread = StartSingBoxPipeline(
+            self.subs,
+            self.current_sub_index,
+            use_cache=True,
+            disk_log_level=self.settings.get("singbox_log_disk_level", "trace"),
+            ui_log_level=self.settings.get("singbox_log_ui_level", "trace"),
+            parent=self
+        )
+        self.start_thread.stage_started.connect(self.on_start_stage_started)
+        self.start_thread.stage_finished.connect(self.on_start_stage_finished)
+        self.start_thread.ready.connect(self.on_singbox_started)
         self.start_thread.error.connect(self.on_singbox_start_error)
+        self.start_thread.cancelled.connect(self.on_singbox_start_cancelled)
+        self.start_thread.finished.connect(self.start_thread.deleteLater)
         self.start_thread.start()
+        # Кнопка остается активной - повторное нажатие отменяет запуск
+        self.update_big_button_state()
+    
+    def cancel_start(self):
+        """Отмена запуска sing-box"""
+        thread = getattr(self, 'start_thread', None)
+        if thread is None:
+            return
+        thread.cancel()
+        self.start_thread = None
+        self.log(tr("messages.start_cancelled"))
+        self.update_big_button_state()
+    
+    def on_start_stage_started(self, stage: str, number: int, total: int):
+        """Начало стадии запуска"""
+        log_to_file(f"[Start] Стадия {number}/{total}: {stage}")
+    
+    def on_start_stage_finished(self, stage: str, elapsed_ms: float):
+        """Завершение стадии запуска"""
+        log_to_file(f"[Start] Стадия {stage} завершена за {elapsed_ms:.0f} мс")
     
     def on_singbox_started(self, proc, log_reader_thread=None):
         """Обработка успешного запуска SingBox"""
+        thread = self.sender()
+        if thread is not getattr(self, 'start_thread', None):
+            # Запуск был отменен, а поток успел дойти до конца - останавливаем лишний процесс
+            self._stop_orphan_process(proc, log_reader_thread)
+            return
+        self.start_thread = None
         self.proc = proc
         self.singbox_log_reader_thread = log_reader_thread
         # Проверяем, что процесс действительно запущен
         if proc is not None and proc.poll() is None:
-            self.running_sub_index = self.current_sub_index  # Запоминаем запущенный профиль
+            self.running_sub_index = thread.index  # Запоминаем запущенный профиль
             self.log(tr("messages.started_success"))
             self.update_profile_info()
+            if thread.from_cache:
+                log_to_file(tr("messages.starting_cached"))
+                self._start_background_refresh(self.running_sub_index)
         else:
             # Процесс завершился сразу после запуска
             if log_reader_thread:
@@ -1187,8 +1380,30 @@ class MainWindow(QMainWindow):
             self.running_sub_index = -1
         self.update_big_button_state()
     
+    def _stop_orphan_process(self, proc, log_reader_thread=None):
+        """
+        Остановка процесса, запущенного уже отмененным запуском
+        
+        Обычно отмененный конвейер сам останавливает ядро в своем потоке; сюда
+        попадает только отмена в момент между проверкой и сигналом ready.
+        Ожидание процесса (до нескольких секунд) - в фоновом потоке, не в UI.
+        """
+        threading.Thread(
+            target=stop_singbox_process,
+            args=(proc, log_reader_thread),
+            name="start-orphan-stop",
+            daemon=True
+        ).start()
+    
+    def on_singbox_start_cancelled(self):
+        """Поток запуска остановился после отмены"""
+        log_to_file("[Start] Запуск отменен, поток запуска завершен")
+    
     def on_singbox_start_error(self, error_msg):
         """Обработка ошибки запуска SingBox"""
+        if self.sender() is not getattr(self, 'start_thread', None):
+            return
+        self.start_thread = None
         self.log(tr("messages.start_error", error=error_msg))
         self.proc = None
         self.singbox_log_reader_thread = None
@@ -1229,25 +1444,55 @@ class MainWindow(QMainWindow):
             # sing-box не запущен - автообновление не работает
             return
         
-        if not hasattr(self, 'page_profile') or not hasattr(self.page_profile, 'sub_list'):
-            return
-        if self.current_sub_index < 0 or self.page_profile.sub_list.count() == 0:
+        if self.running_sub_index < 0 or not self.subs.data.get("profiles"):
             return
         
-        # Проверяем, является ли текущий профиль подпиской
-        if not self.subs.is_subscription(self.current_sub_index):
+        # Проверяем, является ли запущенный профиль подпиской
+        if not self.subs.is_subscription(self.running_sub_index):
             # Для готовых конфигов автообновление не работает
             return
         
         log_to_file(tr("messages.auto_update"))
-        ok = self.subs.download_config(self.current_sub_index)
+        # Скачивание и сравнение хэша идут в фоне, применение - в _on_background_refresh_finished
+        self._start_background_refresh(self.running_sub_index)
+
+    def _start_background_refresh(self, index: int):
+        """Фоновое обновление подписки запущенного профиля"""
+        if hasattr(self, '_refresh_thread') and self._refresh_thread.isRunning():
+            return
+        
+        self._refresh_thread = SubscriptionRefreshWorker(self.subs, index)
+        self._refresh_thread.refresh_finished.connect(self._on_background_refresh_finished)
+        self._refresh_thread.start()
+    
+    def _on_background_refresh_finished(self, index: int, ok: bool, content_hash: str):
+        """
+        Обработка результата фонового обновления подписки
+        
+        Если канонический хэш скачанного конфига совпадает с хэшем примененного,
+        config.json не перезаписывается и sing-box не перезагружается.
+        """
         if not ok:
             self.log(tr("messages.auto_update_error"))
             return
-        
-        # Используем reload вместо перезапуска
-        if reload_singbox_config(CORE_EXE, CONFIG_FILE, CORE_DIR):
-            self.log(tr("messages.auto_update_restart"))
+        # Новый конфиг уже в кэше; применяем сразу только если профиль все еще запущен
+        if not self.proc or self.proc.poll() is not None or index != self.running_sub_index:
+            return
+        stats = self.config_reload_stats
+        if self.subs.get_applied_hash(index) == content_hash:
+            stats["skipped"] += 1
+            log_to_file(
+                f"[Auto Update] Конфиг не изменился ({content_hash[:12]}), перезагрузка пропущена "
+                f"(пропущено: {stats['skipped']}, применено: {stats['applied']})"
+            )
+            return
+        if self.subs.apply_cached_config(index, content_hash) and reload_singbox_config(CORE_EXE, CONFIG_FILE, CORE_DIR):
+            stats["applied"] += 1
+            log_to_file(
+                f"[Auto Update] Конфиг изменился ({content_hash[:12]}), применен "
+                f"(пропущено: {stats['skipped']}, применено: {stats['applied']})"
+            )
+            self.log(tr("messages.config_refreshed"))
         else:
             self.log(tr("messages.auto_update_error"))
 
@@ -1352,8 +1597,11 @@ class MainWindow(QMainWindow):
                     theme_name = get_theme_name(theme_id, current_language)
                     self.log(tr("settings.theme_changed", theme=theme_name))
                     
-                    # Обновляем все стили UI при смене темы
+                    # Обновляем все стили UI при смене темы (заново рисуются только иконки с новыми цветами)
+                    started = time.perf_counter()
+                    IconHelper.warm_up()
                     self.refresh_ui_styles()
+                    log_to_file(f"[UI] Стили обновлены для темы {theme_id} за {(time.perf_counter() - started) * 1000:.0f} мс")
 
 
     def refresh_ui_styles(self):
@@ -1387,7 +1635,7 @@ class MainWindow(QMainWindow):
         # Обновляем навигацию
         nav = self.findChild(QWidget, 'nav')
         if nav:
-            nav.setStyleSheet(StyleSheet.navigation())
+            StyleSheet.apply(nav, StyleSheet.navigation())
         
         # Обновляем version container
         if hasattr(self, 'version_container'):
@@ -1411,8 +1659,8 @@ class MainWindow(QMainWindow):
         self.update_version_info()
         self.update_app_version_display()
         self.update_big_button_state()
-        # Обновляем главное окно
-        self.setStyleSheet(StyleSheet.global_styles())
+        # Обновляем главное окно (global_styles не зависит от цветов темы - обычно пропускается)
+        StyleSheet.apply(self, StyleSheet.global_styles())
         
         # Обновляем центральный виджет (фон окна)
         central = self.centralWidget()
@@ -1436,18 +1684,14 @@ class MainWindow(QMainWindow):
                 if hasattr(self.page_settings._logs_window, 'apply_theme'):
                     self.page_settings._logs_window.apply_theme()
         
-        # Принудительно обновляем все виджеты для перерисовки
+        # Перерисовка в следующем цикле событий: repaint() рисовал окно синхронно несколько раз подряд
         self.update()
-        self.repaint()
         if hasattr(self, 'page_home'):
             self.page_home.update()
-            self.page_home.repaint()
         if hasattr(self, 'page_profile'):
             self.page_profile.update()
-            self.page_profile.repaint()
         if hasattr(self, 'page_settings'):
             self.page_settings.update()
-            self.page_settings.repaint()
     
     def _refresh_tray_manager(self):
         """Обновляет tray manager при смене темы"""
@@ -1678,6 +1922,21 @@ class MainWindow(QMainWindow):
             self.page_profile.btn_del_sub.setStyleSheet(button_style)
         if hasattr(self.page_profile, 'btn_rename_sub'):
             self.page_profile.btn_rename_sub.setStyleSheet(button_style)
+        if hasattr(self.page_profile, 'btn_test_sub'):
+            self.page_profile.btn_test_sub.setStyleSheet(button_style)
+        if hasattr(self.page_profile, 'btn_refresh_all'):
+            self.page_profile.btn_refresh_all.setIcon(icon("mdi.sync", color=theme.get_color('accent')).icon())
+            self.page_profile.btn_refresh_all.setStyleSheet(f"""
+                QPushButton {{
+                    background-color: transparent;
+                    border: none;
+                    border-radius: 50%;
+                    padding: 4px;
+                }}
+                QPushButton:hover {{
+                    background-color: {theme.get_color('accent_light')};
+                }}
+            """)
         
         # Обновляем все карточки на странице
         self._refresh_cards_on_page(self.page_profile)
@@ -1835,6 +2094,10 @@ class MainWindow(QMainWindow):
                 self.page_profile.btn_del_sub.setText(tr("profile.delete"))
             if hasattr(self.page_profile, 'btn_rename_sub'):
                 self.page_profile.btn_rename_sub.setText(tr("profile.rename"))
+            if hasattr(self.page_profile, 'btn_test_sub'):
+                self.page_profile.btn_test_sub.setText(tr("profile.test"))
+            if hasattr(self.page_profile, 'btn_refresh_all'):
+                self.page_profile.btn_refresh_all.setToolTip(tr("profile.refresh_all"))
         
         # Обновляем настройки
         if hasattr(self, 'page_settings'):
@@ -2034,6 +2297,15 @@ class MainWindow(QMainWindow):
                   Если False, только убивает процессы
             reset_settings: Если True, сбрасывает связанные настройки и чекбоксы
         """
+        # Отменяем незавершенный запуск и дожидаемся потоков запуска (в том числе уже
+        # отмененных): поток, удаленный вместе с окном во время работы, роняет Qt.
+        # Скачивание прерывается закрытием сессии, так что ожидание ограничено
+        # остановкой уже запущенного ядра.
+        self.start_thread = None
+        for start_thread in self.findChildren(StartSingBoxPipeline):
+            start_thread.cancel()
+            start_thread.wait()
+        
         # Останавливаем текущий процесс, если он запущен
         if self.proc:
             # Останавливаем поток чтения логов
@@ -2114,7 +2386,7 @@ class MainWindow(QMainWindow):
     
     def on_kill_all_clicked(self):
         """Обработка нажатия кнопки 'Убить' - полная остановка всех процессов"""
-        if show_kill_all_confirm_dialog(
+        if dialogs.show_kill_all_confirm_dialog(
             self,
             tr("messages.kill_all_title"),
             tr("messages.kill_all_confirm")
@@ -2122,7 +2394,7 @@ class MainWindow(QMainWindow):
             self.log(tr("messages.killing_all"))
             self.kill_all_processes(isAll=True)
             self.update_big_button_state()
-            show_kill_all_success_dialog(
+            dialogs.show_kill_all_success_dialog(
                 self,
                 tr("messages.kill_all_title"),
                 tr("messages.kill_all_done")
@@ -2232,13 +2504,12 @@ class MainWindow(QMainWindow):
         self.log_ui_manager.load_logs()
     
     def refresh_logs_from_files(self):
-        """Обновление логов из файлов (вызывается таймером каждую секунду, если открыто окно логов)"""
-        # Проверяем, открыто ли окно логов, а не страницу настроек
-        # Окно логов само обновляет логи через свой таймер
+        """Обновление логов из файлов (для обратной совместимости)"""
+        # Окно логов обновляется по сигналу LogUIManager.file_watcher.logs_changed
         self.log_ui_manager.refresh_logs()
 
     def cleanup_logs_if_needed(self):
-        """Очистка логов раз в сутки (полная очистка файла)"""
+        """Обслуживание ротации логов (сжатие и удаление старых сегментов)"""
         self.log_ui_manager.cleanup_if_needed()
     
     def log(self, msg: str):
@@ -2246,16 +2517,8 @@ class MainWindow(QMainWindow):
         # Показываем в UI
         self.log_ui_manager.log_to_ui(msg)
         
-        # Записываем в singbox-ui.log (важные логи)
-        try:
-            from config.paths import LOG_FILE
-            LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-            full_ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            log_line = f"[{full_ts}] {msg}"
-            with LOG_FILE.open("a", encoding="utf-8") as f:
-                f.write(log_line + "\n")
-        except Exception:
-            pass  # Игнорируем ошибки записи в файл
+        # Записываем в singbox-ui.log (важные логи) через общий логгер, чтобы строка попала и в окно логов
+        log_to_file(msg)
 
 
     
@@ -2308,10 +2571,11 @@ class MainWindow(QMainWindow):
 # apply_dark_theme перенесена в app/application.py
 from app.application import create_application
 
-# StartSingBoxThread перенесен в core/singbox_manager.py
+# StartSingBoxPipeline находится в core/singbox_manager.py
 
 
 if __name__ == "__main__":
+    STARTUP_TRACE.end("module imports")
     # Устанавливаем глобальный обработчик исключений для PyQt5
     import sys
     def excepthook(exc_type, exc_value, exc_traceback):
@@ -2323,8 +2587,10 @@ if __name__ == "__main__":
         import traceback
         error_msg = f"[Unhandled Exception] {exc_type.__name__}: {exc_value}\n{traceback.format_exception(exc_type, exc_value, exc_traceback)}"
         try:
-            from utils.logger import log_to_file
-            log_to_file(error_msg)
+            from utils.logger import log_to_file, flush_logs, ERROR
+            log_to_file(error_msg, level=ERROR)
+            # Запись логов асинхронная - дожидаемся ее, процесс может сейчас упасть
+            flush_logs()
         except:
             pass
         
@@ -2332,13 +2598,16 @@ if __name__ == "__main__":
         sys.__excepthook__(exc_type, exc_value, exc_traceback)
     
     sys.excepthook = excepthook
+    # Очередь логов записывается фоновым потоком - дописываем ее при любом выходе
+    atexit.register(shutdown_logging)
     
     try:
         # Создаем папки для логов ДО логирования
         ensure_dirs()
         
         # Создаем приложение с применением темы
-        app = create_application()
+        with STARTUP_TRACE.phase("create_application"):
+            app = create_application()
         
         # Загружаем настройки и принудительно запрещаем несколько экземпляров
         settings = SettingsManager()
@@ -2495,7 +2764,8 @@ if __name__ == "__main__":
         
         log_to_file("[Startup] Создание главного окна...")
         try:
-            win = MainWindow()
+            with STARTUP_TRACE.phase("MainWindow.__init__"):
+                win = MainWindow()
             # Передаем локальный сервер в MainWindow
             if local_server:
                 win.local_server = local_server
@@ -2516,6 +2786,9 @@ if __name__ == "__main__":
         except Exception as e:
             log_to_file(f"[Startup Warning] Ошибка установки ссылки на MainWindow: {e}")
         
+        # Фоновая загрузка истории логов должна завершиться до выхода
+        app.aboutToQuit.connect(win.log_ui_manager.shutdown)
+        
         # Устанавливаем поведение закрытия окна в зависимости от настройки трея
         try:
             minimize_to_tray = win.settings.get("minimize_to_tray", True)
@@ -2532,9 +2805,25 @@ if __name__ == "__main__":
         except Exception as e:
             log_to_file(f"[Startup Warning] Ошибка показа трей иконки: {e}")
         
+        # Отладочный сторож зависаний главного потока
+        if win.settings.get("debug_stall_watchdog", False):
+            try:
+                from utils.stall_watchdog import StallWatchdog
+                win.stall_watchdog = StallWatchdog(
+                    threshold_ms=int(win.settings.get("stall_threshold_ms", 250)),
+                    parent=win
+                )
+                win.stall_watchdog.start()
+                app.aboutToQuit.connect(win.stall_watchdog.stop)
+            except Exception as e:
+                log_to_file(f"[Startup Warning] Ошибка запуска сторожа зависаний: {e}")
+        
         log_to_file("[Startup] Показ главного окна...")
         try:
-            win.show()
+            STARTUP_TRACE.metadata["version"] = __version__
+            STARTUP_TRACE.mark_first_paint(win)
+            with STARTUP_TRACE.phase("MainWindow.show"):
+                win.show()
             log_to_file("[Startup] Главное окно показано")
         except Exception as e:
             import traceback
@@ -2558,7 +2847,7 @@ if __name__ == "__main__":
         log_to_file(error_msg)
         # Показываем сообщение об ошибке пользователю
         try:
-            show_info_dialog(
+            dialogs.show_info_dialog(
                 None,
                 "Ошибка запуска",
                 f"Произошла критическая ошибка при запуске приложения:\n\n{str(e)}\n\nПроверьте файл логов: {LOG_FILE}"
@@ -2,23 +2,139 @@
 Менеджер логов для UI
 Управление загрузкой, обновлением и очисткой логов в интерфейсе
 """
-import re
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
-from config.paths import LOG_FILE, SINGBOX_CORE_LOG_FILE
+from typing import TYPE_CHECKING, Optional, Dict, List, Tuple
+from PyQt5.QtCore import QObject, QFileSystemWatcher, pyqtSignal
+from config.paths import LOG_FILE, SINGBOX_CORE_LOG_FILE, STRUCTURED_LOG_FILE
 from utils.logger import log_to_file
+from utils.log_buffer import LogRingBuffer, LogFileTail, LogEntry, APP_LOG_BUFFER, SINGBOX_LOG_BUFFER, render_log_entry
+from utils.log_levels import SINGBOX_LEVEL_VALUES, level_value
+from utils.log_rotation import LOG_ROTATOR
+from workers.log_history_worker import LogHistoryWorker
 
 if TYPE_CHECKING:
     from main import MainWindow
     from PyQt5.QtWidgets import QTextEdit
 
 
+class LogFileWatcher(QObject):
+    """
+    Отслеживание файлов логов через QFileSystemWatcher (вместо опроса таймером)
+    
+    Новые строки в буферы логов приходят напрямую от писателей (log_to_file,
+    SingBoxLogReaderThread), поэтому файл читается только ради истории:
+    при запуске и после усечения файла (очистка лога), в фоновом потоке
+    LogHistoryWorker. При дописывании смещение просто сдвигается в конец,
+    при ротации или удалении файла - привязывается к новому файлу без чтения:
+    буфер уже содержит эти строки, включая trace/debug ниже уровня записи на диск.
+    """
+    
+    logs_changed = pyqtSignal(str)  # режим окна логов: "logs" или "singbox"
+    
+    def __init__(self, files: Dict[Path, tuple], parent: Optional[QObject] = None):
+        """
+        Args:
+            files: {путь к файлу: (режим окна логов, буфер)}
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self._files = {str(path): (mode, log_buffer, LogFileTail(path)) for path, (mode, log_buffer) in files.items()}
+        # путь -> (курсор буфера на начало чтения истории, поток чтения)
+        self._loading: Dict[str, Tuple[int, LogHistoryWorker]] = {}
+        self._workers: List[LogHistoryWorker] = []
+        # путь -> номер первой строки буфера, полученной от писателей, а не из файла
+        self._live_since: Dict[str, int] = {}
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        # Папку отслеживаем, чтобы заново подписаться на файл после удаления или ротации
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        for path in self._files:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._watch(path)
+        # История из прошлых запусков: читаем только хвост файлов
+        self._load_history(list(self._files))
+    
+    def _load_history(self, paths: List[str]) -> None:
+        """Прочитать историю файлов в фоне (см. _on_history_loaded)"""
+        worker = LogHistoryWorker([self._files[path][2] for path in paths], self)
+        for path in paths:
+            self._loading[path] = (self._files[path][1].cursor, worker)
+        worker.history_loaded.connect(self._on_history_loaded)
+        worker.error.connect(lambda msg: log_to_file(f"[Logs] Ошибка загрузки истории логов: {msg}"))
+        worker.finished.connect(lambda: self._on_worker_finished(worker, paths))
+        self._workers.append(worker)
+        worker.start()
+    
+    def _on_history_loaded(self, path: str, lines: list) -> None:
+        """История файла прочитана: подставить ее перед строками, пришедшими во время чтения"""
+        loading = self._loading.pop(path, None)
+        if loading is None:
+            return
+        self._live_since[path] = self._files[path][1].load_history(lines, loading[0])
+        # Файл могли дописать, ротировать или усечь во время чтения
+        self._on_file_changed(path)
+    
+    def _on_worker_finished(self, worker: LogHistoryWorker, paths: List[str]) -> None:
+        """Поток загрузки истории завершился (в том числе с ошибкой)"""
+        if worker in self._workers:
+            self._workers.remove(worker)
+        # После ошибки история не пришла - снимаем блокировку смещения
+        for path in paths:
+            if path in self._loading and self._loading[path][1] is worker:
+                del self._loading[path]
+        worker.deleteLater()
+    
+    def live_cursor(self, log_file: Path) -> int:
+        """Курсор буфера на первую строку, пришедшую от писателей (строки до него прочитаны из файла)"""
+        return self._live_since.get(str(log_file), 0)
+    
+    def shutdown(self) -> None:
+        """Дождаться потоков загрузки истории (при выходе из приложения)"""
+        for worker in list(self._workers):
+            worker.cancel()
+            worker.wait()
+        self._workers.clear()
+    
+    def _watch(self, path: str) -> None:
+        """Подписаться на файл и его папку (если файл уже существует)"""
+        directory = str(Path(path).parent)
+        if directory not in self._watcher.directories():
+            self._watcher.addPath(directory)
+        if Path(path).exists() and path not in self._watcher.files():
+            self._watcher.addPath(path)
+    
+    def _on_file_changed(self, path: str) -> None:
+        """Файл лога изменился"""
+        entry = self._files.get(path)
+        if entry is None:
+            return
+        mode, _, tail = entry
+        # Qt перестает следить за файлом после его удаления или замены
+        self._watch(path)
+        if path in self._loading:
+            # Смещением сейчас владеет LogHistoryWorker
+            return
+        state = tail.check()
+        if state == "truncated":
+            self._load_history([path])
+            return
+        if state in ("rotated", "missing"):
+            tail.reanchor()
+        elif state == "appended":
+            tail.skip_to_end()
+        self.logs_changed.emit(mode)
+    
+    def _on_directory_changed(self, directory: str) -> None:
+        """В папке логов появился или исчез файл"""
+        for path in self._files:
+            if str(Path(path).parent) == directory:
+                self._on_file_changed(path)
+
+
 class LogUIManager:
     """Менеджер логов для UI"""
-
-    # Удаляем ANSI-цвета, чтобы логи SingBox отображались без управляющих последовательностей
-    _ANSI_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
     
     def __init__(self, main_window: 'MainWindow'):
         """
@@ -28,6 +144,65 @@ class LogUIManager:
             main_window: Ссылка на главное окно
         """
         self.main_window = main_window
+        self._buffers = {LOG_FILE: APP_LOG_BUFFER, SINGBOX_CORE_LOG_FILE: SINGBOX_LOG_BUFFER}
+        self._maintenance_thread: Optional[threading.Thread] = None
+        self.file_watcher = LogFileWatcher({
+            LOG_FILE: ("logs", APP_LOG_BUFFER),
+            SINGBOX_CORE_LOG_FILE: ("singbox", SINGBOX_LOG_BUFFER),
+        }, main_window)
+    
+    def shutdown(self) -> None:
+        """Остановка фоновой загрузки истории логов (при выходе из приложения)"""
+        self.file_watcher.shutdown()
+    
+    def get_log_buffer(self, mode: str) -> LogRingBuffer:
+        """
+        Буфер строк для режима окна логов
+        
+        Args:
+            mode: "logs" - логи приложения, "singbox" - логи ядра
+        """
+        return SINGBOX_LOG_BUFFER if mode == "singbox" else APP_LOG_BUFFER
+    
+    def get_log_file(self, mode: str) -> Path:
+        """
+        Файл лога для режима окна логов (для поиска; строки, которых нет
+        в файле, возвращает get_memory_only_entries)
+        
+        Args:
+            mode: "logs" - логи приложения, "singbox" - логи ядра
+        """
+        return SINGBOX_CORE_LOG_FILE if mode == "singbox" else LOG_FILE
+    
+    def get_memory_only_entries(self, mode: str) -> List[LogEntry]:
+        """
+        Строки окна логов, которых нет в файле (для поиска)
+        
+        Строки ядра ниже уровня singbox_log_disk_level попадают только в буфер
+        окна логов; строки приложения пишутся в файл все. Строки истории,
+        прочитанные из файла, не возвращаются - их найдет поиск по файлу.
+        
+        Args:
+            mode: "logs" - логи приложения, "singbox" - логи ядра
+            
+        Returns:
+            Нормализованные строки в хронологическом порядке
+        """
+        if mode != "singbox":
+            return []
+        disk_min = level_value(self.main_window.settings.get("singbox_log_disk_level", "trace"))
+        if disk_min == 0:
+            return []
+        entries, _, _ = SINGBOX_LOG_BUFFER.read_since(self.file_watcher.live_cursor(SINGBOX_CORE_LOG_FILE))
+        result = []
+        level = None
+        for entry in entries:
+            # Продолжения многострочных сообщений идут с уровнем предыдущей строки (SingBoxLevelFilter)
+            if entry[1]:
+                level = SINGBOX_LEVEL_VALUES.get(entry[1])
+            if level is not None and level < disk_min:
+                result.append(entry)
+        return result
     
     def load_logs(self, logs_widget: Optional['QTextEdit'] = None) -> None:
         """
@@ -59,35 +234,23 @@ class LogUIManager:
     
     def _load_logs_from_file(self, widget: 'QTextEdit', log_file: Path) -> None:
         """
-        Загрузка логов из файла в виджет
+        Загрузка логов файла в виджет
         
         Args:
             widget: Виджет для отображения логов
             log_file: Путь к файлу логов
         """
-        if not log_file.exists():
-            return
-        
-        try:
-            with log_file.open("r", encoding="utf-8") as f:
-                content = f.read()
-                lines = content.split('\n')
-                formatted_lines = []
-                for line in lines:
-                    formatted = self._format_line(line)
-                    if formatted:
-                        formatted_lines.append(formatted)
-                formatted_content = '\n'.join(formatted_lines)
-                widget.setPlainText(formatted_content)
-                cursor = widget.textCursor()
-                cursor.movePosition(cursor.End)
-                widget.setTextCursor(cursor)
-        except Exception:
-            pass
+        widget.setPlainText(self._get_logs_from_file(log_file))
+        cursor = widget.textCursor()
+        cursor.movePosition(cursor.End)
+        widget.setTextCursor(cursor)
     
     def _get_logs_from_file(self, log_file: Path) -> str:
         """
-        Получение логов из файла в виде строки
+        Получение логов файла в виде строки
+        
+        Файл не перечитывается: строки берутся из буфера, который держит
+        актуальный хвост файла (см. LogFileWatcher).
         
         Args:
             log_file: Путь к файлу логов
@@ -95,21 +258,11 @@ class LogUIManager:
         Returns:
             Строка с логами
         """
-        if not log_file.exists():
-            return ""
-        
-        try:
-            with log_file.open("r", encoding="utf-8") as f:
-                content = f.read()
-                lines = content.split('\n')
-                formatted_lines = []
-                for line in lines:
-                    formatted = self._format_line(line)
-                    if formatted:
-                        formatted_lines.append(formatted)
-                return '\n'.join(formatted_lines)
-        except Exception:
+        log_buffer = self._buffers.get(log_file)
+        if log_buffer is None:
             return ""
+        entries, _, _ = log_buffer.read_since(0)
+        return '\n'.join(render_log_entry(entry) for entry in entries)
     
     def get_logs(self) -> str:
         """
@@ -157,7 +310,7 @@ class LogUIManager:
         Обновление логов из файлов
         
         Этот метод не выполняет обновление виджетов, так как логи теперь в отдельном окне,
-        которое само обновляет логи через свой таймер (каждые 500мс).
+        которое обновляется по сигналу file_watcher.logs_changed.
         
         Args:
             current_page_index: Индекс текущей страницы (не используется, оставлен для совместимости)
@@ -165,50 +318,29 @@ class LogUIManager:
         pass
     
     def cleanup_if_needed(self) -> None:
-        """Очистка логов раз в сутки (полная очистка файла)"""
-        try:
-            last_cleanup = self.main_window.settings.get("last_log_cleanup", None)
-            now = datetime.now()
-            
-            if last_cleanup:
-                # Парсим дату последней очистки
-                try:
-                    last_date = datetime.fromisoformat(last_cleanup)
-                    # Проверяем, прошло ли больше суток
-                    time_diff = now - last_date
-                    if time_diff.total_seconds() < 24 * 60 * 60:  # Меньше 24 часов
-                        return  # Еще не прошло сутки
-                except (ValueError, TypeError):
-                    # Если дата некорректная, считаем что нужно очистить
-                    pass
-            
-            # Полностью очищаем все файлы логов (singbox-ui.log и singbox.log)
-            if LOG_FILE.exists():
-                try:
-                    # Получаем размер файла для информации
-                    file_size = LOG_FILE.stat().st_size
-                    # Полностью очищаем файл
-                    LOG_FILE.write_text("", encoding="utf-8")
-                    self.main_window._log_version_debug(f"[Log Cleanup] singbox-ui.log очищен (было {file_size} байт)")
-                except Exception as e:
-                    self.main_window._log_version_debug(f"[Log Cleanup] Ошибка при очистке singbox-ui.log: {e}")
-            
-            if SINGBOX_CORE_LOG_FILE.exists():
-                try:
-                    # Получаем размер файла для информации
-                    file_size = SINGBOX_CORE_LOG_FILE.stat().st_size
-                    # Полностью очищаем файл
-                    SINGBOX_CORE_LOG_FILE.write_text("", encoding="utf-8")
-                    self.main_window._log_version_debug(f"[Log Cleanup] singbox.log очищен (было {file_size} байт)")
-                except Exception as e:
-                    self.main_window._log_version_debug(f"[Log Cleanup] Ошибка при очистке singbox.log: {e}")
-            
-            # Сохраняем дату последней очистки
-            self.main_window.settings.data["last_log_cleanup"] = now.isoformat()
-            self.main_window.settings.save()
-        except Exception as e:
-            # Не критично, просто логируем
-            log_to_file(f"[Log Cleanup] Ошибка: {e}")
+        """
+        Обслуживание ротации логов (вызывается таймером раз в час)
+        
+        Сами файлы ротируются писателями по размеру; здесь сжимаются сегменты,
+        оставшиеся несжатыми (например, после аварийного завершения),
+        и удаляются сегменты сверх лимита. Сжатие и ожидание фонового сжатия
+        после ротации идут в отдельном потоке, как в LogRotator.rotate().
+        """
+        if self._maintenance_thread is not None and self._maintenance_thread.is_alive():
+            return
+        self._maintenance_thread = threading.Thread(
+            target=self._maintain_logs, name="log-maintain", daemon=True
+        )
+        self._maintenance_thread.start()
+    
+    @staticmethod
+    def _maintain_logs() -> None:
+        """Обслуживание ротации всех логов (в фоновом потоке)"""
+        for log_file in (LOG_FILE, SINGBOX_CORE_LOG_FILE, STRUCTURED_LOG_FILE):
+            try:
+                LOG_ROTATOR.maintain(log_file)
+            except Exception as e:
+                log_to_file(f"[Log Rotation] Ошибка обслуживания {log_file.name}: {e}")
     
     def log_to_ui(self, msg: str) -> None:
         """
@@ -226,31 +358,3 @@ class LogUIManager:
             cursor = self.main_window.page_settings.logs.textCursor()
             cursor.movePosition(cursor.End)
             self.main_window.page_settings.logs.setTextCursor(cursor)
-
-    def _format_line(self, line: str) -> str:
-        """
-        Приводит строку лога к компактному виду без ANSI-кодов и с временем в формате [HH:MM:SS].
-        Поддерживает:
-        - Формат приложения: [YYYY-MM-DD HH:MM:SS] ...
-        - Формат SingBox: +0300 2025-12-28 19:31:02 ERROR ...
-        - Уже нормализованный формат [HH:MM:SS] ...
-        """
-        if not line:
-            return ""
-
-        # Удаляем ANSI управляющие последовательности
-        line = self._ANSI_RE.sub("", line)
-
-        # Нормализация разных форматов времени к [HH:MM:SS]
-        # 1) [YYYY-MM-DD HH:MM:SS] -> [HH:MM:SS]
-        line = re.sub(r'\[\d{4}-\d{2}-\d{2} (\d{2}:\d{2}:\d{2})\]', r'[\1]', line)
-        # 2) +0300 2025-12-28 19:31:02 ... -> [19:31:02] ...
-        line = re.sub(
-            r'^\+\d{4}\s+\d{4}-\d{2}-\d{2}\s+(\d{2}:\d{2}:\d{2})\s+',
-            r'[\1] ',
-            line
-        )
-
-        line = line.strip()
-        return line
-
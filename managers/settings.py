@@ -22,6 +22,16 @@ class SettingsManager:
             "minimize_to_tray": True,  # Сворачивать в трей (по умолчанию включено)
             "language": "",  # Пустая строка означает, что язык не выбран
             "current_sub_index": -1,  # Индекс выбранного профиля (-1 означает, что профиль не выбран)
+            "subscription_max_size_mb": 16,  # Максимальный размер скачиваемой подписки
+            "subscription_pretty_print": False,  # Форматировать JSON подписки (иначе config.json = байты от сервера)
+            "log_max_size_mb": 10,  # Размер файла лога, после которого он уходит в сжатый сегмент
+            "log_max_segments": 5,  # Сколько сжатых сегментов каждого лога хранить
+            "singbox_log_disk_level": "trace",  # Минимальный уровень строк ядра в singbox.log (trace/debug/info/warn/error/fatal)
+            "singbox_log_ui_level": "trace",  # Минимальный уровень строк ядра в окне логов
+            "debug_stall_watchdog": False,  # Отладка: записывать зависания главного потока со стеками в stalls.log
+            "stall_threshold_ms": 250,  # Задержка цикла событий, после которой фиксируется зависание
+            "log_level": "debug",  # Минимальный уровень сообщений в singbox-ui.log (debug/info/warn/error)
+            "log_structured": False,  # Дублировать лог приложения в singbox-ui.jsonl (уровень, компонент, поля)
         }
         self.load()
     
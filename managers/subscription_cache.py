@@ -0,0 +1,186 @@
+"""HTTP-кэш подписок (ETag/Last-Modified + тело ответа)"""
+import json
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+from config.paths import SUBSCRIPTION_CACHE_DIR
+
+# Импортируем log_to_file если доступен
+try:
+    from utils.logger import log_to_file
+except ImportError:
+    # Если модуль еще не загружен, используем простой print
+    def log_to_file(msg: str, log_file=None):
+        print(msg)
+
+
+class SubscriptionCache:
+    """
+    Кэш ответов сервера подписки
+
+    Для каждого URL подписки хранит в data/cache/subscriptions два файла:
+    - <key>.body - тело последнего успешного ответа (уже в том виде, в каком оно записано в config.json)
+    - <key>.meta.json - ETag, Last-Modified и служебная информация
+
+    Ключ вычисляется из URL, поэтому кэш переживает переименование и перестановку профилей.
+
+    Один URL могут одновременно сохранять обновление профиля, обновление всех
+    подписок и запуск ядра, поэтому запись тела и метаданных (и их чтение парой)
+    выполняется под блокировкой этого URL.
+    """
+
+    def __init__(self, cache_dir: Path = SUBSCRIPTION_CACHE_DIR):
+        """
+        Инициализация кэша
+
+        Args:
+            cache_dir: Папка для хранения кэша
+        """
+        self.cache_dir = cache_dir
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, url: str) -> threading.RLock:
+        """Блокировка записи кэша одного URL"""
+        with self._locks_guard:
+            lock = self._locks.get(url)
+            if lock is None:
+                lock = self._locks[url] = threading.RLock()
+            return lock
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        """Ключ кэша для URL подписки"""
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _body_path(self, url: str) -> Path:
+        return self.cache_dir / f"{self.key_for(url)}.body"
+
+    def _meta_path(self, url: str) -> Path:
+        return self.cache_dir / f"{self.key_for(url)}.meta.json"
+
+    def get_meta(self, url: str) -> Optional[Dict[str, Any]]:
+        """Метаданные кэша для URL (None если кэша нет или он поврежден)"""
+        meta_path = self._meta_path(url)
+        if not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if isinstance(meta, dict) and meta.get("url") == url:
+                return meta
+        except Exception as e:
+            log_to_file(f"[Subscription Cache] Ошибка чтения метаданных: {e}")
+        return None
+
+    def read_body(self, url: str) -> Optional[bytes]:
+        """Тело закэшированного ответа (None если кэша нет)"""
+        with self._lock_for(url):
+            if self.get_meta(url) is None:
+                return None
+            body_path = self._body_path(url)
+            try:
+                return body_path.read_bytes()
+            except Exception:
+                return None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Заголовки условного запроса для URL
+
+        Returns:
+            If-None-Match / If-Modified-Since, если для URL есть валидный кэш
+        """
+        with self._lock_for(url):
+            meta = self.get_meta(url)
+            if not meta or not self._body_path(url).exists():
+                return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        content_hash: Optional[str] = None
+    ) -> None:
+        """
+        Сохранить ответ сервера в кэш
+
+        Args:
+            url: URL подписки
+            body: Тело (в том виде, в каком оно записывается в config.json)
+            etag: Значение заголовка ETag
+            last_modified: Значение заголовка Last-Modified
+            content_hash: Канонический хэш конфига (если посчитан при скачивании)
+        """
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": len(body),
+            "content_hash": content_hash,
+            "fetched_at": time.time(),
+            "validated_at": time.time(),
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Тело и метаданные - одна запись: другой писатель этого URL не вклинится между ними
+            with self._lock_for(url):
+                self._write_atomic(self._body_path(url), body)
+                self._write_atomic(self._meta_path(url), json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"))
+        except Exception as e:
+            log_to_file(f"[Subscription Cache] Ошибка сохранения кэша: {e}")
+
+    def mark_validated(self, url: str) -> None:
+        """Отметить, что сервер подтвердил актуальность кэша (ответ 304)"""
+        with self._lock_for(url):
+            meta = self.get_meta(url)
+            if not meta:
+                return
+            meta["validated_at"] = time.time()
+            try:
+                self._write_atomic(self._meta_path(url), json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"))
+            except Exception:
+                pass
+
+    def remove(self, url: str) -> None:
+        """Удалить кэш для URL"""
+        with self._lock_for(url):
+            # Сначала метаданные: без них тело уже не считается кэшем
+            for path in (self._meta_path(url), self._body_path(url)):
+                try:
+                    if path.exists():
+                        path.unlink()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        """
+        Запись через временный файл, чтобы не оставить полузаписанный кэш
+
+        Имя временного файла уникально: параллельные записи не перетирают
+        чужой временный файл.
+        """
+        fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), prefix=path.name + ".", suffix=".tmp")
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            tmp_path.replace(path)
+        except BaseException:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            raise
@@ -1,9 +1,18 @@
 """Менеджер профилей"""
 import json
-import requests
+import time
+import codecs
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Callable
 from config.paths import PROFILE_FILE, CONFIG_FILE
+from managers.subscription_cache import SubscriptionCache
+from utils.lazy_import import lazy_import
+
+# requests загружается при первом запросе к подписке, а не при запуске
+requests = lazy_import("requests")
 
 # Импортируем log_to_file если доступен
 try:
@@ -14,14 +23,64 @@ except ImportError:
         print(msg)
 
 
+def config_hash(content: bytes, parsed: Any = None) -> str:
+    """
+    Хэш конфига, не зависящий от форматирования и порядка ключей
+    
+    JSON приводится к каноническому виду (сортировка ключей, без пробелов),
+    не-JSON содержимое хэшируется как есть.
+    
+    Args:
+        content: Содержимое конфига
+        parsed: Уже распарсенный JSON (если есть), чтобы не парсить повторно
+    """
+    if parsed is None:
+        try:
+            parsed = json.loads(content.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            return hashlib.sha256(content).hexdigest()
+    canonical = json.dumps(parsed, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _is_utf8_json(content: bytes) -> bool:
+    """
+    JSON в UTF-8 (а не UTF-16/32)
+    
+    По RFC 8259 первые символы JSON - ASCII, поэтому нулевой байт среди первых
+    четырех означает UTF-16/32.
+    """
+    return b"\x00" not in content[:4]
+
+
 class SubscriptionManager:
     """Управление профилями (подписки и готовые конфиги)"""
     
     PROFILE_TYPE_SUBSCRIPTION = "subscription"
     PROFILE_TYPE_CONFIG = "config"
     
+    # Результат запроса к подписке
+    FETCH_UPDATED = "updated"
+    FETCH_NOT_MODIFIED = "not_modified"
+    FETCH_ERROR = "error"
+    
+    # Максимум параллельных запросов при обновлении всех подписок
+    REFRESH_MAX_WORKERS = 8
+    
+    # Скачивание подписки
+    DEFAULT_MAX_DOWNLOAD_SIZE = 16 * 1024 * 1024  # байт
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+    
     def __init__(self):
         self.data = {"profiles": []}
+        self.cache = SubscriptionCache()
+        # Лимит размера подписки и форматирование JSON (настраиваются из SettingsManager)
+        self.max_download_size = self.DEFAULT_MAX_DOWNLOAD_SIZE
+        self.pretty_print = False
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+        # (ключ профиля, хэш) конфига, записанного в config.json последним
+        self._applied_config: Tuple[Optional[str], Optional[str]] = (None, None)
         self.load_or_init()
     
     def load_or_init(self):
@@ -115,8 +174,12 @@ class SubscriptionManager:
         """Удалить профиль по индексу"""
         profiles = self.data.get("profiles", [])
         if 0 <= index < len(profiles):
-            profiles.pop(index)
+            removed = profiles.pop(index)
             self.save()
+            # Удаляем кэш подписки, если этот URL больше не используется другими профилями
+            url = removed.get("url")
+            if url and url not in (p.get("url") for p in profiles):
+                self.cache.remove(url)
     
     def update_profile(self, index: int, name: str = None, profile_type: str = None, url: str = None, config: Dict[str, Any] = None):
         """Обновить профиль по индексу"""
@@ -124,6 +187,8 @@ class SubscriptionManager:
         if not profile:
             return False
         
+        old_url = profile.get("url")
+        
         if name is not None:
             profile["name"] = name
         
@@ -146,62 +211,346 @@ class SubscriptionManager:
                 profile["config"] = config
         
         self.save()
+        # URL сменился или профиль перестал быть подпиской - кэш старого URL больше не нужен,
+        # если его не использует другой профиль (как в remove())
+        if old_url and old_url != profile.get("url") and old_url not in (
+            p.get("url") for p in self.data.get("profiles", [])
+        ):
+            self.cache.remove(old_url)
         return True
     
-    def download_config(self, index: int) -> bool:
-        """Скачать конфиг из подписки (только для типа subscription)"""
+    def _get_subscription_url(self, index: int, caller: str) -> Optional[str]:
+        """URL подписки по индексу профиля (None если профиль не подписка или URL невалидный)"""
         profile = self.get(index)
         if not profile:
-            return False
+            return None
         
         profile_type = profile.get("type", self.PROFILE_TYPE_SUBSCRIPTION)
         if profile_type != self.PROFILE_TYPE_SUBSCRIPTION:
-            log_to_file(f"download_config: профиль не является подпиской (тип: {profile_type})")
-            return False
+            log_to_file(f"{caller}: профиль не является подпиской (тип: {profile_type})")
+            return None
         
         url = profile.get("url")
         
         # Проверяем и нормализуем URL
         if not url:
-            return False
+            return None
         
         # Убеждаемся что URL абсолютный
         parsed = urlparse(url)
         if not parsed.scheme or not parsed.netloc:
-            log_to_file(f"download_config error: URL не является абсолютным: {url}")
-            return False
+            log_to_file(f"{caller} error: URL не является абсолютным: {url}")
+            return None
+        return url
+    
+    def _get_session(self) -> "requests.Session":
+        """
+        Общая HTTP-сессия с keep-alive для всех запросов к подпискам
+        
+        Пул соединений рассчитан на REFRESH_MAX_WORKERS параллельных запросов.
+        """
+        with self._session_lock:
+            if self._session is None:
+                self._session = self.new_session()
+            return self._session
+    
+    def new_session(self) -> "requests.Session":
+        """
+        Отдельная HTTP-сессия (например, для запуска ядра: ее закрытие прерывает
+        только свой запрос, не затрагивая общую сессию фоновых обновлений)
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.REFRESH_MAX_WORKERS,
+            pool_maxsize=self.REFRESH_MAX_WORKERS
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def _read_limited(self, response: "requests.Response") -> bytes:
+        """
+        Потоковое чтение тела ответа с ограничением размера
+        
+        Raises:
+            ValueError: Если тело больше max_download_size
+        """
+        limit = self.max_download_size
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > limit:
+            raise ValueError(f"Размер подписки {declared} байт превышает лимит {limit} байт")
+        
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+            if not chunk:
+                continue
+            received += len(chunk)
+            if received > limit:
+                raise ValueError(f"Размер подписки превышает лимит {limit} байт")
+            chunks.append(chunk)
+        return b"".join(chunks)
+    
+    def _normalize_config(self, content: bytes) -> Tuple[bytes, Optional[str]]:
+        """
+        Единственный проход проверки/нормализации скачанного конфига
+        
+        JSON парсится один раз прямо из байтов. Если форматирование выключено и
+        конфиг уже в UTF-8, sing-box получает байты в том виде, в каком они пришли.
         
+        Returns:
+            (содержимое для config.json, канонический хэш или None если это не JSON)
+        """
         try:
-            # Убеждаемся что папка существует
-            CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+            parsed = json.loads(content)
+        except (UnicodeDecodeError, ValueError) as e:
+            # Если JSON невалидный, сохраняем как есть (может быть это не JSON)
+            log_to_file(f"Ошибка валидации конфига: {e}")
+            return content, None
+        
+        if self.pretty_print or not _is_utf8_json(content):
+            # Форматируем JSON с отступами для красивого отображения (или перекодируем в UTF-8)
+            content = json.dumps(parsed, ensure_ascii=False, indent=2).encode('utf-8')
+        elif content.startswith(codecs.BOM_UTF8):
+            content = content[len(codecs.BOM_UTF8):]
+        return content, config_hash(content, parsed)
+    
+    def _fetch_url(
+        self,
+        url: str,
+        session: Optional["requests.Session"] = None,
+        on_response: Optional[Callable[["requests.Response"], None]] = None
+    ) -> Tuple[Optional[bytes], str]:
+        """
+        Условный запрос к подписке с сохранением ответа в кэш
+        
+        Args:
+            url: URL подписки
+            session: HTTP-сессия (по умолчанию - общая)
+            on_response: Вызывается с каждым полученным ответом до чтения тела
+                (чтобы другой поток мог прервать загрузку через response.close())
+        
+        Returns:
+            (содержимое конфига или None, статус: FETCH_UPDATED / FETCH_NOT_MODIFIED / FETCH_ERROR)
+        """
+        session = session or self._get_session()
+        try:
+            # Условный запрос: если у нас есть кэш, сервер может ответить 304 без тела
+            headers = self.cache.conditional_headers(url)
+            r = session.get(url, timeout=20, headers=headers, stream=True)
+            if on_response:
+                on_response(r)
             
-            r = requests.get(url, timeout=20)
-            r.raise_for_status()
+            if r.status_code == 304:
+                r.close()
+                cached = self.cache.read_body(url)
+                if cached is not None:
+                    self.cache.mark_validated(url)
+                    log_to_file("Подписка не изменилась (304), используется кэш")
+                    return cached, self.FETCH_NOT_MODIFIED
+                # Кэш пропал между формированием запроса и ответом - запрашиваем полностью
+                log_to_file("fetch_config: получен 304, но кэш недоступен, повторный запрос")
+                r = session.get(url, timeout=20, stream=True)
+                if on_response:
+                    on_response(r)
             
-            # Проверяем что это валидный JSON и форматируем его
-            try:
-                content = r.content
-                # Пробуем декодировать как текст для проверки JSON
-                text_content = content.decode('utf-8')
-                # Парсим JSON для проверки валидности
-                config_data = json.loads(text_content)
-                # Форматируем JSON с отступами для красивого отображения
-                formatted_content = json.dumps(config_data, ensure_ascii=False, indent=2)
-                # Сохраняем отформатированный конфиг
-                CONFIG_FILE.write_text(formatted_content, encoding='utf-8')
-                log_to_file(f"Конфиг сохранен в: {CONFIG_FILE}")
-                log_to_file(f"Размер файла: {CONFIG_FILE.stat().st_size} байт")
-                return True
-            except (UnicodeDecodeError, json.JSONDecodeError) as e:
-                log_to_file(f"Ошибка валидации конфига: {e}")
-                # Если JSON невалидный, сохраняем как есть (может быть это не JSON)
-                CONFIG_FILE.write_bytes(content)
-                log_to_file(f"Конфиг сохранен в: {CONFIG_FILE} (без форматирования)")
-                log_to_file(f"Размер файла: {CONFIG_FILE.stat().st_size} байт")
-                return True
+            with r:
+                r.raise_for_status()
+                content = self._read_limited(r)
+                etag = r.headers.get("ETag")
+                last_modified = r.headers.get("Last-Modified")
+            
+            content, content_hash = self._normalize_config(content)
+            self.cache.store(url, content, etag, last_modified, content_hash)
+            return content, self.FETCH_UPDATED
         except Exception as e:
-            log_to_file(f"download_config error: {e}")
+            log_to_file(f"fetch_config error: {e}")
+            return None, self.FETCH_ERROR
+    
+    def fetch_config(
+        self,
+        index: int,
+        session: Optional["requests.Session"] = None,
+        on_response: Optional[Callable[["requests.Response"], None]] = None
+    ) -> Optional[bytes]:
+        """
+        Скачать конфиг подписки в кэш, не трогая config.json
+        
+        Безопасно вызывать из фонового потока.
+        
+        Args:
+            index: Индекс профиля
+            session: HTTP-сессия (по умолчанию - общая)
+            on_response: См. _fetch_url
+        
+        Returns:
+            Содержимое конфига (новое или подтвержденное сервером через 304), None при ошибке
+        """
+        url = self._get_subscription_url(index, "fetch_config")
+        if not url:
+            return None
+        content, _ = self._fetch_url(url, session, on_response)
+        return content
+    
+    def refresh_all(
+        self,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+        max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Параллельно обновить все подписки в кэш (config.json не трогается)
+        
+        Одинаковые URL запрашиваются один раз. Безопасно вызывать из фонового потока.
+        
+        Args:
+            on_result: Вызывается из рабочих потоков для каждого профиля по мере готовности
+            max_workers: Размер пула потоков (по умолчанию REFRESH_MAX_WORKERS)
+            
+        Returns:
+            Результаты по профилям (в порядке индексов): index, name, status, latency_ms, size
+        """
+        # Снимок профилей, чтобы не зависеть от изменений списка во время обновления
+        urls: Dict[str, List[Tuple[int, str]]] = {}
+        for index, profile in enumerate(list(self.data.get("profiles", []))):
+            if profile.get("type", self.PROFILE_TYPE_SUBSCRIPTION) != self.PROFILE_TYPE_SUBSCRIPTION:
+                continue
+            url = self._get_subscription_url(index, "refresh_all")
+            if url:
+                urls.setdefault(url, []).append((index, profile.get("name", "no-name")))
+        
+        if not urls:
+            return []
+        
+        results: List[Dict[str, Any]] = []
+        
+        def refresh_url(url: str) -> List[Dict[str, Any]]:
+            started = time.perf_counter()
+            content, status = self._fetch_url(url)
+            latency_ms = (time.perf_counter() - started) * 1000
+            url_results = []
+            for index, name in urls[url]:
+                result = {
+                    "index": index,
+                    "name": name,
+                    "status": status,
+                    "latency_ms": latency_ms,
+                    "size": len(content) if content is not None else 0,
+                }
+                if on_result:
+                    on_result(result)
+                url_results.append(result)
+            return url_results
+        
+        workers = max(1, min(max_workers or self.REFRESH_MAX_WORKERS, len(urls)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="subs-refresh") as executor:
+            for url_results in executor.map(refresh_url, list(urls)):
+                results.extend(url_results)
+        
+        results.sort(key=lambda r: r["index"])
+        return results
+    
+    def get_cached_config(self, index: int) -> Optional[bytes]:
+        """Последний успешно скачанный конфиг подписки (без сетевых запросов)"""
+        profile = self.get(index)
+        if not profile or profile.get("type", self.PROFILE_TYPE_SUBSCRIPTION) != self.PROFILE_TYPE_SUBSCRIPTION:
+            return None
+        url = profile.get("url")
+        if not url:
+            return None
+        return self.cache.read_body(url)
+    
+    def get_cached_config_hash(self, index: int) -> Optional[str]:
+        """Канонический хэш закэшированного конфига подписки, посчитанный при скачивании"""
+        profile = self.get(index)
+        if not profile or not profile.get("url"):
+            return None
+        meta = self.cache.get_meta(profile["url"])
+        return meta.get("content_hash") if meta else None
+    
+    def _profile_key(self, index: int) -> Optional[str]:
+        """Ключ профиля для отслеживания примененного конфига (URL подписки или имя готового конфига)"""
+        profile = self.get(index)
+        if not profile:
+            return None
+        if profile.get("type", self.PROFILE_TYPE_SUBSCRIPTION) == self.PROFILE_TYPE_SUBSCRIPTION:
+            return f"subscription:{profile.get('url', '')}"
+        return f"config:{profile.get('name', '')}"
+    
+    def get_applied_hash(self, index: int) -> Optional[str]:
+        """
+        Хэш конфига профиля, который сейчас записан в config.json
+        
+        Returns:
+            None если в config.json сейчас конфиг другого профиля или он неизвестен
+        """
+        key = self._profile_key(index)
+        if key is None or self._applied_config[0] != key:
+            return None
+        return self._applied_config[1]
+    
+    def write_config_file(self, content: bytes, index: Optional[int] = None, content_hash: Optional[str] = None) -> bool:
+        """
+        Записать содержимое в config.json
+        
+        Args:
+            content: Содержимое конфига
+            index: Индекс профиля, которому принадлежит конфиг (для отслеживания изменений)
+            content_hash: Уже вычисленный config_hash(content), чтобы не считать его повторно
+        """
+        try:
+            # Убеждаемся что папка существует
+            CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+            CONFIG_FILE.write_bytes(content)
+            log_to_file(f"Конфиг сохранен в: {CONFIG_FILE}")
+            log_to_file(f"Размер файла: {len(content)} байт")
+        except Exception as e:
+            log_to_file(f"Ошибка записи конфига: {e}")
+            self._applied_config = (None, None)
+            return False
+        # config.json один на все профили, поэтому актуален только хэш последнего записанного
+        key = self._profile_key(index) if index is not None else None
+        self._applied_config = (key, (content_hash or config_hash(content)) if key else None)
+        return True
+    
+    def download_config(self, index: int) -> bool:
+        """Скачать конфиг из подписки и записать его в config.json (только для типа subscription)"""
+        content = self.fetch_config(index)
+        if content is None:
+            return False
+        return self.write_config_file(content, index)
+    
+    def apply_cached_config(self, index: int, content_hash: Optional[str] = None) -> bool:
+        """
+        Применить конфиг профиля без обращения к сети
+        
+        Для подписки записывает в config.json последний успешно скачанный конфиг,
+        для готового конфига - сам конфиг.
+        
+        Args:
+            index: Индекс профиля
+            content_hash: Уже вычисленный хэш закэшированного конфига (если известен)
+        
+        Returns:
+            False если для подписки еще нет закэшированного конфига
+        """
+        profile_type = self.get_profile_type(index)
+        if profile_type == self.PROFILE_TYPE_CONFIG:
+            return self.apply_config(index)
+        content = self.get_cached_config(index)
+        if content is None:
             return False
+        return self.write_config_file(content, index, content_hash)
+    
+    def get_profile_config(self, index: int) -> Optional[bytes]:
+        """Содержимое готового конфига профиля в виде, в котором оно записывается в config.json"""
+        profile = self.get(index)
+        if not profile or profile.get("type", self.PROFILE_TYPE_SUBSCRIPTION) != self.PROFILE_TYPE_CONFIG:
+            return None
+        config_data = profile.get("config")
+        if not config_data:
+            log_to_file("get_profile_config: конфиг не найден в профиле")
+            return None
+        return json.dumps(config_data, ensure_ascii=False, indent=2).encode('utf-8')
     
     def apply_config(self, index: int) -> bool:
         """Применить конфиг профиля (для готовых конфигов)"""
@@ -212,20 +561,10 @@ class SubscriptionManager:
         profile_type = profile.get("type", self.PROFILE_TYPE_SUBSCRIPTION)
         if profile_type == self.PROFILE_TYPE_CONFIG:
             # Для готового конфига - сохраняем его напрямую
-            config_data = profile.get("config")
-            if not config_data:
-                log_to_file("apply_config: конфиг не найден в профиле")
-                return False
-            
-            try:
-                CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
-                formatted_content = json.dumps(config_data, ensure_ascii=False, indent=2)
-                CONFIG_FILE.write_text(formatted_content, encoding='utf-8')
-                log_to_file(f"Конфиг применен из профиля: {CONFIG_FILE}")
-                return True
-            except Exception as e:
-                log_to_file(f"apply_config error: {e}")
+            content = self.get_profile_config(index)
+            if content is None:
                 return False
+            return self.write_config_file(content, index)
         elif profile_type == self.PROFILE_TYPE_SUBSCRIPTION:
             # Для подписки - скачиваем конфиг
             return self.download_config(index)
@@ -0,0 +1,111 @@
+"""Бенчмарк нормализации строк лога для окна логов
+
+Запуск из корня проекта:
+    python scripts/bench_log_normalize.py [--lines 1000000] [--refreshes 3]
+
+Генерирует фикстуру из строк приложения и цветных строк sing-box и сравнивает:
+- старый способ: три re.sub (две - по строке шаблона) на каждую строку
+  при каждом обновлении окна;
+- новый способ: пакетная нормализация в (время, уровень, текст) при первом
+  чтении из LogRingBuffer и кэш по номеру строки при повторных чтениях.
+"""
+import argparse
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.log_buffer import LogRingBuffer, normalize_log_lines, render_log_entry
+
+_ANSI_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+
+LEVELS = ("\x1b[36mINFO\x1b[0m", "\x1b[35mDEBUG\x1b[0m", "\x1b[33mWARN\x1b[0m", "\x1b[31mERROR\x1b[0m")
+
+
+def write_fixture(path: Path, lines: int) -> None:
+    """Фикстура: каждая четвертая строка - от приложения, остальные - от sing-box"""
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(lines):
+            second = i % 60
+            if i % 4 == 0:
+                f.write(f"[2024-01-01 12:00:{second:02d}] [Version Check] Проверка {i}\n")
+            else:
+                level = LEVELS[i % len(LEVELS)]
+                f.write(
+                    f"+0800 2024-01-01 12:00:{second:02d} {level} [{i} 0ms] "
+                    f"outbound/vless[proxy]: outbound connection to example.com:443\n"
+                )
+
+
+def legacy_format_line(line: str) -> str:
+    """Старый LogUIManager._format_line"""
+    if not line:
+        return ""
+    line = _ANSI_RE.sub("", line)
+    line = re.sub(r'\[\d{4}-\d{2}-\d{2} (\d{2}:\d{2}:\d{2})\]', r'[\1]', line)
+    line = re.sub(
+        r'^\+\d{4}\s+\d{4}-\d{2}-\d{2}\s+(\d{2}:\d{2}:\d{2})\s+',
+        r'[\1] ',
+        line
+    )
+    return line.strip()
+
+
+def bench_legacy(lines, refreshes: int) -> float:
+    """Каждое обновление заново форматирует все строки"""
+    started = time.perf_counter()
+    for _ in range(refreshes):
+        text = "\n".join(f for f in (legacy_format_line(line) for line in lines) if f)
+    elapsed = time.perf_counter() - started
+    assert text
+    return len(lines) * refreshes / elapsed
+
+
+def bench_normalize(lines) -> float:
+    """Только пакетная нормализация"""
+    started = time.perf_counter()
+    entries = normalize_log_lines(lines)
+    elapsed = time.perf_counter() - started
+    assert len(entries) == len(lines)
+    return len(lines) / elapsed
+
+
+def bench_buffer(lines, refreshes: int) -> float:
+    """Обновления окна через LogRingBuffer: разбор при первом чтении, дальше - из кэша"""
+    log_buffer = LogRingBuffer(capacity=len(lines))
+    log_buffer.extend(lines)
+    started = time.perf_counter()
+    for _ in range(refreshes):
+        entries, _, _ = log_buffer.read_since(0)
+        text = "\n".join(render_log_entry(entry) for entry in entries)
+    elapsed = time.perf_counter() - started
+    assert text
+    return len(lines) * refreshes / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000, help="строк в фикстуре")
+    parser.add_argument("--refreshes", type=int, default=3, help="обновлений окна логов")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = Path(tmp) / "fixture.log"
+        write_fixture(fixture, args.lines)
+        lines = fixture.read_text(encoding="utf-8").splitlines()
+
+    legacy = bench_legacy(lines, args.refreshes)
+    normalize = bench_normalize(lines)
+    buffered = bench_buffer(lines, args.refreshes)
+
+    print(f"Старый _format_line ({args.refreshes} обновл.): {legacy:>12,.0f} строк/с")
+    print(f"normalize_log_lines (один проход):   {normalize:>12,.0f} строк/с")
+    print(f"LogRingBuffer ({args.refreshes} обновл., кэш):  {buffered:>12,.0f} строк/с")
+    print(f"Ускорение обновлений: x{buffered / legacy:,.1f}")
+
+
+if __name__ == "__main__":
+    main()
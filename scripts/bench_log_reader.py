@@ -0,0 +1,114 @@
+"""Бенчмарк чтения логов sing-box: старый построчный способ против BatchLogWriter
+
+Запуск из корня проекта:
+    python scripts/bench_log_reader.py [--lines 200000] [--legacy-lines 300]
+
+Дочерний процесс Python печатает строки в стиле лога sing-box так быстро,
+как может, а читатель пишет их в временный файл. Выводится устойчивая
+скорость приема (строк/с) для обоих вариантов, а также для BatchLogWriter
+с фильтром по уровню (debug-строки не пишутся на диск при пороге info).
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.log_writer import BatchLogWriter, pump_lines
+from utils.log_levels import SingBoxLevelFilter
+
+# Строка, похожая на debug-лог sing-box
+EMITTER = (
+    "import sys\n"
+    "n = int(sys.argv[1])\n"
+    "out = sys.stdout\n"
+    "for i in range(n):\n"
+    "    out.write(f'+0800 2024-01-01 12:00:00 DEBUG [{i}] outbound/vless[proxy]: "
+    "outbound connection to example.com:443\\n')\n"
+    "out.flush()\n"
+)
+
+
+def _spawn(lines: int, bufsize: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-c", EMITTER, str(lines)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=bufsize,
+    )
+
+
+def bench_legacy(lines: int, log_file: Path) -> float:
+    """Старый способ: bufsize=0, открытие файла на каждую строку и пауза 10 мс"""
+    proc = _spawn(lines, bufsize=0)
+    started = time.perf_counter()
+    count = 0
+    while True:
+        line_bytes = proc.stdout.readline()
+        if not line_bytes:
+            break
+        line = line_bytes.decode("utf-8", errors="replace").rstrip()
+        if line:
+            with log_file.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            count += 1
+        time.sleep(0.01)
+    proc.wait()
+    return count / (time.perf_counter() - started)
+
+
+def bench_batched(lines: int, log_file: Path) -> float:
+    """Новый способ: буферизованный pipe и BatchLogWriter"""
+    proc = _spawn(lines, bufsize=-1)
+    started = time.perf_counter()
+    with BatchLogWriter(log_file) as writer:
+        count = pump_lines(proc.stdout, writer)
+    elapsed = time.perf_counter() - started
+    proc.wait()
+    if count != lines:
+        raise RuntimeError(f"потеряны строки: {count} из {lines}")
+    return count / elapsed
+
+
+def bench_filtered(lines: int, log_file: Path, disk_level: str) -> float:
+    """BatchLogWriter с разбором уровня: строки ниже disk_level не пишутся в файл"""
+    proc = _spawn(lines, bufsize=-1)
+    level_filter = SingBoxLevelFilter(disk_level=disk_level)
+    started = time.perf_counter()
+    with BatchLogWriter(log_file) as writer:
+        def on_line(line: str) -> None:
+            to_disk, _ = level_filter.classify(line)
+            if to_disk:
+                writer.write_line(line)
+        count = pump_lines(proc.stdout, None, on_line=on_line)
+    elapsed = time.perf_counter() - started
+    proc.wait()
+    if count != lines:
+        raise RuntimeError(f"потеряны строки: {count} из {lines}")
+    return count / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200_000, help="строк для BatchLogWriter")
+    parser.add_argument("--legacy-lines", type=int, default=300, help="строк для старого способа (он медленный)")
+    parser.add_argument("--disk-level", default="info", help="порог уровня для варианта с фильтром")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        legacy = bench_legacy(args.legacy_lines, tmp_dir / "legacy.log")
+        batched = bench_batched(args.lines, tmp_dir / "batched.log")
+        filtered = bench_filtered(args.lines, tmp_dir / "filtered.log", args.disk_level)
+
+    print(f"Построчно (старый способ): {legacy:>12,.0f} строк/с  ({args.legacy_lines} строк)")
+    print(f"BatchLogWriter:            {batched:>12,.0f} строк/с  ({args.lines} строк)")
+    print(f"С фильтром (диск >= {args.disk_level}): {filtered:>8,.0f} строк/с  ({args.lines} строк)")
+    print(f"Ускорение: x{batched / legacy:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Бенчмарк генерации стилей при смене темы
+
+Запуск из корня проекта:
+    python scripts/bench_theme_switch.py [--switches 50]
+
+Повторяет набор вызовов StyleSheet, которые делают окно и страницы при
+создании и в refresh_ui_styles, и сравнивает на каждой смене темы:
+- старый способ: каждый вызов заново собирает QSS (десятки theme.get_color);
+- новый способ: кэш стилей по (тема, компонент, аргументы), сбрасываемый
+  в theme.reload_theme().
+
+Qt не нужен: измеряется только Python-часть. Вторая половина выигрыша -
+пропуск setStyleSheet с неизменившимся QSS (StyleSheet.apply) - зависит от
+числа виджетов; здесь выводится только доля таких вызовов.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ui.styles import StyleSheet, theme
+from utils.theme_manager import set_theme, get_available_themes
+
+# (компонент, kwargs, сколько раз вызывается за одно обновление интерфейса)
+WORKLOAD = (
+    ("dialog_button", {"variant": "confirm"}, 8),
+    ("dialog_button", {"variant": "cancel"}, 5),
+    ("dialog_button", {"variant": "warning"}, 1),
+    ("dialog_button", {"variant": "success"}, 1),
+    ("label", {"variant": "default", "size": "large"}, 5),
+    ("label", {"variant": "default", "size": "xlarge"}, 2),
+    ("label", {"variant": "secondary"}, 6),
+    ("label", {"variant": "secondary", "size": "medium"}, 1),
+    ("label", {"variant": "primary"}, 3),
+    ("label", {"variant": "error"}, 4),
+    ("label", {"variant": "warning"}, 2),
+    ("checkbox", {}, 5),
+    ("input", {}, 3),
+    ("combo_box", {}, 3),
+    ("dialog", {}, 3),
+    ("progress_bar", {}, 2),
+    ("navigation", {}, 2),
+    ("text_edit", {}, 1),
+    ("list_widget", {}, 1),
+    ("card", {}, 4),
+    ("button", {"variant": "primary", "size": "large"}, 1),
+    ("global_styles", {}, 2),
+)
+
+
+def run_switches(theme_ids, switches: int, cached: bool) -> float:
+    """Среднее время генерации всех стилей на одну смену темы, мс"""
+    calls = [
+        (getattr(StyleSheet, name) if cached else getattr(StyleSheet, name).__wrapped__, kwargs)
+        for name, kwargs, count in WORKLOAD
+        for _ in range(count)
+    ]
+    started = time.perf_counter()
+    for i in range(switches):
+        set_theme(theme_ids[i % len(theme_ids)])
+        theme.reload_theme()
+        for func, kwargs in calls:
+            func(**kwargs)
+    return (time.perf_counter() - started) * 1000 / switches
+
+
+def unchanged_share(theme_ids) -> float:
+    """Доля вызовов, чей QSS совпадает с предыдущей темой (их StyleSheet.apply пропускает)"""
+    previous = {}
+    same = total = 0
+    for theme_id in theme_ids + theme_ids[:1]:
+        set_theme(theme_id)
+        theme.reload_theme()
+        for name, kwargs, count in WORKLOAD:
+            key = (name, tuple(sorted(kwargs.items())))
+            style = getattr(StyleSheet, name)(**kwargs)
+            if key in previous:
+                total += count
+                same += count if previous[key] == style else 0
+            previous[key] = style
+    return same / total if total else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--switches", type=int, default=50, help="смен темы")
+    args = parser.parse_args()
+
+    theme_ids = [info["id"] for info in get_available_themes()]
+    if len(theme_ids) < 2:
+        sys.exit("Нужно минимум две темы в data/themes")
+    calls = sum(count for _, _, count in WORKLOAD)
+
+    legacy = run_switches(theme_ids, args.switches, cached=False)
+    cached = run_switches(theme_ids, args.switches, cached=True)
+    info = StyleSheet.cache_info()
+
+    print(f"Темы: {', '.join(theme_ids)}; вызовов StyleSheet на смену темы: {calls}")
+    print(f"Без кэша: {legacy:8.3f} мс на смену темы")
+    print(f"С кэшем:  {cached:8.3f} мс на смену темы (попаданий {info['hits']}, промахов {info['misses']})")
+    print(f"Ускорение генерации стилей: x{legacy / cached:,.1f}")
+    print(f"Неизменившийся QSS (setStyleSheet пропускается): {unchanged_share(theme_ids):.0%} вызовов")
+
+
+if __name__ == "__main__":
+    main()
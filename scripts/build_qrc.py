@@ -1,53 +1,139 @@
 """
 Скрипт для компиляции Qt Resource файлов (QRC) в Python модуль
 Запускается перед сборкой PyInstaller для зашивания ресурсов в код
+
+Шрифт Material Design Icons (~1 МБ) зашивается не целиком, а подмножеством
+из символов, которые использует приложение (список - scripts/extract_icon_codes.py).
+Для подмножества нужен fontTools (pip install fonttools); без него или с
+флагом --full-font зашивается полный шрифт.
 """
 import sys
 import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
 from pathlib import Path
+from typing import List, Optional
+
+from extract_icon_codes import used_codepoints
+
+# Шрифт иконок в resources/app.qrc и имя подмножества в собранных ресурсах
+# (IconHelper пробует :/fonts/materialdesignicons-subset.ttf первым)
+MDI_FONT_PREFIX = 'fonts/materialdesignicons'
+MDI_SUBSET_ALIAS = 'fonts/materialdesignicons-subset.ttf'
+
+
+def subset_font(font_file: Path, output_file: Path, codepoints: List[int]) -> bool:
+    """
+    Сохраняет подмножество шрифта только с указанными символами
+
+    Returns:
+        False, если fontTools не установлен
+    """
+    try:
+        from fontTools import subset
+    except ImportError:
+        return False
+
+    options = subset.Options()
+    options.name_IDs = ['*']  # имя семейства нужно QFontDatabase.applicationFontFamilies
+    options.hinting = False
+    options.layout_features = []
+    options.notdef_outline = True
+
+    font = subset.load_font(str(font_file), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    subset.save_font(font, str(output_file), options)
+    return True
+
+
+def build_subset_qrc(qrc_file: Path, work_dir: Path) -> Optional[Path]:
+    """
+    Создает копию QRC, в которой шрифт иконок заменен подмножеством
+
+    Пути в копии абсолютные, а имена ресурсов (alias) - как в исходном QRC,
+    поэтому копия лежит во временной папке и не попадает в репозиторий.
 
+    Returns:
+        Путь к QRC для компиляции; None - подмножество сделать не удалось
+    """
+    tree = ET.parse(qrc_file)
+    codepoints = used_codepoints()
+    subset_file = None
+
+    for element in tree.iter('file'):
+        name = element.text.strip()
+        source = (qrc_file.parent / name).resolve()
+        element.set('alias', element.get('alias', name))
+        element.text = source.as_posix()
+
+        if name.startswith(MDI_FONT_PREFIX) and name.endswith('.ttf'):
+            subset_file = work_dir / 'materialdesignicons-subset.ttf'
+            if not subset_font(source, subset_file, codepoints):
+                print("[build_qrc] fontTools не установлен - шрифт иконок будет зашит целиком (pip install fonttools)")
+                return None
+            element.set('alias', MDI_SUBSET_ALIAS)
+            element.text = subset_file.as_posix()
+            print(
+                f"[build_qrc] Подмножество шрифта иконок: {len(codepoints)} символов, "
+                f"{source.stat().st_size // 1024} КБ -> {subset_file.stat().st_size // 1024} КБ"
+            )
 
-def compile_qrc():
+    if subset_file is None:
+        return None
+    build_qrc_file = work_dir / qrc_file.name
+    tree.write(build_qrc_file, encoding='utf-8')
+    return build_qrc_file
+
+
+def compile_qrc(full_font: bool = False):
     """
     Компилирует resources/app.qrc в scripts/resources_rc.py
+
+    Args:
+        full_font: Зашить полный шрифт иконок вместо подмножества
     """
     qrc_file = Path('resources/app.qrc')
     output_file = Path('scripts/resources_rc.py')
-    
+
     if not qrc_file.exists():
         print(f"❌ ERROR: QRC файл не найден: {qrc_file}", file=sys.stderr)
         print(f"   Создайте файл {qrc_file} с описанием ресурсов", file=sys.stderr)
         return False
-    
-    print(f"[build_qrc] Компиляция QRC: {qrc_file} -> {output_file}")
-    
-    # Пробуем разные способы вызова pyrcc5
-    commands = [
-        ['py', '-m', 'PyQt5.pyrcc_main', str(qrc_file), '-o', str(output_file)],
-        ['python', '-m', 'PyQt5.pyrcc_main', str(qrc_file), '-o', str(output_file)],
-        ['pyrcc5', str(qrc_file), '-o', str(output_file)],
-    ]
-    
-    for cmd in commands:
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            if output_file.exists():
-                print(f"[OK] QRC compiled: {output_file}")
-                return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            continue
-    
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        source_qrc = None if full_font else build_subset_qrc(qrc_file, Path(work_dir))
+        source_qrc = source_qrc or qrc_file
+
+        print(f"[build_qrc] Компиляция QRC: {source_qrc} -> {output_file}")
+
+        # Пробуем разные способы вызова pyrcc5
+        commands = [
+            ['py', '-m', 'PyQt5.pyrcc_main', str(source_qrc), '-o', str(output_file)],
+            ['python', '-m', 'PyQt5.pyrcc_main', str(source_qrc), '-o', str(output_file)],
+            ['pyrcc5', str(source_qrc), '-o', str(output_file)],
+        ]
+
+        for cmd in commands:
+            try:
+                result = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
+                if output_file.exists():
+                    print(f"[OK] QRC compiled: {output_file} ({output_file.stat().st_size // 1024} КБ)")
+                    return True
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                continue
+
     print(f"❌ ERROR: Не удалось скомпилировать QRC", file=sys.stderr)
     print(f"   Убедитесь, что PyQt5 установлен и pyrcc5 доступен", file=sys.stderr)
     return False
 
 
 if __name__ == '__main__':
-    success = compile_qrc()
+    success = compile_qrc(full_font='--full-font' in sys.argv[1:])
     sys.exit(0 if success else 1)
-
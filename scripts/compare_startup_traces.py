@@ -0,0 +1,121 @@
+"""Сравнение трасс запуска (--trace-startup)
+
+Запуск из корня проекта:
+    python scripts/compare_startup_traces.py before.json [after.json] [--top 15]
+
+Для каждой трассы выводит длительность этапов запуска, время до первой
+отрисовки и суммарное время импортов; с двумя трассами - разницу и самые
+долгие импорты, которые есть только в первой трассе (например, модули,
+импорт которых стал отложенным; вложенные в них импорты не повторяются).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+# Порядок этапов в таблице (остальные - после них, по времени начала)
+PHASE_ORDER = (
+    "module imports",
+    "create_application",
+    "theme load",
+    "MainWindow.__init__",
+    "MainWindow.show",
+    "InitOperationsWorker",
+    "CheckVersionWorker",
+    "CheckAppVersionWorker",
+)
+
+
+def load_trace(path: Path) -> Dict[str, Any]:
+    """Этапы (мс), импорты верхнего уровня (мс) и метаданные трассы"""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    phases: Dict[str, float] = {}
+    starts: Dict[str, float] = {}
+    opened: Dict[Tuple[str, Any], float] = {}
+    imports: Dict[str, float] = {}
+    all_imports: List[Tuple[str, float, float]] = []
+    for event in data.get("traceEvents", []):
+        ph, name = event.get("ph"), event.get("name")
+        if event.get("cat") == "import":
+            if ph == "X":
+                all_imports.append((name, event["ts"], event["dur"]))
+                if event.get("args", {}).get("depth") == 0:
+                    imports[name] = imports.get(name, 0.0) + event["dur"] / 1000
+            continue
+        if ph == "X":
+            phases[name] = phases.get(name, 0.0) + event["dur"] / 1000
+            starts.setdefault(name, event["ts"])
+        elif ph in ("B", "b"):
+            opened[(name, event.get("id"))] = event["ts"]
+            starts.setdefault(name, event["ts"])
+        elif ph in ("E", "e"):
+            begin = opened.pop((name, event.get("id")), None)
+            if begin is not None:
+                phases[name] = phases.get(name, 0.0) + (event["ts"] - begin) / 1000
+    order = {name: i for i, name in enumerate(PHASE_ORDER)}
+    names = sorted(phases, key=lambda n: (order.get(n, len(order)), starts.get(n, 0)))
+    return {
+        "phases": [(name, phases[name]) for name in names],
+        "imports": imports,
+        "all_imports": all_imports,
+        "meta": data.get("otherData", {}),
+    }
+
+
+def missing_imports(first: Dict[str, Any], second: Dict[str, Any]) -> List[Tuple[str, float]]:
+    """Импорты первой трассы, которых нет во второй (только внешние, без вложенных в них)"""
+    loaded = {name for name, _, _ in second["all_imports"]}
+    missing = [item for item in first["all_imports"] if item[0] not in loaded]
+    return [
+        (name, dur / 1000) for name, ts, dur in missing
+        if not any(o_ts <= ts and ts + dur <= o_ts + o_dur and (o_name, o_ts) != (name, ts) for o_name, o_ts, o_dur in missing)
+    ]
+
+
+def _fmt(value) -> str:
+    return f"{value:10.1f}" if isinstance(value, (int, float)) else f"{'-':>10}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Сравнение трасс запуска SingBox-UI")
+    parser.add_argument("traces", nargs="+", type=Path, help="одна или две трассы startup-trace.json")
+    parser.add_argument("--top", type=int, default=15, help="сколько импортов показывать")
+    args = parser.parse_args()
+    if len(args.traces) > 2:
+        parser.error("нужно не больше двух трасс")
+
+    traces = [load_trace(path) for path in args.traces]
+    for path, trace in zip(args.traces, traces):
+        meta = trace["meta"]
+        print(f"{path}: версия {meta.get('version', '?')}, frozen={meta.get('frozen')}, запуск {meta.get('started_at', '?')}")
+
+    headers = ["этап"] + [f"#{i + 1}, мс" for i in range(len(traces))] + (["разница"] if len(traces) == 2 else [])
+    print()
+    print(f"{headers[0]:<28}" + "".join(f"{h:>10}" for h in headers[1:]))
+    rows: List[Tuple[str, List[Any]]] = []
+    names = []
+    for trace in traces:
+        names += [name for name, _ in trace["phases"] if name not in names]
+    for name in names:
+        rows.append((name, [dict(t["phases"]).get(name) for t in traces]))
+    rows.append(("импорты верхнего уровня", [sum(t["imports"].values()) for t in traces]))
+    rows.append(("первая отрисовка", [t["meta"].get("first_paint_ms") for t in traces]))
+    for name, values in rows:
+        line = f"{name:<28}" + "".join(_fmt(v) for v in values)
+        if len(values) == 2 and all(isinstance(v, (int, float)) for v in values):
+            line += f"{values[1] - values[0]:+10.1f}"
+        print(line)
+
+    if len(traces) == 2:
+        title, items = "Импорты, которых нет во второй трассе", missing_imports(traces[0], traces[1])
+    else:
+        title, items = "Самые долгие импорты верхнего уровня", list(traces[0]["imports"].items())
+    print(f"\n{title}:")
+    for name, duration in sorted(items, key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {duration:8.1f} мс  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
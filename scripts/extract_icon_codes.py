@@ -1,13 +1,25 @@
 """
-Скрипт для извлечения кодов символов иконок из qtawesome.
-Запустите этот скрипт, чтобы получить правильные коды для icon_helper.py
+Скрипт для извлечения кодов символов иконок.
+
+Без аргументов извлекает коды из qtawesome (нужны PyQt5 и qtawesome) -
+чтобы получить правильные коды для MDI_ICONS в icon_helper.py.
+
+С --codepoints выводит коды символов, которые использует приложение
+(MDI_ICONS из utils/icon_helper.py), в формате --unicodes для pyftsubset.
+Этот же список used_codepoints() использует scripts/build_qrc.py для
+подмножества шрифта Material Design Icons.
 """
+import ast
+import re
 import sys
-from PyQt5.QtWidgets import QApplication
-import qtawesome as qta
+from pathlib import Path
+from typing import Dict, List
 
-# Создаем QApplication для работы qtawesome
-app = QApplication(sys.argv) if not QApplication.instance() else QApplication.instance()
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+ICON_HELPER_FILE = PROJECT_ROOT / "utils" / "icon_helper.py"
+# Папки с кодом, в которых ищутся имена иконок ("mdi.xxx")
+SOURCE_DIRS = ("app", "core", "main", "managers", "ui", "utils", "workers")
+ICON_NAME_RE = re.compile(r"""["'](mdi\.[a-z0-9-]+)["']""")
 
 # Список используемых иконок
 ICONS_TO_EXTRACT = [
@@ -21,70 +33,122 @@ ICONS_TO_EXTRACT = [
     "mdi.home",
     "mdi.account",
     "mdi.cog",
+    "mdi.sync",
+    "mdi.file-document",
 ]
 
-print("Коды символов для Material Design Icons:\n")
-print("MDI_ICONS = {")
 
-for icon_name in ICONS_TO_EXTRACT:
-    try:
-        # Получаем информацию об иконке через внутренний API qtawesome
-        from qtawesome.iconic_font import _resource
-        if not _resource:
-            qta._init()
-        
-        # Получаем код символа через charmap
-        charmap = qta._charmap
-        if not charmap:
-            # Пробуем другой способ
-            icon_obj = qta.icon(icon_name)
-            # Получаем pixmap и извлекаем символ
-            pixmap = icon_obj.pixmap(16, 16)
-            # Пробуем получить через _resource
-            try:
-                font_data = qta._resource
-                if font_data:
-                    # Ищем в charmap
-                    for key, value in charmap.items():
-                        if key == icon_name:
-                            char_code = value
-                            break
-                    else:
-                        # Пробуем через iconic_font
-                        from qtawesome.iconic_font import IconicFont
-                        iconic = IconicFont('mdi', 'materialdesignicons5-webfont-5.9.55.ttf', charmap={})
-                        char_code = iconic.charmap.get(icon_name.replace('mdi.', ''), '')
-            except:
-                char_code = ''
-        else:
-            char_code = charmap.get(icon_name, '')
-        
-        if char_code:
-            # Получаем Unicode код
-            unicode_code = ord(char_code) if isinstance(char_code, str) else char_code
-            # Для Private Use Area (U+F0000+) используем формат \U
-            if unicode_code >= 0xF0000:
-                hex_code = f"\\U{unicode_code:08x}"
+def load_mdi_icons() -> Dict[str, str]:
+    """MDI_ICONS из utils/icon_helper.py (без импорта модуля - он требует PyQt5)"""
+    tree = ast.parse(ICON_HELPER_FILE.read_text(encoding="utf-8"))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "MDI_ICONS" for target in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"MDI_ICONS не найден в {ICON_HELPER_FILE}")
+
+
+def find_unknown_icons(mdi_icons: Dict[str, str]) -> Dict[str, List[str]]:
+    """Имена иконок из кода приложения, которых нет в MDI_ICONS: имя -> файлы"""
+    unknown: Dict[str, List[str]] = {}
+    for source_dir in SOURCE_DIRS:
+        for path in sorted((PROJECT_ROOT / source_dir).rglob("*.py")):
+            for name in ICON_NAME_RE.findall(path.read_text(encoding="utf-8")):
+                if name not in mdi_icons:
+                    unknown.setdefault(name, []).append(str(path.relative_to(PROJECT_ROOT)))
+    return unknown
+
+
+def used_codepoints() -> List[int]:
+    """
+    Коды символов, которые нужны приложению (для подмножества шрифта)
+    
+    Имена "mdi.xxx" из кода, которых нет в MDI_ICONS, выводятся
+    предупреждением: IconHelper все равно нарисует их пустыми.
+    """
+    mdi_icons = load_mdi_icons()
+    for name, files in find_unknown_icons(mdi_icons).items():
+        print(f"[extract_icon_codes] WARNING: {name} нет в MDI_ICONS ({', '.join(files)})", file=sys.stderr)
+    return sorted({ord(char) for char in mdi_icons.values() if len(char) == 1})
+
+
+def print_qtawesome_codes():
+    """Выводит MDI_ICONS для ICONS_TO_EXTRACT по charmap qtawesome"""
+    from PyQt5.QtWidgets import QApplication
+    import qtawesome as qta
+    
+    # Создаем QApplication для работы qtawesome
+    app = QApplication(sys.argv) if not QApplication.instance() else QApplication.instance()
+    
+    print("Коды символов для Material Design Icons:\n")
+    print("MDI_ICONS = {")
+
+    for icon_name in ICONS_TO_EXTRACT:
+        try:
+            # Получаем информацию об иконке через внутренний API qtawesome
+            from qtawesome.iconic_font import _resource
+            if not _resource:
+                qta._init()
+
+            # Получаем код символа через charmap
+            charmap = qta._charmap
+            if not charmap:
+                # Пробуем другой способ
+                icon_obj = qta.icon(icon_name)
+                # Получаем pixmap и извлекаем символ
+                pixmap = icon_obj.pixmap(16, 16)
+                # Пробуем получить через _resource
+                try:
+                    font_data = qta._resource
+                    if font_data:
+                        # Ищем в charmap
+                        for key, value in charmap.items():
+                            if key == icon_name:
+                                char_code = value
+                                break
+                        else:
+                            # Пробуем через iconic_font
+                            from qtawesome.iconic_font import IconicFont
+                            iconic = IconicFont('mdi', 'materialdesignicons5-webfont-5.9.55.ttf', charmap={})
+                            char_code = iconic.charmap.get(icon_name.replace('mdi.', ''), '')
+                except:
+                    char_code = ''
             else:
-                hex_code = f"\\u{unicode_code:04x}"
-            
-            # Выводим в формате для копирования в MDI_ICONS
-            icon_short = icon_name.split(".")[-1]
-            print(f'    "{icon_name}": "{hex_code}",  # {icon_short} (U+{unicode_code:06X})')
-        else:
-            print(f'    # "{icon_name}": ERROR - не удалось найти код символа')
-    except Exception as e:
-        print(f'    # "{icon_name}": ERROR - {e}')
+                char_code = charmap.get(icon_name, '')
 
-print("}")
+            if char_code:
+                # Получаем Unicode код
+                unicode_code = ord(char_code) if isinstance(char_code, str) else char_code
+                # Для Private Use Area (U+F0000+) используем формат \U
+                if unicode_code >= 0xF0000:
+                    hex_code = f"\\U{unicode_code:08x}"
+                else:
+                    hex_code = f"\\u{unicode_code:04x}"
+
+                # Выводим в формате для копирования в MDI_ICONS
+                icon_short = icon_name.split(".")[-1]
+                print(f'    "{icon_name}": "{hex_code}",  # {icon_short} (U+{unicode_code:06X})')
+            else:
+                print(f'    # "{icon_name}": ERROR - не удалось найти код символа')
+        except Exception as e:
+            print(f'    # "{icon_name}": ERROR - {e}')
+
+    print("}")
+
+    # Также выводим информацию о шрифте
+    print("\n\nИнформация о шрифте:")
+    try:
+        icon = qta.icon("mdi.plus")
+        font = icon.font
+        print(f"Font family: {font.family()}")
+        print(f"Font style: {font.styleName()}")
+    except Exception as e:
+        print(f"Ошибка получения информации о шрифте: {e}")
 
-# Также выводим информацию о шрифте
-print("\n\nИнформация о шрифте:")
-try:
-    icon = qta.icon("mdi.plus")
-    font = icon.font
-    print(f"Font family: {font.family()}")
-    print(f"Font style: {font.styleName()}")
-except Exception as e:
-    print(f"Ошибка получения информации о шрифте: {e}")
 
+if __name__ == "__main__":
+    if "--codepoints" in sys.argv[1:]:
+        print(",".join(f"U+{code:X}" for code in used_codepoints()))
+    else:
+        print_qtawesome_codes()
@@ -1,17 +1,4 @@
 """Вариации компонентов - используют базовые компоненты из design"""
-from .dialog import (
-    show_info_dialog,
-    show_confirm_dialog,
-    show_input_dialog,
-    show_language_selection_dialog,
-    show_add_subscription_dialog,
-    show_add_profile_dialog,
-    show_edit_profile_dialog,
-    show_kill_all_confirm_dialog,
-    show_kill_all_success_dialog,
-    DownloadDialog,
-    DialogType
-)
 from .button import (
     Button,
     NavButton,
@@ -26,8 +13,37 @@ from .line_edit import LineEdit
 from .checkbox import CheckBox
 from .combo_box import ComboBox
 from .list_widget import ListWidget
+from .log_view import LogView, LogListModel
 from .widget import Container
-from .window import LogsWindow
+
+# Диалоги (с редактором конфига на WebEngine) и окно логов нужны не при запуске:
+# их модули загружаются при первом обращении к имени (см. __getattr__)
+_DIALOG_EXPORTS = frozenset({
+    'show_info_dialog',
+    'show_confirm_dialog',
+    'show_input_dialog',
+    'show_language_selection_dialog',
+    'show_add_subscription_dialog',
+    'show_add_profile_dialog',
+    'show_edit_profile_dialog',
+    'show_kill_all_confirm_dialog',
+    'show_kill_all_success_dialog',
+    'show_latency_results_dialog',
+    'DownloadDialog',
+    'DialogType',
+})
+
+
+def __getattr__(name):
+    if name in _DIALOG_EXPORTS:
+        from . import dialog as module
+    elif name == 'LogsWindow':
+        from . import window as module
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     # Диалоги
@@ -40,6 +56,7 @@ __all__ = [
     'show_edit_profile_dialog',
     'show_kill_all_confirm_dialog',
     'show_kill_all_success_dialog',
+    'show_latency_results_dialog',
     'DownloadDialog',
     'DialogType',
     # Кнопки
@@ -59,6 +76,8 @@ __all__ = [
     'CheckBox',
     'ComboBox',
     'ListWidget',
+    'LogView',
+    'LogListModel',
     'Container',
     # Окна
     'LogsWindow'
@@ -1,6 +1,6 @@
 """Все вариации диалогов - используют BaseDialog из design"""
 from enum import Enum
-from typing import Optional, Tuple, Callable, Dict, Any
+from typing import Optional, Tuple, Callable, Dict, Any, List
 from PyQt5.QtWidgets import QWidget, QHBoxLayout, QProgressBar, QFileDialog, QVBoxLayout
 from PyQt5.QtCore import Qt, QUrl
 from PyQt5.QtGui import QFont
@@ -11,6 +11,7 @@ from ui.design.component.label import Label
 from ui.design.component.line_edit import LineEdit
 from ui.design.component.progress_bar import ProgressBar
 from ui.design.component.combo_box import ComboBox
+from ui.design.component.list_widget import ListWidget
 from utils.i18n import tr, get_available_languages, get_language_name
 from config.paths import SOURCE_RESOURCES_DIR
 import json
@@ -738,6 +739,44 @@ def show_kill_all_success_dialog(parent: QWidget, title: str, message: str) -> b
     return show_info_dialog(parent, title, message, success=True)
 
 
+def show_latency_results_dialog(parent: QWidget, title: str, summary: str, rows: List[str]) -> bool:
+    """
+    Показывает результаты проверки задержки серверов
+    
+    Args:
+        parent: Родительский виджет
+        title: Заголовок
+        summary: Итоговая строка над списком
+        rows: Строки результатов (уже отсортированные)
+    
+    Returns:
+        True если пользователь нажал OK
+    """
+    dialog = BaseDialog(parent, title)
+    dialog.setMinimumWidth(520)
+    
+    summary_label = Label(summary, variant="secondary")
+    summary_label.setWordWrap(True)
+    summary_label.setFont(QFont("Segoe UI", 13))
+    dialog.content_layout.addWidget(summary_label)
+    
+    results_list = ListWidget()
+    results_list.setMinimumHeight(320)
+    results_list.addItems(rows)
+    dialog.content_layout.addWidget(results_list)
+    
+    btn_layout = QHBoxLayout()
+    btn_layout.addStretch()
+    btn_ok = Button(tr("messages.ok"), variant="default")
+    btn_ok.setDefault(True)
+    btn_ok.setStyleSheet(StyleSheet.dialog_button(variant="confirm"))
+    btn_ok.clicked.connect(dialog.accept)
+    btn_layout.addWidget(btn_ok)
+    dialog.content_layout.addLayout(btn_layout)
+    
+    return dialog.exec_() == BaseDialog.Accepted
+
+
 def show_edit_profile_dialog(parent: QWidget, profile: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[Dict[str, Any]], Optional[str], bool]:
     """
     Показывает диалог редактирования профиля
@@ -0,0 +1,148 @@
+"""Виртуализированный просмотр логов - компонент из дизайн-системы"""
+from typing import Optional, List, Dict
+from PyQt5.QtWidgets import QListView, QWidget, QAbstractItemView, QApplication
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtGui import QColor, QFont, QKeySequence
+from ui.styles import theme
+from utils.log_buffer import LogEntry, DEFAULT_CAPACITY, render_log_entry
+
+# Уровень строки -> цвет темы
+_LEVEL_COLOR_NAMES = {
+    "ERROR": "error",
+    "FATAL": "error",
+    "PANIC": "error",
+    "WARN": "warning",
+    "DEBUG": "text_tertiary",
+    "TRACE": "text_tertiary",
+}
+
+
+class LogListModel(QAbstractListModel):
+    """
+    Модель строк лога (нормализованные записи из LogRingBuffer)
+    
+    Хранит не больше capacity записей: при добавлении лишние строки удаляются
+    с начала. Текст и цвет строки вычисляются в data() только для строк,
+    которые представление действительно рисует.
+    """
+    
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, parent: Optional[QWidget] = None):
+        """
+        Args:
+            capacity: Максимум строк в модели
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.capacity = capacity
+        self._entries: List[LogEntry] = []
+        self._level_colors: Dict[str, QColor] = {}
+        self.update_colors()
+    
+    def update_colors(self) -> None:
+        """Перечитать цвета уровней из текущей темы"""
+        self._level_colors = {
+            level: QColor(theme.get_color(name)) for level, name in _LEVEL_COLOR_NAMES.items()
+        }
+        if self._entries:
+            self.dataChanged.emit(self.index(0), self.index(len(self._entries) - 1), [Qt.ForegroundRole])
+    
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._entries)
+    
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entries[index.row()]
+        if role == Qt.DisplayRole:
+            return render_log_entry(entry)
+        if role == Qt.ForegroundRole:
+            return self._level_colors.get(entry[1])
+        return None
+    
+    def set_entries(self, entries: List[LogEntry]) -> None:
+        """Заменить все строки"""
+        self.beginResetModel()
+        self._entries = list(entries[-self.capacity:])
+        self.endResetModel()
+    
+    def append_entries(self, entries: List[LogEntry]) -> int:
+        """
+        Дописать строки в конец
+        
+        Returns:
+            Сколько строк удалено с начала, чтобы не превысить capacity
+        """
+        if not entries:
+            return 0
+        entries = entries[-self.capacity:]
+        removed = max(0, len(self._entries) + len(entries) - self.capacity)
+        if removed:
+            self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+            del self._entries[:removed]
+            self.endRemoveRows()
+        first = len(self._entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        self._entries.extend(entries)
+        self.endInsertRows()
+        return removed
+    
+    def row_text(self, row: int) -> str:
+        return render_log_entry(self._entries[row])
+
+
+class LogView(QListView):
+    """
+    Просмотр логов, который рисует только видимые строки
+    
+    Все строки одной высоты (uniformItemSizes), поэтому прокрутка и вставка
+    не зависят от числа строк. Выделенные строки копируются по Ctrl+C.
+    """
+    
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, parent: Optional[QWidget] = None):
+        """
+        Инициализация просмотра логов
+        
+        Args:
+            capacity: Максимум строк
+            parent: Родительский виджет
+        """
+        super().__init__(parent)
+        self.log_model = LogListModel(capacity, self)
+        self.setModel(self.log_model)
+        self.setUniformItemSizes(True)
+        # Позиция прокрутки в строках: при удалении строк с начала ее легко сдвинуть
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerItem)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setWordWrap(False)
+        self.setTextElideMode(Qt.ElideNone)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.setFont(QFont("Consolas", 10))
+        self.apply_theme()
+    
+    def apply_theme(self) -> None:
+        """Применить цвета текущей темы"""
+        self.setStyleSheet(f"""
+            QListView {{
+                background-color: {theme.get_color('background_primary')};
+                color: {theme.get_color('text_primary')};
+                border: none;
+                border-radius: {theme.get_size('border_radius_medium')}px;
+                padding: 8px;
+                outline: none;
+            }}
+            QListView::item:selected {{
+                background-color: {theme.get_color('accent_light')};
+            }}
+        """)
+        self.log_model.update_colors()
+    
+    def keyPressEvent(self, event) -> None:
+        if event.matches(QKeySequence.Copy):
+            rows = sorted(index.row() for index in self.selectionModel().selectedRows())
+            if rows:
+                QApplication.clipboard().setText("\n".join(self.log_model.row_text(row) for row in rows))
+            return
+        super().keyPressEvent(event)
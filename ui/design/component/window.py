@@ -1,18 +1,33 @@
 """Вариации окон - используют базовые компоненты из design"""
+from datetime import datetime, timedelta
 from typing import Optional
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QWidget
 from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QFont
-from ui.styles import StyleSheet, theme
+from ui.styles import StyleSheet
 from ui.design import CardWidget, TitleBar
 from ui.design.component.button import Button
-from ui.design.component.text_edit import TextEdit
+from ui.design.component.log_view import LogView
+from ui.design.component.line_edit import LineEdit
+from ui.design.component.checkbox import CheckBox
+from ui.design.component.combo_box import ComboBox
+from ui.design.component.label import Label
 from utils.i18n import tr
+from workers.log_search_worker import LogSearchWorker
 
 
 class LogsWindow(QDialog):
     """Окно для отображения логов и дебаг логов"""
     
+    MAX_SEARCH_RESULTS = 10000
+    # Фильтр времени поиска: (ключ перевода, секунд назад или None)
+    TIME_FILTERS = (
+        ("settings.logs_time_all", None),
+        ("settings.logs_time_15m", 15 * 60),
+        ("settings.logs_time_1h", 60 * 60),
+        ("settings.logs_time_24h", 24 * 60 * 60),
+    )
+    LEVEL_FILTERS = ("DEBUG", "INFO", "WARN", "ERROR")
+    
     def __init__(self, main_window, parent=None):
         """
         Инициализация окна логов
@@ -26,9 +41,14 @@ class LogsWindow(QDialog):
         self.current_mode = "logs"
         self.autoscroll_enabled = True
         self.user_has_scrolled = False
-        self.bottom_threshold = 5
-        self._last_text_by_mode = {"logs": "", "singbox": ""}
+        self.bottom_threshold = 5  # строк
+        # Курсоры в буферах логов: окно получает только новые строки
+        self._cursor_by_mode = {"logs": 0, "singbox": 0}
         self._force_refresh = False
+        self._search_worker: Optional[LogSearchWorker] = None
+        self._search_found = 0
+        # Все запущенные поиски, включая отмененные, но еще не завершившиеся
+        self._running_searches = set()
         
         if parent is None:
             self.setWindowFlags(Qt.FramelessWindowHint | Qt.Window)
@@ -42,9 +62,12 @@ class LogsWindow(QDialog):
         self.setStyleSheet(StyleSheet.dialog())
         self._build_ui()
         
+        # Обновление по изменению файлов логов; редкий таймер - страховка
+        # на случай пропущенного уведомления файловой системы
+        self.main_window.log_ui_manager.file_watcher.logs_changed.connect(self._on_logs_changed)
         self.update_timer = QTimer(self)
         self.update_timer.timeout.connect(self._update_logs)
-        self.update_timer.start(500)
+        self.update_timer.start(5000)
         
         # Таймер для возврата автоскролла через 30 секунд
         self.autoscroll_reset_timer = QTimer(self)
@@ -52,7 +75,7 @@ class LogsWindow(QDialog):
         self.autoscroll_reset_timer.setSingleShot(True)
         
         # Подключаем обработчик скролла
-        self.logs_text.verticalScrollBar().valueChanged.connect(self._on_scroll)
+        self.logs_view.verticalScrollBar().valueChanged.connect(self._on_scroll)
         
         # Загружаем логи при открытии
         self._update_logs()
@@ -91,26 +114,58 @@ class LogsWindow(QDialog):
         buttons_row.addStretch()
         content_layout.addLayout(buttons_row)
         
+        # Поиск: строка, регулярное выражение, минимальный уровень, период
+        search_row = QHBoxLayout()
+        search_row.setSpacing(8)
+        
+        self.search_input = LineEdit()
+        self.search_input.setPlaceholderText(tr("settings.logs_search_placeholder"))
+        self.search_input.returnPressed.connect(self._start_search)
+        search_row.addWidget(self.search_input, 1)
+        
+        self.search_regex = CheckBox(tr("settings.logs_search_regex"))
+        search_row.addWidget(self.search_regex)
+        
+        self.level_filter = ComboBox()
+        self.level_filter.addItem(tr("settings.logs_level_all"), None)
+        for level in self.LEVEL_FILTERS:
+            self.level_filter.addItem(tr("settings.logs_level_min", level=level), level)
+        search_row.addWidget(self.level_filter)
+        
+        self.time_filter = ComboBox()
+        for key, seconds in self.TIME_FILTERS:
+            self.time_filter.addItem(tr(key), seconds)
+        search_row.addWidget(self.time_filter)
+        
+        self.btn_search = Button(tr("settings.logs_search_button"), variant="secondary")
+        self.btn_search.clicked.connect(self._start_search)
+        search_row.addWidget(self.btn_search)
+        
+        self.btn_search_reset = Button(tr("settings.logs_search_reset"), variant="secondary")
+        self.btn_search_reset.clicked.connect(self._reset_search)
+        self.btn_search_reset.setVisible(False)
+        search_row.addWidget(self.btn_search_reset)
+        
+        content_layout.addLayout(search_row)
+        
+        self.search_status = Label("", variant="secondary", size="small")
+        self.search_status.setVisible(False)
+        content_layout.addWidget(self.search_status)
+        
         # Карточка с логами
         logs_card = CardWidget(self)
         logs_card_layout = QVBoxLayout(logs_card)
         logs_card_layout.setContentsMargins(16, 16, 16, 16)
         logs_card_layout.setSpacing(8)
         
-        self.logs_text = TextEdit()
-        self.logs_text.setReadOnly(True)
-        self.logs_text.setFont(QFont("Consolas", 10))
-        # Переопределяем стиль для логов (с фоном background_primary вместо background_secondary)
-        self.logs_text.setStyleSheet(f"""
-            QTextEdit {{
-                background-color: {theme.get_color('background_primary')};
-                color: {theme.get_color('text_primary')};
-                border: none;
-                border-radius: {theme.get_size('border_radius_medium')}px;
-                padding: 8px;
-            }}
-        """)
-        logs_card_layout.addWidget(self.logs_text)
+        # Рисуются только видимые строки; строк не больше, чем в буфере логов
+        self.logs_view = LogView(parent=self)
+        logs_card_layout.addWidget(self.logs_view)
+        
+        # Результаты поиска показываются вместо живого лога
+        self.results_view = LogView(capacity=self.MAX_SEARCH_RESULTS, parent=self)
+        self.results_view.setVisible(False)
+        logs_card_layout.addWidget(self.results_view)
         
         content_layout.addWidget(logs_card, 1)
         
@@ -124,11 +179,17 @@ class LogsWindow(QDialog):
             return
         
         self.current_mode = mode
+        self._reset_search()
         self._force_refresh = True
         self.btn_logs.setChecked(mode == "logs")
         self.btn_singbox_logs.setChecked(mode == "singbox")
         self._update_logs()
     
+    def _on_logs_changed(self, mode: str):
+        """Изменился файл логов"""
+        if mode == self.current_mode:
+            self._update_logs()
+    
     def _update_logs(self):
         """Обновление логов"""
         self.btn_logs.setVisible(True)
@@ -136,41 +197,35 @@ class LogsWindow(QDialog):
         self.btn_logs.setChecked(self.current_mode == "logs")
         self.btn_singbox_logs.setChecked(self.current_mode == "singbox")
         
-        if self.current_mode == "logs":
-            logs = self.main_window.log_ui_manager.get_logs()
-        elif self.current_mode == "singbox":
-            logs = self.main_window.log_ui_manager.get_singbox_logs()
-        else:
-            logs = ""
-        previous_text = self._last_text_by_mode.get(self.current_mode, "")
+        log_buffer = self.main_window.log_ui_manager.get_log_buffer(self.current_mode)
         force_refresh = getattr(self, "_force_refresh", False)
         self._force_refresh = False
+        cursor_pos = 0 if force_refresh else self._cursor_by_mode.get(self.current_mode, 0)
+        entries, new_cursor, reset = log_buffer.read_since(cursor_pos)
+        self._cursor_by_mode[self.current_mode] = new_cursor
+        if not entries and not (reset or force_refresh):
+            return
         
-        scrollbar = self.logs_text.verticalScrollBar()
+        scrollbar = self.logs_view.verticalScrollBar()
         old_position = scrollbar.value()
-        old_maximum = scrollbar.maximum()
         
         signals_blocked = False
         if not self.autoscroll_enabled:
             scrollbar.blockSignals(True)
             signals_blocked = True
         
-        if (not force_refresh) and previous_text and logs.startswith(previous_text):
-            new_part = logs[len(previous_text):]
-            if new_part:
-                cursor = self.logs_text.textCursor()
-                cursor.movePosition(cursor.End)
-                cursor.insertText(new_part)
+        if reset or force_refresh:
+            self.logs_view.log_model.set_entries(entries)
         else:
-            self.logs_text.setPlainText(logs)
-        
-        self._last_text_by_mode[self.current_mode] = logs
+            # Строки, вытесненные с начала, сдвигают позицию просмотра вверх
+            removed = self.logs_view.log_model.append_entries(entries)
+            old_position = max(0, old_position - removed)
         
         new_maximum = scrollbar.maximum()
         
         if self.autoscroll_enabled:
             # Автоскролл включен - скроллим вниз
-            scrollbar.setValue(new_maximum)
+            self.logs_view.scrollToBottom()
             self.user_has_scrolled = False
         else:
             if old_position <= new_maximum:
@@ -181,9 +236,107 @@ class LogsWindow(QDialog):
         if signals_blocked:
             scrollbar.blockSignals(False)
     
+    def _start_search(self):
+        """Запустить поиск по файлу лога текущего режима и строкам окна логов, которых нет в файле"""
+        query = self.search_input.text().strip()
+        min_level = self.level_filter.currentData()
+        seconds = self.time_filter.currentData()
+        if not query and min_level is None and seconds is None:
+            self._reset_search()
+            return
+        self._cancel_search()
+        
+        since = None
+        if seconds is not None:
+            since = (datetime.now() - timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S")
+        worker = LogSearchWorker(
+            self.main_window.log_ui_manager.get_log_file(self.current_mode),
+            query,
+            use_regex=self.search_regex.isChecked(),
+            min_level=min_level,
+            since=since,
+            max_results=self.MAX_SEARCH_RESULTS,
+            memory_entries=self.main_window.log_ui_manager.get_memory_only_entries(self.current_mode),
+            parent=self
+        )
+        # Сигналы отмененного поиска могут прийти позже - проверяем, что worker текущий
+        worker.results_found.connect(lambda entries: self._on_search_results(worker, entries))
+        worker.search_finished.connect(
+            lambda found, scanned, elapsed_ms, limited: self._on_search_finished(worker, found, scanned, elapsed_ms, limited)
+        )
+        worker.error.connect(lambda message: self._on_search_error(worker, message))
+        worker.finished.connect(lambda: self._running_searches.discard(worker))
+        worker.finished.connect(worker.deleteLater)
+        self._running_searches.add(worker)
+        self._search_worker = worker
+        self._search_found = 0
+        
+        self.results_view.log_model.set_entries([])
+        self.logs_view.setVisible(False)
+        self.results_view.setVisible(True)
+        self.btn_search_reset.setVisible(True)
+        self.search_status.setText(tr("settings.logs_search_running", found=0))
+        self.search_status.setVisible(True)
+        worker.start()
+    
+    def _on_search_results(self, worker: LogSearchWorker, entries: list):
+        """Очередная пачка найденных строк"""
+        if worker is not self._search_worker:
+            return
+        self.results_view.log_model.append_entries(entries)
+        self._search_found += len(entries)
+        self.search_status.setText(tr("settings.logs_search_running", found=self._search_found))
+    
+    def _on_search_finished(self, worker: LogSearchWorker, found: int, scanned: int, elapsed_ms: float, limited: bool):
+        """Поиск завершен"""
+        if worker is not self._search_worker:
+            return
+        self._search_worker = None
+        if limited:
+            self.search_status.setText(tr("settings.logs_search_limited", found=found))
+        else:
+            self.search_status.setText(tr(
+                "settings.logs_search_found",
+                found=found,
+                scanned=scanned,
+                seconds=f"{elapsed_ms / 1000:.1f}"
+            ))
+    
+    def _on_search_error(self, worker: LogSearchWorker, message: str):
+        """Ошибка поиска (например, неверное регулярное выражение)"""
+        if worker is not self._search_worker:
+            return
+        self._search_worker = None
+        # Первая строка сообщения без имени класса и traceback
+        error = message.split("\n", 1)[0].split(": ", 1)[-1]
+        self.search_status.setText(tr("settings.logs_search_error", error=error))
+    
+    def _cancel_search(self):
+        """Остановить текущий поиск"""
+        if self._search_worker is not None:
+            self._search_worker.cancel()
+            self._search_worker = None
+    
+    def _reset_search(self):
+        """Вернуться к живому логу"""
+        self._cancel_search()
+        self.results_view.log_model.set_entries([])
+        self.results_view.setVisible(False)
+        self.logs_view.setVisible(True)
+        self.btn_search_reset.setVisible(False)
+        self.search_status.setVisible(False)
+        if self.autoscroll_enabled:
+            self.logs_view.scrollToBottom()
+    
+    def apply_theme(self):
+        """Обновить цвета при смене темы"""
+        self.setStyleSheet(StyleSheet.dialog())
+        self.logs_view.apply_theme()
+        self.results_view.apply_theme()
+    
     def _on_scroll(self, value):
         """Обработка скролла пользователем"""
-        scrollbar = self.logs_text.verticalScrollBar()
+        scrollbar = self.logs_view.verticalScrollBar()
         max_value = scrollbar.maximum()
         
         if value < max_value - self.bottom_threshold:
@@ -203,13 +356,21 @@ class LogsWindow(QDialog):
         if self.user_has_scrolled:
             self.autoscroll_enabled = True
             self.user_has_scrolled = False
-            scrollbar = self.logs_text.verticalScrollBar()
-            scrollbar.setValue(scrollbar.maximum())
+            self.logs_view.scrollToBottom()
     
     def closeEvent(self, event):
         """Обработка закрытия окна"""
         self.update_timer.stop()
         self.autoscroll_reset_timer.stop()
+        self._cancel_search()
+        # Поток поиска проверяет отмену между блоками - дожидаемся его, пока окно живо
+        for worker in list(self._running_searches):
+            worker.cancel()
+            worker.wait(2000)
+        try:
+            self.main_window.log_ui_manager.file_watcher.logs_changed.disconnect(self._on_logs_changed)
+        except TypeError:
+            pass
         
         # Отправляем сигнал finished для очистки ссылки в settings_page
         # Используем QDialog.Rejected, так как окно закрывается пользователем
@@ -1,8 +1,9 @@
 """Страница профилей"""
 from typing import TYPE_CHECKING, Optional
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QListWidgetItem
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QListWidgetItem, QSizePolicy
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
+from utils.icon_helper import icon
 from ui.pages.base_page import BasePage
 from ui.design import CardWidget
 from ui.design.component import ListWidget, Button, Label
@@ -36,9 +37,34 @@ class ProfilePage(BasePage):
         layout.setSpacing(16)
         
         # Заголовок
+        title_row = QHBoxLayout()
+        title_row.setSpacing(8)
         self.lbl_profile_title = Label(tr("profile.title"), variant="default", size="xlarge")
         self.lbl_profile_title.setFont(QFont("Segoe UI Semibold", 20, QFont.Bold))
-        layout.addWidget(self.lbl_profile_title)
+        title_row.addWidget(self.lbl_profile_title)
+        title_row.addStretch()
+        
+        # Кнопка обновления всех подписок
+        self.btn_refresh_all = Button()
+        self.btn_refresh_all.setIcon(icon("mdi.sync", color=theme.get_color('accent')).icon())
+        self.btn_refresh_all.setToolTip(tr("profile.refresh_all"))
+        self.btn_refresh_all.setMinimumSize(24, 24)
+        self.btn_refresh_all.setMaximumSize(32, 32)
+        self.btn_refresh_all.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Minimum)
+        self.btn_refresh_all.setStyleSheet(f"""
+            QPushButton {{
+                background-color: transparent;
+                border: none;
+                border-radius: 50%;
+                padding: 4px;
+            }}
+            QPushButton:hover {{
+                background-color: {theme.get_color('accent_light')};
+            }}
+        """)
+        self.btn_refresh_all.clicked.connect(self.main_window.on_refresh_all_subs)
+        title_row.addWidget(self.btn_refresh_all)
+        layout.addLayout(title_row)
         
         # Список подписок (без обводки, внутри карточки)
         self.sub_list = ListWidget()
@@ -51,6 +77,7 @@ class ProfilePage(BasePage):
         self.btn_add_sub = Button(tr("profile.add"), variant="secondary")
         self.btn_del_sub = Button(tr("profile.delete"), variant="secondary")
         self.btn_rename_sub = Button(tr("profile.edit"), variant="secondary")
+        self.btn_test_sub = Button(tr("profile.test"), variant="secondary")
         
         # Стиль кнопок без подложек, просто с фоном и границей
         button_style = f"""
@@ -80,13 +107,14 @@ class ProfilePage(BasePage):
             }}
         """
         
-        for b in (self.btn_add_sub, self.btn_del_sub, self.btn_rename_sub):
+        for b in (self.btn_add_sub, self.btn_del_sub, self.btn_rename_sub, self.btn_test_sub):
             b.setStyleSheet(button_style)
             btn_row.addWidget(b, 1)
         
         self.btn_add_sub.clicked.connect(self.main_window.on_add_sub)
         self.btn_del_sub.clicked.connect(self.main_window.on_del_sub)
         self.btn_rename_sub.clicked.connect(self.main_window.on_edit_sub)
+        self.btn_test_sub.clicked.connect(self.main_window.on_test_sub)
         
         layout.addLayout(btn_row)
         self._layout.addWidget(card)
@@ -96,7 +124,6 @@ class ProfilePage(BasePage):
         saved_index = self.main_window.current_sub_index
         self.sub_list.clear()
         
-        from utils.icon_helper import icon
         from managers.subscriptions import SubscriptionManager
         
         profiles = self.main_window.subs.data.get("profiles", [])
@@ -138,3 +165,9 @@ class ProfilePage(BasePage):
         if hasattr(self.main_window, "ensure_valid_profile_selection"):
             self.main_window.ensure_valid_profile_selection(sync_ui=True)
 
+    
+    def set_refresh_status(self, index: int, text: str):
+        """Показать результат обновления подписки в подсказке элемента списка"""
+        item = self.sub_list.item(index)
+        if item:
+            item.setToolTip(text)
@@ -1,12 +1,66 @@
 """Генератор стилей для UI компонентов"""
-from typing import Optional
+import functools
+from typing import Optional, Dict, Tuple, Callable
 from .theme import theme
 
+# Готовые стили: (тема, компонент, аргументы) -> QSS
+_style_cache: Dict[Tuple, str] = {}
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _cached_style(func: Callable[..., str]) -> Callable[..., str]:
+    """
+    Кэширует QSS, собранный генератором стиля
+
+    Ключ - id текущей темы, имя компонента и аргументы (variant, size...),
+    поэтому после set_theme стиль другой темы не вернется даже до
+    StyleSheet.clear_cache(). Исходный генератор доступен как __wrapped__.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> str:
+        key = (theme.theme_manager.theme_name, func.__name__, args, tuple(sorted(kwargs.items())))
+        style = _style_cache.get(key)
+        if style is None:
+            _cache_stats["misses"] += 1
+            style = _style_cache[key] = func(*args, **kwargs)
+        else:
+            _cache_stats["hits"] += 1
+        return style
+    return wrapper
+
 
 class StyleSheet:
     """Класс для генерации стилей Qt"""
     
     @staticmethod
+    def clear_cache() -> None:
+        """Сбросить кэш стилей (вызывается при смене темы из theme.reload_theme())"""
+        _style_cache.clear()
+    
+    @staticmethod
+    def cache_info() -> Dict[str, int]:
+        """Размер кэша стилей и число попаданий/промахов"""
+        return {"size": len(_style_cache), **_cache_stats}
+    
+    @staticmethod
+    def apply(widget, style: str) -> bool:
+        """
+        Установить стиль виджету, если он отличается от текущего
+        
+        setStyleSheet с тем же текстом все равно заново разбирает QSS и
+        перерисовывает виджет со всеми дочерними, поэтому при смене темы
+        неизменившиеся стили (например, global_styles) не переустанавливаются.
+        
+        Returns:
+            True, если стиль был изменен
+        """
+        if widget.styleSheet() == style:
+            return False
+        widget.setStyleSheet(style)
+        return True
+    
+    @staticmethod
+    @_cached_style
     def button(
         variant: str = "default",
         size: str = "medium",
@@ -101,6 +155,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def card(radius: Optional[int] = None) -> str:
         """Генерирует стиль карточки"""
         radius = radius or theme.get_size('border_radius_large')
@@ -120,6 +175,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def label(
         variant: str = "default",
         size: str = "medium"
@@ -162,6 +218,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def input(
         variant: str = "default"
     ) -> str:
@@ -188,6 +245,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def list_widget() -> str:
         """Генерирует стиль списка"""
         return f"""
@@ -214,6 +272,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def text_edit() -> str:
         """Генерирует стиль текстового поля"""
         return f"""
@@ -233,6 +292,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def checkbox() -> str:
         """Генерирует стиль чекбокса"""
         return f"""
@@ -262,6 +322,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def combo_box() -> str:
         """Генерирует стиль комбобокса"""
         return f"""
@@ -332,6 +393,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def navigation() -> str:
         """Генерирует стиль навигации"""
         return f"""
@@ -364,6 +426,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def progress_bar() -> str:
         """Генерирует стиль прогресс-бара"""
         return f"""
@@ -384,6 +447,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def dialog() -> str:
         """Генерирует стиль диалогового окна"""
         return f"""
@@ -407,6 +471,7 @@ class StyleSheet:
         """
     
     @staticmethod
+    @_cached_style
     def dialog_button(
         variant: str = "default",
         is_primary: bool = False
@@ -466,6 +531,7 @@ class StyleSheet:
             """
     
     @staticmethod
+    @_cached_style
     def global_styles() -> str:
         """Генерирует глобальные стили приложения"""
         return f"""
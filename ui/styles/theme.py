@@ -63,8 +63,10 @@ class Theme:
         return self.transitions.get(name, '250ms')
     
     def reload_theme(self):
-        """Перезагружает тему из менеджера"""
+        """Перезагружает тему из менеджера и сбрасывает кэш стилей"""
         self.theme_manager = get_theme_manager()
+        from .stylesheet import StyleSheet
+        StyleSheet.clear_cache()
 
 
 # Глобальный экземпляр темы
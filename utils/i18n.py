@@ -1,6 +1,7 @@
 """Система локализации"""
 import json
-from typing import Dict, Any
+from string import Formatter
+from typing import Dict, Any, List, Optional, Tuple
 from config.paths import LOCALES_DIR
 
 
@@ -17,23 +18,83 @@ except ImportError:
         print(msg)
 
 
+# Шаблон с параметрами, разобранный заранее: чередование текста и имен
+# параметров ("Version {version}" -> ["Version ", "version", ""]); None - шаблон
+# со спецификаторами формата ({x:>3}, {x!r}, {0}), его форматирует str.format
+Template = Optional[List[str]]
+
+_formatter = Formatter()
+_MISSING = object()
+
+
+def _compile_template(text: str) -> Template:
+    """Разбирает строку перевода на текст и имена параметров"""
+    parts: List[str] = [""]
+    try:
+        for literal, field, spec, conversion in _formatter.parse(text):
+            # "{{" разбивает текст на несколько кусков без параметра - склеиваем их
+            parts[-1] += literal
+            if field is None:
+                continue
+            if spec or conversion or not field.isidentifier():
+                return None
+            parts.extend((field, ""))
+    except ValueError:
+        # Непарные фигурные скобки - ошибку покажет str.format при вызове
+        return None
+    return parts
+
+
+def _flatten(data: Dict[str, Any], prefix: str, table: Dict[str, Any]) -> None:
+    """Раскладывает вложенные секции в таблицу "section.key" -> значение"""
+    for key, value in data.items():
+        full_key = f"{prefix}{key}"
+        table[full_key] = value
+        if isinstance(value, dict):
+            _flatten(value, f"{full_key}.", table)
+
+
 class Translator:
-    """Класс для работы с локализацией"""
+    """
+    Класс для работы с локализацией
+    
+    Файл локали раскладывается один раз в плоскую таблицу ключей "section.key",
+    а строки с параметрами - в заранее разобранные шаблоны, поэтому tr() -
+    один поиск в словаре и склейка строки. Таблицы загруженных языков
+    кэшируются: повторное переключение на язык не читает файл заново.
+    """
     
     def __init__(self, language: str = "ru"):
         self.language = language
         self.translations: Dict[str, Any] = {}
+        self._table: Dict[str, Any] = {}
+        self._templates: Dict[str, Template] = {}
+        self._loaded: Dict[str, Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Template]]] = {}
         self.load_translations()
     
     def load_translations(self):
         """Загружает переводы из файла"""
+        cached = self._loaded.get(self.language)
+        if cached is not None:
+            self.translations, self._table, self._templates = cached
+            return
+        
         # Используем LOCALES_DIR из config.paths (теперь это data/locales)
         locale_file = LOCALES_DIR / f"{self.language}.json"
         
         if locale_file.exists():
             try:
                 with open(locale_file, 'r', encoding='utf-8') as f:
-                    self.translations = json.load(f)
+                    translations = json.load(f)
+                table: Dict[str, Any] = {}
+                _flatten(translations, "", table)
+                templates = {
+                    key: _compile_template(value)
+                    for key, value in table.items()
+                    if isinstance(value, str) and "{" in value
+                }
+                self.translations, self._table, self._templates = translations, table, templates
+                self._loaded[self.language] = (translations, table, templates)
                 log_to_file(f"Локализация загружена: {locale_file}")
             except Exception as e:
                 log_to_file(f"Ошибка загрузки локализации: {e}")
@@ -64,33 +125,65 @@ class Translator:
         Returns:
             Переведенная строка
         """
-        keys = key.split('.')
-        value = self.translations
+        value = self._table.get(key, _MISSING)
+        if value is _MISSING:
+            # Если ключ не найден, возвращаем сам ключ
+            return key
+        if not isinstance(value, str):
+            return str(value)
+        if not kwargs or key not in self._templates:
+            return value
         
+        parts = self._templates[key]
         try:
-            for k in keys:
-                value = value[k]
-            
-            if isinstance(value, str):
-                return value.format(**kwargs) if kwargs else value
-            return str(value)
+            if parts is None:
+                return value.format(**kwargs)
+            # Четные элементы - текст, нечетные - имена параметров
+            return "".join(
+                part if i % 2 == 0 else format(kwargs[part])
+                for i, part in enumerate(parts)
+            )
         except (KeyError, TypeError):
-            # Если ключ не найден, возвращаем сам ключ
+            # Не передан параметр шаблона - как и для неизвестного ключа, возвращаем ключ
             return key
     
     def get_available_languages(self) -> list:
         """Возвращает список доступных языков"""
-        languages = []
-        # Используем LOCALES_DIR из config.paths (теперь это data/locales)
-        locales_path = LOCALES_DIR
-        
-        # Ищем все json файлы в папке locales
-        if locales_path.exists():
-            for file in locales_path.glob("*.json"):
-                lang = file.stem
-                languages.append(lang)
-        
-        return sorted(languages) if languages else ["en"]  # Fallback на английский
+        languages = sorted(get_locales_metadata())
+        return languages if languages else ["en"]  # Fallback на английский
+
+
+# Метаданные локалей (поля верхнего уровня с "_", например _language_name):
+# код языка -> поля; заполняется одним просмотром LOCALES_DIR
+_locales_metadata: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+def get_locales_metadata(reload: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Метаданные всех локалей из папки locales
+    
+    Папка просматривается один раз (каждый файл читается один раз);
+    reload=True - просмотреть заново (например, после копирования локалей).
+    """
+    global _locales_metadata
+    if _locales_metadata is not None and not reload:
+        return _locales_metadata
+    
+    metadata: Dict[str, Dict[str, Any]] = {}
+    # Используем LOCALES_DIR из config.paths (теперь это data/locales)
+    if LOCALES_DIR.exists():
+        for locale_file in LOCALES_DIR.glob("*.json"):
+            fields: Dict[str, Any] = {}
+            try:
+                with open(locale_file, 'r', encoding='utf-8') as f:
+                    locale_data = json.load(f)
+                if isinstance(locale_data, dict):
+                    fields = {k: v for k, v in locale_data.items() if k.startswith("_")}
+            except Exception:
+                pass  # Язык остается в списке, название - fallback по коду
+            metadata[locale_file.stem] = fields
+    _locales_metadata = metadata
+    return metadata
 
 
 # Глобальный экземпляр переводчика
@@ -119,17 +212,10 @@ def get_available_languages() -> list:
 
 def get_language_name(lang_code: str) -> str:
     """Возвращает название языка по коду"""
-    # Пробуем прочитать название из файла локализации
-    locale_file = LOCALES_DIR / f"{lang_code}.json"
-    if locale_file.exists():
-        try:
-            with open(locale_file, 'r', encoding='utf-8') as f:
-                locale_data = json.load(f)
-                # Проверяем наличие поля _language_name в корне JSON
-                if isinstance(locale_data, dict) and "_language_name" in locale_data:
-                    return locale_data["_language_name"]
-        except Exception:
-            pass  # Если не удалось прочитать, используем fallback
+    # Поле _language_name в корне JSON локали (из кэша метаданных)
+    name = get_locales_metadata().get(lang_code, {}).get("_language_name")
+    if name:
+        return name
     
     # Fallback: возвращаем код языка в верхнем регистре
     return lang_code.upper()
@@ -2,10 +2,18 @@
 Простой хелпер для работы с иконками из встроенных шрифтов.
 Заменяет qtawesome, работает через Qt Resource System (QRC).
 """
-from typing import Optional
-from PyQt5.QtGui import QFont, QFontDatabase, QPixmap, QPainter, QIcon, QColor
+import sys
+from collections import OrderedDict
+from typing import Optional, Tuple, List
+from PyQt5.QtGui import QFont, QFontDatabase, QFontMetrics, QPixmap, QPainter, QIcon, QColor, QGuiApplication
 from PyQt5.QtCore import Qt
 
+try:
+    from utils.logger import log_to_file
+except ImportError:
+    def log_to_file(msg: str, log_file=None):
+        print(msg)
+
 # Коды символов Material Design Icons (mdi)
 # Извлечены из qtawesome charmap файла
 MDI_ICONS = {
@@ -26,6 +34,82 @@ MDI_ICONS = {
 # Имя шрифта Material Design Icons
 MDI_FONT_NAME = "Material Design Icons"
 
+# Сколько отрисованных иконок держать в кэше (LRU)
+ICON_CACHE_SIZE = 128
+
+# Иконки интерфейса и роли цветов темы, в которых они рисуются:
+# (имя, цвет, размер pixmap; 0 - QIcon размера по умолчанию)
+THEME_ICONS = (
+    ("mdi.account", "text_secondary", 36),
+    ("mdi.home", "text_secondary", 36),
+    ("mdi.cog", "text_secondary", 36),
+    ("mdi.account", "accent", 36),
+    ("mdi.home", "accent", 36),
+    ("mdi.cog", "accent", 36),
+    ("mdi.window-minimize", "text_secondary", 0),
+    ("mdi.close", "text_primary", 0),
+    ("mdi.alert-circle", "error", 0),
+    ("mdi.download", "warning", 0),
+    ("mdi.sync", "accent", 0),
+    ("mdi.file-document", "text_secondary", 0),
+)
+
+
+class _LRUCache:
+    """Кэш отрисованных иконок с вытеснением давно не использованных"""
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items: "OrderedDict[Tuple, object]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Tuple):
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return item
+    
+    def put(self, key: Tuple, item) -> None:
+        self._items[key] = item
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._items.clear()
+    
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# Ключ: (символ, цвет, ширина, высота, device pixel ratio)
+_pixmap_cache = _LRUCache(ICON_CACHE_SIZE)
+_icon_cache = _LRUCache(ICON_CACHE_SIZE)
+
+
+def _device_pixel_ratio() -> float:
+    """Масштаб экрана (1.0 без QApplication или без масштабирования)"""
+    app = QGuiApplication.instance()
+    return app.devicePixelRatio() if app is not None else 1.0
+
+
+def _decode_char(char_code: str) -> str:
+    """Символ шрифта из кода ("\\U000f0415" или уже готовый символ)"""
+    try:
+        # Если это escape-последовательность, декодируем её
+        if char_code.startswith("\\U") or char_code.startswith("\\u"):
+            # \U000f0415 -> chr(0xf0415), \u0415 -> chr(0x0415)
+            return chr(int(char_code[2:], 16))
+        if char_code.startswith("\\"):
+            return char_code.encode().decode('unicode_escape')
+    except Exception:
+        pass
+    return char_code
+
 
 class IconHelper:
     """Хелпер для работы с иконками из встроенных шрифтов"""
@@ -39,30 +123,93 @@ class IconHelper:
         if cls._font_loaded:
             return
         
-        # Пытаемся загрузить шрифт из QRC
+        # Пытаемся загрузить шрифт из QRC: при сборке через build_qrc.py там
+        # подмножество только с символами MDI_ICONS, иначе - полный шрифт
         font_paths = [
+            ":/fonts/materialdesignicons-subset.ttf",
             ":/fonts/materialdesignicons5-webfont-5.9.55.ttf",
             ":/fonts/materialdesignicons6-webfont-6.9.96.ttf",
             ":/fonts/materialdesignicons-webfont.ttf",
         ]
         
         for font_path in font_paths:
-            cls._font_id = QFontDatabase.addApplicationFont(font_path)
-            if cls._font_id != -1:
-                # Получаем имя шрифта из загруженного шрифта
-                families = QFontDatabase.applicationFontFamilies(cls._font_id)
-                if families:
-                    # Обновляем имя шрифта
-                    global MDI_FONT_NAME
-                    MDI_FONT_NAME = families[0]
+            if cls._add_font(font_path):
                 break
         
+        # В режиме разработки resources_rc может отсутствовать или быть собран
+        # до добавления новой иконки - тогда берем полный шрифт из resources/fonts
+        if not getattr(sys, "frozen", False) and (cls._font_id == -1 or cls._missing_glyphs()):
+            from config.paths import SOURCE_RESOURCES_DIR
+            full_font = SOURCE_RESOURCES_DIR / "fonts" / "materialdesignicons5-webfont-5.9.55.ttf"
+            if full_font.exists() and cls._font_id != -1:
+                # У подмножества то же имя семейства - убираем его, чтобы Qt не выбрал неполный шрифт
+                QFontDatabase.removeApplicationFont(cls._font_id)
+                cls._font_id = -1
+            if full_font.exists() and cls._add_font(str(full_font)):
+                log_to_file(f"[Icons] Шрифт иконок загружен из {full_font}")
+        
         cls._font_loaded = True
         
         if cls._font_id == -1:
             # Если шрифт не загружен, это не критично - просто не будет иконок
             pass
     
+    @classmethod
+    def _add_font(cls, font_path: str) -> bool:
+        """Регистрирует шрифт и запоминает имя его семейства"""
+        font_id = QFontDatabase.addApplicationFont(font_path)
+        if font_id == -1:
+            return False
+        cls._font_id = font_id
+        # Получаем имя шрифта из загруженного шрифта
+        families = QFontDatabase.applicationFontFamilies(font_id)
+        if families:
+            # Обновляем имя шрифта
+            global MDI_FONT_NAME
+            MDI_FONT_NAME = families[0]
+        return True
+    
+    @staticmethod
+    def _missing_glyphs() -> List[str]:
+        """Иконки MDI_ICONS, символов которых нет в загруженном шрифте"""
+        metrics = QFontMetrics(QFont(MDI_FONT_NAME))
+        return [
+            name for name, char in MDI_ICONS.items()
+            if len(char) == 1 and not metrics.inFontUcs4(ord(char))
+        ]
+    
+    @classmethod
+    def warm_up(cls) -> int:
+        """
+        Отрисовать заранее иконки интерфейса в цветах текущей темы
+        
+        Вызывается после установки темы: иконки, чей цвет не изменился,
+        уже есть в кэше, перерисовываются только иконки с новыми цветами.
+        
+        Returns:
+            Сколько иконок было отрисовано заново
+        """
+        from utils.theme_manager import get_color
+        misses_before = _pixmap_cache.misses
+        for icon_name, color_name, size in THEME_ICONS:
+            icon_obj = cls.icon(icon_name, get_color(color_name))
+            if size:
+                icon_obj.pixmap(size, size)
+            else:
+                icon_obj.icon()
+        rendered = _pixmap_cache.misses - misses_before
+        log_to_file(
+            f"[Icons] Иконки темы подготовлены: отрисовано {rendered} из {len(THEME_ICONS)}, "
+            f"в кэше {len(_pixmap_cache)} pixmap / {len(_icon_cache)} QIcon"
+        )
+        return rendered
+    
+    @staticmethod
+    def clear_cache() -> None:
+        """Очистить кэш отрисованных иконок"""
+        _pixmap_cache.clear()
+        _icon_cache.clear()
+    
     @classmethod
     def icon(cls, icon_name: str, color: Optional[str] = None, size: int = 16) -> 'IconObject':
         """
@@ -97,7 +244,7 @@ class IconObject:
     
     def pixmap(self, width: Optional[int] = None, height: Optional[int] = None) -> QPixmap:
         """
-        Создает QPixmap с иконкой
+        Возвращает QPixmap с иконкой (из кэша, если такая уже отрисована)
         
         Args:
             width: Ширина (если не указана, используется self.size)
@@ -106,19 +253,24 @@ class IconObject:
         Returns:
             QPixmap с иконкой
         """
-        if not self.char_code:
-            # Возвращаем пустой pixmap
-            w = width or self.size
-            h = height or self.size
-            pixmap = QPixmap(w, h)
-            pixmap.fill(Qt.transparent)
-            return pixmap
-        
         w = width or self.size
         h = height or self.size
-        
-        pixmap = QPixmap(w, h)
+        dpr = _device_pixel_ratio()
+        key = (self.char_code, self.color, w, h, dpr)
+        pixmap = _pixmap_cache.get(key)
+        if pixmap is None:
+            pixmap = self._render(w, h, dpr)
+            _pixmap_cache.put(key, pixmap)
+        return pixmap
+    
+    def _render(self, w: int, h: int, dpr: float) -> QPixmap:
+        """Рисует символ в новый QPixmap (в физических пикселях экрана)"""
+        pixmap = QPixmap(round(w * dpr), round(h * dpr))
+        pixmap.setDevicePixelRatio(dpr)
         pixmap.fill(Qt.transparent)
+        if not self.char_code:
+            # Пустой pixmap
+            return pixmap
         
         painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.Antialiasing)
@@ -133,47 +285,27 @@ class IconObject:
         font.setPixelSize(font_size)
         
         painter.setFont(font)
+        painter.setPen(self._parse_color(self.color))
         
-        # Парсим цвет
-        color = self._parse_color(self.color)
-        painter.setPen(color)
-        
-        # Декодируем Unicode код символа
-        try:
-            # Если это escape-последовательность, декодируем её
-            if self.char_code.startswith("\\"):
-                # Для \U нужно использовать правильное декодирование
-                if self.char_code.startswith("\\U"):
-                    # \U000f0415 -> chr(0xf0415)
-                    hex_code = self.char_code[2:]
-                    unicode_code = int(hex_code, 16)
-                    char = chr(unicode_code)
-                elif self.char_code.startswith("\\u"):
-                    # \u0415 -> chr(0x0415)
-                    hex_code = self.char_code[2:]
-                    unicode_code = int(hex_code, 16)
-                    char = chr(unicode_code)
-                else:
-                    char = self.char_code.encode().decode('unicode_escape')
-            else:
-                char = self.char_code
-        except Exception:
-            char = self.char_code
-        
-        # Рисуем символ по центру
-        painter.drawText(pixmap.rect(), Qt.AlignCenter, char)
+        # Рисуем символ по центру (rect в логических пикселях)
+        painter.drawText(0, 0, w, h, Qt.AlignCenter, _decode_char(self.char_code))
         painter.end()
         
         return pixmap
     
     def icon(self) -> QIcon:
         """
-        Создает QIcon с иконкой
+        Возвращает QIcon с иконкой (из кэша, если такая уже создана)
         
         Returns:
             QIcon с иконкой
         """
-        return QIcon(self.pixmap())
+        key = (self.char_code, self.color, self.size, self.size, _device_pixel_ratio())
+        qicon = _icon_cache.get(key)
+        if qicon is None:
+            qicon = QIcon(self.pixmap())
+            _icon_cache.put(key, qicon)
+        return qicon
     
     @staticmethod
     def _parse_color(color_str: str) -> QColor:
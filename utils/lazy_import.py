@@ -0,0 +1,61 @@
+"""Отложенный импорт тяжелых модулей (сеть, архивы, диалоги) до первого использования"""
+import sys
+import threading
+from types import ModuleType
+
+
+class LazyModule:
+    """
+    Заместитель модуля, который импортирует его при первом обращении к атрибуту
+
+    requests = lazy_import("requests") не загружает requests (а с ним urllib3,
+    ssl, idna, charset_normalizer) при импорте модуля приложения - только при
+    первом requests.get(...). Аннотации типов с атрибутами такого модуля нужно
+    писать строкой ("requests.Session"), иначе они загрузят модуль сразу.
+    """
+
+    __slots__ = ("_name", "_module", "_lock")
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Полное имя модуля ("requests", "ui.design.component.dialog")
+        """
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    # Через __import__, чтобы импорт попал в трассу запуска (--trace-startup)
+                    __import__(self._name)
+                    self._module = sys.modules[self._name]
+                module = self._module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        """Загружен ли модуль"""
+        return self._module is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "загружен" if self._module is not None else "не загружен"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Модуль, который импортируется при первом обращении к атрибуту
+
+    Если модуль уже импортирован, заместитель сразу указывает на него.
+    """
+    proxy = LazyModule(name)
+    if name in sys.modules:
+        proxy._module = sys.modules[name]
+    return proxy
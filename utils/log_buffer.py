@@ -0,0 +1,323 @@
+"""Кольцевой буфер строк лога для окна логов с пакетной нормализацией"""
+import re
+import threading
+from pathlib import Path
+from typing import List, Tuple, Iterable, Union
+
+# Удаляем ANSI-цвета, чтобы логи SingBox отображались без управляющих последовательностей
+_ANSI_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+# [YYYY-MM-DD HH:MM:SS] [LEVEL] текст - формат log_to_file (INFO без уровня)
+_APP_LINE_RE = re.compile(
+    r'\[\d{4}-\d{2}-\d{2} (\d{2}:\d{2}:\d{2})\]\s*(?:\[(DEBUG|WARN|ERROR)\]\s*)?'
+)
+# +0300 2025-12-28 19:31:02 LEVEL текст - формат SingBox (время можно отключить в конфиге)
+_SINGBOX_LINE_RE = re.compile(
+    r'(?:[+-]\d{4}\s+\d{4}-\d{2}-\d{2}\s+(\d{2}:\d{2}:\d{2})\s+)?'
+    r'(?:(TRACE|DEBUG|INFO|WARN|ERROR|FATAL|PANIC)\b\s*)?'
+)
+# [HH:MM:SS] текст - уже нормализованный формат
+_SHORT_TS_RE = re.compile(r'\[(\d{2}:\d{2}:\d{2})\]\s*')
+
+DEFAULT_CAPACITY = 50000  # строк
+# Сколько последних строк истории сверять с уже полученными строками (LogRingBuffer.load_history)
+HISTORY_OVERLAP_LIMIT = 200
+
+# Нормализованная строка: (время HH:MM:SS или "", уровень или "", текст)
+LogEntry = Tuple[str, str, str]
+
+
+def normalize_log_line(line: str) -> LogEntry:
+    """
+    Разбор строки лога в (время, уровень, текст) за один проход
+
+    Поддерживает:
+    - Формат приложения: [YYYY-MM-DD HH:MM:SS] [LEVEL] ...
+    - Формат SingBox: +0300 2025-12-28 19:31:02 ERROR ... (с ANSI-цветами или без)
+    - Уже нормализованный формат [HH:MM:SS] ...
+    """
+    if "\x1b" in line:
+        line = _ANSI_RE.sub("", line)
+    line = line.strip()
+    if line.startswith("["):
+        match = _APP_LINE_RE.match(line) or _SHORT_TS_RE.match(line)
+        if match is None:
+            return "", "", line
+        level = match.group(2) if match.lastindex == 2 else None
+        return match.group(1), level or "", line[match.end():]
+    match = _SINGBOX_LINE_RE.match(line)
+    if not match.end():
+        return "", "", line
+    return match.group(1) or "", match.group(2) or "", line[match.end():]
+
+
+def normalize_log_lines(lines: Iterable[str]) -> List[LogEntry]:
+    """Пакетная нормализация строк (см. normalize_log_line)"""
+    return [normalize_log_line(line) for line in lines]
+
+
+def render_log_entry(entry: LogEntry) -> str:
+    """Компактная строка для показа: [HH:MM:SS] LEVEL текст"""
+    ts, level, text = entry
+    if ts:
+        return f"[{ts}] {level} {text}" if level else f"[{ts}] {text}"
+    return f"{level} {text}" if level else text
+
+
+def format_log_line(line: str) -> str:
+    """Приводит строку лога к компактному виду без ANSI-кодов и с временем в формате [HH:MM:SS]"""
+    if not line:
+        return ""
+    return render_log_entry(normalize_log_line(line))
+
+
+class LogRingBuffer:
+    """
+    Ограниченный буфер последних строк лога
+
+    Каждая строка получает порядковый номер. Читатель хранит курсор (номер
+    следующей непрочитанной строки) и получает только новые строки, поэтому
+    обновление окна логов не зависит от размера лога. Если читатель отстал
+    больше чем на capacity строк или буфер был очищен, read_since() сообщает
+    о сбросе, и читатель перерисовывает текст целиком.
+
+    Писатели кладут сырые строки; нормализация (normalize_log_line) выполняется
+    пакетом при первом чтении, результат сохраняется в том же слоте, поэтому
+    каждая строка разбирается не больше одного раза, а строки, вытесненные
+    до чтения (например, при trace-логах и закрытом окне), не разбираются вовсе.
+
+    Запись потокобезопасна: строки приходят из потоков чтения логов и log_to_file.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        Args:
+            capacity: Максимум хранимых строк
+        """
+        self.capacity = capacity
+        # Кольцо слотов: строка с номером seq лежит в слоте seq % capacity
+        self._slots: List[Union[str, LogEntry, None]] = [None] * capacity
+        self._first_seq = 0  # номер самой старой строки в буфере
+        self._next_seq = 0  # номер следующей добавляемой строки
+        self._lock = threading.Lock()
+
+    def append(self, line: str) -> None:
+        """Добавить сырую строку лога (пустые строки пропускаются)"""
+        if not line:
+            return
+        with self._lock:
+            self._append_locked(line)
+
+    def extend(self, lines: Iterable[str]) -> None:
+        """Добавить несколько сырых строк"""
+        with self._lock:
+            for line in lines:
+                if line:
+                    self._append_locked(line)
+
+    def _append_locked(self, line: str) -> None:
+        self._slots[self._next_seq % self.capacity] = line
+        self._next_seq += 1
+        if self._next_seq - self._first_seq > self.capacity:
+            self._first_seq = self._next_seq - self.capacity
+
+    def replace(self, lines: Iterable[str]) -> None:
+        """Заменить содержимое буфера (для начальной загрузки из файла)"""
+        with self._lock:
+            # Пропускаем номер, чтобы открытые курсоры увидели сброс
+            self._next_seq += 1
+            self._first_seq = self._next_seq
+            for line in lines:
+                if line:
+                    self._append_locked(line)
+
+    def load_history(self, lines: List[str], since: int) -> int:
+        """
+        Подставить историю из файла перед строками, добавленными после курсора
+
+        История читается в фоне, а писатели тем временем продолжают дописывать
+        буфер. Строки, попавшие и в файл, и в буфер после since, остаются
+        в одном экземпляре. Открытые курсоры получают сброс.
+
+        Args:
+            lines: Хвост лога с диска в хронологическом порядке
+            since: Курсор буфера на момент начала чтения истории
+
+        Returns:
+            Номер первой строки после истории (строки, полученные от писателей)
+        """
+        with self._lock:
+            start = min(max(since, self._first_seq), self._next_seq)
+            recent = [self._slots[seq % self.capacity] for seq in range(start, self._next_seq)]
+            overlap = self._history_overlap(lines, recent)
+            self._next_seq += 1
+            self._first_seq = self._next_seq
+            for line in lines[:len(lines) - overlap]:
+                if line:
+                    self._append_locked(line)
+            live_since = self._next_seq
+            for item in recent:
+                self._append_locked(item)
+            return live_since
+
+    @staticmethod
+    def _history_overlap(lines: List[str], recent: List[Union[str, LogEntry]]) -> int:
+        """Длина самого длинного конца истории, совпадающего с началом новых строк"""
+        history = [normalize_log_line(line) for line in lines[-HISTORY_OVERLAP_LIMIT:] if line]
+        head = [
+            normalize_log_line(item) if isinstance(item, str) else item
+            for item in recent[:len(history)]
+        ]
+        for size in range(min(len(history), len(head)), 0, -1):
+            if history[-size:] == head[:size]:
+                return size
+        return 0
+
+    def clear(self) -> None:
+        """Очистить буфер (читатели получат сброс)"""
+        self.replace(())
+
+    @property
+    def cursor(self) -> int:
+        """Курсор на конец буфера (номер следующей строки)"""
+        with self._lock:
+            return self._next_seq
+
+    def read_since(self, cursor: int) -> Tuple[List[LogEntry], int, bool]:
+        """
+        Нормализованные строки, добавленные после курсора
+
+        Args:
+            cursor: Курсор из предыдущего вызова (0 - с начала)
+            
+        Returns:
+            (строки, новый курсор, сброс). При сброс=True строки содержат весь
+            буфер, и их нужно показать вместо текущего текста, а не дописать.
+        """
+        with self._lock:
+            reset = cursor < self._first_seq or cursor > self._next_seq
+            start = self._first_seq if reset else cursor
+            return self._entries_locked(start, self._next_seq), self._next_seq, reset
+
+    def _entries_locked(self, start: int, end: int) -> List[LogEntry]:
+        """Строки с номерами [start, end): сырые нормализуются пакетом и кэшируются в слотах"""
+        capacity = self.capacity
+        slots = self._slots
+        raw_seqs = [seq for seq in range(start, end) if isinstance(slots[seq % capacity], str)]
+        if raw_seqs:
+            entries = normalize_log_lines(slots[seq % capacity] for seq in raw_seqs)
+            for seq, entry in zip(raw_seqs, entries):
+                slots[seq % capacity] = entry
+        return [slots[seq % capacity] for seq in range(start, end)]
+
+
+class LogFileTail:
+    """
+    Инкрементальное чтение файла лога по смещению
+
+    Хранит смещение (байты), размер и идентификатор файла (st_dev, st_ino).
+    read_new() читает только дописанные байты; если файл усечен (очистка логов),
+    заменен (ротация) или удален, сообщает о сбросе и читает новый файл заново.
+    Первое чтение ограничено последними initial_bytes, чтобы открытие большого
+    лога не требовало чтения всего файла.
+    """
+
+    INITIAL_BYTES = 2 * 1024 * 1024
+
+    def __init__(self, log_file: Path, initial_bytes: int = INITIAL_BYTES):
+        """
+        Args:
+            log_file: Путь к файлу лога
+            initial_bytes: Сколько байт с конца читать при первом чтении и после сброса
+        """
+        self.log_file = log_file
+        self.initial_bytes = initial_bytes
+        self.offset = 0
+        self._file_id = None
+        self._partial = b""  # незавершенная последняя строка
+
+    def _stat(self):
+        try:
+            return self.log_file.stat()
+        except OSError:
+            return None
+
+    def check(self) -> str:
+        """
+        Проверить файл без чтения
+
+        Returns:
+            "unchanged" - без изменений, "appended" - дописаны байты,
+            "rotated" - на месте файла другой файл (ротация) или файл появился,
+            "truncated" - тот же файл стал короче смещения (очистка лога),
+            "missing" - файл удален
+        """
+        st = self._stat()
+        if st is None:
+            return "missing" if self._file_id is not None else "unchanged"
+        if (st.st_dev, st.st_ino) != self._file_id:
+            return "rotated"
+        if st.st_size < self.offset:
+            return "truncated"
+        return "appended" if st.st_size > self.offset else "unchanged"
+
+    def skip_to_end(self) -> None:
+        """Сдвинуть смещение в конец файла без чтения (строки уже получены другим путем)"""
+        st = self._stat()
+        if st is None or self._file_id != (st.st_dev, st.st_ino) or st.st_size < self.offset:
+            return
+        self.offset = st.st_size
+        self._partial = b""
+
+    def reanchor(self) -> None:
+        """Привязаться к текущему файлу с его конца без чтения (после ротации или удаления)"""
+        st = self._stat()
+        if st is None:
+            self._file_id, self.offset = None, 0
+        else:
+            self._file_id, self.offset = (st.st_dev, st.st_ino), st.st_size
+        self._partial = b""
+
+    def read_new(self) -> Tuple[List[str], bool]:
+        """
+        Прочитать строки, дописанные с прошлого чтения
+
+        Returns:
+            (новые завершенные строки, сброс). При сбросе строки - хвост нового файла.
+        """
+        st = self._stat()
+        if st is None:
+            reset = self._file_id is not None
+            self._file_id, self.offset, self._partial = None, 0, b""
+            return [], reset
+
+        file_id = (st.st_dev, st.st_ino)
+        reset = self._file_id is not None and (file_id != self._file_id or st.st_size < self.offset)
+        skip_first = False
+        if self._file_id is None or reset:
+            self._file_id = file_id
+            self.offset = max(0, st.st_size - self.initial_bytes)
+            self._partial = b""
+            # Начали с середины файла - первая строка неполная
+            skip_first = self.offset > 0
+
+        if st.st_size <= self.offset:
+            return [], reset
+        try:
+            with self.log_file.open("rb") as f:
+                f.seek(self.offset)
+                data = f.read(st.st_size - self.offset)
+        except OSError:
+            return [], reset
+        self.offset += len(data)
+
+        chunks = (self._partial + data).split(b"\n")
+        self._partial = chunks.pop()
+        if skip_first and chunks:
+            chunks.pop(0)
+        lines = [chunk.decode("utf-8", errors="replace").rstrip("\r") for chunk in chunks]
+        return lines, reset
+
+
+# Общие буферы: пишут log_to_file и SingBoxLogReaderThread, читает окно логов
+APP_LOG_BUFFER = LogRingBuffer()
+SINGBOX_LOG_BUFFER = LogRingBuffer()
@@ -0,0 +1,323 @@
+"""Инкрементальный индекс файлов логов и поиск по нему"""
+import gzip
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple, Iterator, Pattern
+from utils.log_buffer import LogEntry, render_log_entry
+from utils.log_levels import SINGBOX_LEVELS, SINGBOX_LEVEL_VALUES, parse_singbox_level
+from utils.log_rotation import LogRotator, LOG_ROTATOR
+
+# Строк в одном блоке индекса
+BLOCK_LINES = 512
+# Время и уровень всегда в начале строки (с запасом на ANSI-цвета)
+_META_PREFIX_BYTES = 64
+# Маска блока: бит 1 << уровень для каждого уровня, встречающегося в блоке
+ALL_LEVELS_MASK = (1 << len(SINGBOX_LEVELS)) - 1
+
+_INFO = SINGBOX_LEVEL_VALUES["INFO"]
+# Уровни log_to_file: "[YYYY-MM-DD HH:MM:SS] [WARN] ..." (INFO без метки)
+_APP_LEVEL_TAGS = (
+    ("[DEBUG]", SINGBOX_LEVEL_VALUES["DEBUG"]),
+    ("[WARN]", SINGBOX_LEVEL_VALUES["WARN"]),
+    ("[ERROR]", SINGBOX_LEVEL_VALUES["ERROR"]),
+)
+
+
+def parse_line_meta(line: str) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Время и уровень строки лога приложения или sing-box
+
+    Returns:
+        (ключ времени "YYYY-MM-DD HH:MM:SS" или None, уровень или None)
+    """
+    # [YYYY-MM-DD HH:MM:SS] [LEVEL] ... - формат log_to_file
+    if line[:1] == "[" and line[20:21] == "]":
+        for tag, level in _APP_LEVEL_TAGS:
+            if line.startswith(tag, 22):
+                return line[1:20], level
+        return line[1:20], _INFO
+    # +0300 YYYY-MM-DD HH:MM:SS LEVEL ... - формат sing-box
+    key = line[6:25] if line[:1] in "+-" and line[25:26] == " " else None
+    return key, parse_singbox_level(line)
+
+
+def levels_mask(min_level: Optional[str]) -> int:
+    """Маска уровней не ниже min_level (None - все уровни)"""
+    if not min_level:
+        return ALL_LEVELS_MASK
+    minimum = SINGBOX_LEVEL_VALUES.get(min_level.upper(), 0)
+    return sum(1 << value for value in range(minimum, len(SINGBOX_LEVELS)))
+
+
+class _Block:
+    """Блок индекса: до BLOCK_LINES строк файла"""
+    __slots__ = ("start", "end", "lines", "first_key", "last_key", "mask", "last_level")
+
+    def __init__(self, start: int):
+        self.start = start  # смещение первой строки
+        self.end = start  # смещение после последней строки
+        self.lines = 0
+        self.first_key: Optional[str] = None
+        self.last_key: Optional[str] = None
+        self.mask = 0  # биты уровней, встречающихся в блоке
+        self.last_level = _INFO  # уровень последней строки (для строк-продолжений следующего блока)
+
+
+class FileIndex:
+    """
+    Таблица блоков одного файла лога
+
+    Для каждого блока хранятся смещения, время первой и последней строки
+    и битовая маска уровней. Поиск пропускает блоки, в которых нет нужных
+    уровней или которые целиком вне диапазона времени, не читая их.
+
+    Активный файл доиндексируется с конца последнего полного блока;
+    при усечении или замене файла индекс строится заново. Закрытые
+    сегменты не меняются и индексируются один раз.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Путь к файлу лога (.gz - сжатый сегмент)
+        """
+        self.path = path
+        self.blocks: List[_Block] = []
+        self._file_id = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        return gzip.open(self.path, "rb") if self.path.suffix == ".gz" else self.path.open("rb")
+
+    def update(self, should_stop=None) -> bool:
+        """
+        Доиндексировать новые строки
+
+        Returns:
+            False если индексирование прервано should_stop()
+        """
+        with self._lock:
+            return self._update_locked(should_stop)
+
+    def _update_locked(self, should_stop) -> bool:
+        try:
+            st = self.path.stat()
+        except OSError:
+            self.blocks, self._file_id, self._size = [], None, 0
+            return True
+        file_id = (st.st_dev, st.st_ino)
+        if file_id != self._file_id or st.st_size < self._size:
+            self.blocks, self._file_id = [], file_id
+        elif st.st_size == self._size:
+            return True
+        # Последний блок мог быть неполным - перестраиваем его
+        if self.blocks and self.blocks[-1].lines < BLOCK_LINES:
+            self.blocks.pop()
+        start = self.blocks[-1].end if self.blocks else 0
+        last_level = self.blocks[-1].last_level if self.blocks else _INFO
+
+        with self._open() as f:
+            f.seek(start)
+            block = _Block(start)
+            offset = start
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # строка еще не дописана
+                offset += len(raw)
+                key, level = parse_line_meta(raw[:_META_PREFIX_BYTES].decode("utf-8", errors="replace"))
+                if level is None:
+                    level = last_level
+                last_level = level
+                if key is not None:
+                    if block.first_key is None:
+                        block.first_key = key
+                    block.last_key = key
+                block.mask |= 1 << level
+                block.lines += 1
+                block.end = offset
+                block.last_level = level
+                if block.lines >= BLOCK_LINES:
+                    self.blocks.append(block)
+                    block = _Block(offset)
+                    if should_stop is not None and should_stop():
+                        return False
+            if block.lines:
+                self.blocks.append(block)
+        self._size = st.st_size
+        return True
+
+    def iter_lines(
+        self,
+        mask: int,
+        since: Optional[str],
+        until: Optional[str],
+        pattern: Optional[Pattern],
+        stats: "LogSearch",
+        should_stop=None
+    ) -> Iterator[Tuple[str, int, Optional[str]]]:
+        """
+        Строки блоков, подходящих по уровням и времени
+
+        Если задан шаблон, сначала проверяется весь текст блока: блок без
+        совпадений пропускается без разбора строк.
+
+        Yields:
+            (строка, уровень, ключ времени или None)
+        """
+        with self._lock:
+            blocks = list(self.blocks)
+        with self._open() as f:
+            for i, block in enumerate(blocks):
+                if should_stop is not None and should_stop():
+                    return
+                if not block.mask & mask or (
+                    since is not None and block.last_key is not None and block.last_key < since
+                ):
+                    stats.skipped_blocks += 1
+                    continue
+                if until is not None and block.first_key is not None and block.first_key > until:
+                    return
+                f.seek(block.start)
+                text = f.read(block.end - block.start).decode("utf-8", errors="replace")
+                stats.scanned_lines += block.lines
+                if pattern is not None and not pattern.search(text):
+                    continue
+                # Строки-продолжения в начале блока получают уровень из предыдущего блока
+                last_level = blocks[i - 1].last_level if i else _INFO
+                for line in text.split("\n"):
+                    if not line:
+                        continue
+                    line = line.rstrip("\r")
+                    key, level = parse_line_meta(line)
+                    if level is None:
+                        level = last_level
+                    last_level = level
+                    yield line, level, key
+
+
+class LogIndex:
+    """Индексы файлов логов (активный файл и его сегменты), общие для всех поисков"""
+
+    def __init__(self, rotator: Optional[LogRotator] = None):
+        """
+        Args:
+            rotator: Политика ротации (для списка закрытых сегментов)
+        """
+        self.rotator = rotator or LOG_ROTATOR
+        self._files: Dict[Path, FileIndex] = {}
+        self._lock = threading.Lock()
+
+    def files_for(self, log_file: Path) -> List[FileIndex]:
+        """Индексы сегментов (от старых к новым) и активного файла"""
+        paths = self.rotator.segments(log_file) + [log_file]
+        with self._lock:
+            # Сегменты, которые удалены или сжаты, больше не нужны
+            for path in list(self._files):
+                if path.name.startswith(log_file.name) and path not in paths:
+                    del self._files[path]
+            return [self._files.setdefault(path, FileIndex(path)) for path in paths]
+
+
+# Общий индекс для окна логов
+LOG_INDEX = LogIndex()
+
+
+def compile_query(query: str, use_regex: bool) -> Pattern:
+    """
+    Шаблон поиска без учета регистра (re.error для неверного регулярного выражения)
+
+    MULTILINE: ^ и $ относятся к строке лога и при проверке целого блока.
+    """
+    return re.compile(query if use_regex else re.escape(query), re.IGNORECASE | re.MULTILINE)
+
+
+class LogSearch:
+    """
+    Поиск по файлу лога и его закрытым сегментам
+
+    Перед поиском индекс доиндексирует новые строки; затем читаются только
+    блоки, подходящие по уровню и времени, и строки проверяются шаблоном.
+    """
+
+    def __init__(
+        self,
+        log_file: Path,
+        pattern: Optional[Pattern] = None,
+        min_level: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        index: Optional[LogIndex] = None
+    ):
+        """
+        Args:
+            log_file: Активный файл лога
+            pattern: Шаблон (см. compile_query); None - любые строки
+            min_level: Минимальный уровень ("DEBUG", "INFO", "WARN", "ERROR"); None - все
+            since: Начало диапазона "YYYY-MM-DD HH:MM:SS" (включительно)
+            until: Конец диапазона "YYYY-MM-DD HH:MM:SS" (включительно)
+            index: Индекс (по умолчанию общий LOG_INDEX)
+        """
+        self.log_file = log_file
+        self.pattern = pattern
+        self.mask = levels_mask(min_level)
+        self.since = since
+        self.until = until
+        self.index = index or LOG_INDEX
+        self.scanned_lines = 0
+        self.skipped_blocks = 0
+
+    def run(self, should_stop=None) -> Iterator[str]:
+        """Найденные строки в хронологическом порядке"""
+        search = self.pattern.search if self.pattern is not None else None
+        mask, since, until = self.mask, self.since, self.until
+        for file_index in self.index.files_for(self.log_file):
+            if not file_index.update(should_stop):
+                return
+            for line, level, key in file_index.iter_lines(mask, since, until, self.pattern, self, should_stop):
+                if not mask & (1 << level):
+                    continue
+                if key is not None and ((since is not None and key < since) or (until is not None and key > until)):
+                    continue
+                if search is None or search(line):
+                    yield line
+
+
+def search_log_entries(
+    entries: List[LogEntry],
+    pattern: Optional[Pattern] = None,
+    min_level: Optional[str] = None,
+    since: Optional[str] = None,
+    date: Optional[str] = None
+) -> List[Tuple[Optional[str], LogEntry]]:
+    """
+    Поиск по нормализованным строкам буфера окна логов (строкам, которых нет в файле)
+
+    В строках буфера есть только время HH:MM:SS, поэтому ключ времени
+    собирается с датой date (по умолчанию сегодняшней). Строки без времени
+    и уровня получают их от предыдущей строки, как продолжения сообщений.
+
+    Returns:
+        [(ключ времени "YYYY-MM-DD HH:MM:SS" или None, строка)] в исходном порядке
+    """
+    search = pattern.search if pattern is not None else None
+    mask = levels_mask(min_level)
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    found = []
+    key = None
+    level = None
+    for entry in entries:
+        ts, name, _ = entry
+        if ts:
+            key = f"{date} {ts}"
+        if name:
+            level = SINGBOX_LEVEL_VALUES.get(name)
+        if level is not None and not mask & (1 << level):
+            continue
+        if key is not None and since is not None and key < since:
+            continue
+        if search is None or search(render_log_entry(entry)):
+            found.append((key, entry))
+    return found
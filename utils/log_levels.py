@@ -0,0 +1,108 @@
+"""Уровни логов sing-box: разбор при приеме строки и фильтрация для диска и окна логов"""
+import re
+from typing import Dict, Optional, Tuple
+
+# Уровни sing-box по возрастанию важности (PANIC считается как FATAL)
+SINGBOX_LEVELS = ("TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL")
+SINGBOX_LEVEL_VALUES = {name: value for value, name in enumerate(SINGBOX_LEVELS)}
+SINGBOX_LEVEL_VALUES["PANIC"] = SINGBOX_LEVEL_VALUES["FATAL"]
+
+# Первые 4 символа токена уровня однозначно определяют токен; сам токен проверяется целиком
+_LEVEL_PREFIXES = {name[:4]: (name, value) for name, value in SINGBOX_LEVEL_VALUES.items()}
+# Символы сразу после токена уровня: "ERROR [...]", "INFO[0000]"
+_LEVEL_TERMINATORS = (" ", "[")
+# Длина префикса времени "+0300 2025-12-28 19:31:02 "
+_TS_PREFIX_LEN = 26
+
+# Токен уровня в начале строки:
+# "+0300 2025-12-28 19:31:02 ERROR [...] ...", "INFO[0000] ..." (без времени), с ANSI-цветами или без
+_LEVEL_RE = re.compile(
+    r"^(?:\x1B\[[0-9;]*m)*"
+    r"(?:[+-]\d{4}\s+\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\s+)?"
+    r"(?:\x1B\[[0-9;]*m)*"
+    r"(TRACE|DEBUG|INFO|WARN|ERROR|FATAL|PANIC)"
+    r"(?=[ \[\x1B])"
+)
+
+
+def parse_singbox_level(line: str) -> Optional[int]:
+    """
+    Уровень строки лога sing-box
+
+    Returns:
+        Значение из SINGBOX_LEVEL_VALUES или None, если токена уровня нет
+        (например, продолжение многострочного сообщения)
+    """
+    # Быстрый путь без regex: токен на фиксированной позиции (с временем или без)
+    start = _TS_PREFIX_LEN if line[:1] in "+-" and line[_TS_PREFIX_LEN - 1:_TS_PREFIX_LEN] == " " else 0
+    token = _LEVEL_PREFIXES.get(line[start:start + 4])
+    if token is not None:
+        name, level = token
+        end = start + len(name)
+        if line.startswith(name, start) and line[end:end + 1] in _LEVEL_TERMINATORS:
+            return level
+    # Цветной вывод и строки, где токен не подтвердился ("DEBUGGING ...")
+    match = _LEVEL_RE.match(line)
+    if match is None:
+        return None
+    return SINGBOX_LEVEL_VALUES[match.group(1)]
+
+
+def level_value(name: Optional[str], default: str = "TRACE") -> int:
+    """Значение уровня по имени из настроек ("trace", "info", ...); неизвестное имя - default"""
+    value = SINGBOX_LEVEL_VALUES.get((name or "").upper())
+    return value if value is not None else SINGBOX_LEVEL_VALUES[default]
+
+
+class SingBoxLevelFilter:
+    """
+    Фильтр строк sing-box по уровню, отдельно для файла лога и окна логов
+
+    Уровень разбирается один раз при приеме строки. Строки без токена уровня
+    получают уровень предыдущей строки, чтобы продолжения многострочных
+    сообщений (стек паники и т.п.) не отрывались от первой строки.
+    Отброшенные строки считаются по уровням (dropped_disk / dropped_ui).
+    """
+
+    def __init__(self, disk_level: str = "TRACE", ui_level: str = "TRACE"):
+        """
+        Args:
+            disk_level: Минимальный уровень строк, которые пишутся в файл
+            ui_level: Минимальный уровень строк, которые попадают в окно логов
+        """
+        self.disk_min = level_value(disk_level)
+        self.ui_min = level_value(ui_level)
+        self.dropped_disk: Dict[str, int] = {}
+        self.dropped_ui: Dict[str, int] = {}
+        self._last_level = SINGBOX_LEVEL_VALUES["INFO"]
+
+    def classify(self, line: str) -> Tuple[bool, bool]:
+        """
+        Разобрать уровень строки и решить, куда ее передавать
+
+        Returns:
+            (писать в файл, показывать в окне логов)
+        """
+        level = parse_singbox_level(line)
+        if level is None:
+            level = self._last_level
+        else:
+            self._last_level = level
+        to_disk = level >= self.disk_min
+        to_ui = level >= self.ui_min
+        if not to_disk:
+            name = SINGBOX_LEVELS[level]
+            self.dropped_disk[name] = self.dropped_disk.get(name, 0) + 1
+        if not to_ui:
+            name = SINGBOX_LEVELS[level]
+            self.dropped_ui[name] = self.dropped_ui.get(name, 0) + 1
+        return to_disk, to_ui
+
+    def summary(self) -> str:
+        """Счетчики отброшенных строк для лога приложения ("" если ничего не отброшено)"""
+        parts = []
+        for title, counts in (("файл", self.dropped_disk), ("окно логов", self.dropped_ui)):
+            if counts:
+                items = ", ".join(f"{name}={counts[name]}" for name in SINGBOX_LEVELS if name in counts)
+                parts.append(f"{title}: {items}")
+        return "; ".join(parts)
@@ -0,0 +1,197 @@
+"""Ротация файлов логов по размеру со сжатием закрытых сегментов"""
+import gzip
+import re
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, List, Dict
+
+if TYPE_CHECKING:
+    from utils.log_buffer import LogFileTail
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_MAX_SEGMENTS = 5
+
+
+class LogRotator:
+    """
+    Политика ротации логов
+
+    Когда активный файл (например, singbox.log) превышает max_bytes, писатель
+    закрывает его и вызывает rotate(). Файл переименовывается в закрытый
+    сегмент singbox.log.<время>, а сжатие в .gz и удаление сегментов сверх
+    max_segments выполняются в фоновом потоке, поэтому писатель не ждет.
+
+    Переименование выполняет сам писатель, пока его файл закрыт:
+    в Windows открытый файл переименовать нельзя.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_segments: int = DEFAULT_MAX_SEGMENTS,
+        compress: bool = True
+    ):
+        """
+        Args:
+            max_bytes: Максимальный размер активного файла
+            max_segments: Сколько закрытых сегментов хранить
+            compress: Сжимать закрытые сегменты в gzip
+        """
+        self.max_bytes = max_bytes
+        self.max_segments = max_segments
+        self.compress = compress
+        # Сжатие и удаление сегментов выполняются по очереди
+        self._maintenance_lock = threading.Lock()
+
+    def configure(self, max_bytes: Optional[int] = None, max_segments: Optional[int] = None) -> None:
+        """Изменить параметры ротации (из настроек)"""
+        if max_bytes is not None and max_bytes > 0:
+            self.max_bytes = max_bytes
+        if max_segments is not None and max_segments >= 0:
+            self.max_segments = max_segments
+
+    def should_rotate(self, size: int) -> bool:
+        """Пора ли закрывать активный файл"""
+        return size >= self.max_bytes
+
+    @staticmethod
+    def _segment_re(log_file: Path):
+        return re.compile(rf"^{re.escape(log_file.name)}\.(\d{{8}}-\d{{6}}-\d{{6}})(\.gz)?$")
+
+    def segments(self, log_file: Path) -> List[Path]:
+        """
+        Закрытые сегменты лога от старых к новым
+
+        Если сегмент еще сжимается, возвращается несжатый файл.
+        """
+        pattern = self._segment_re(log_file)
+        by_stamp: Dict[str, Path] = {}
+        try:
+            candidates = list(log_file.parent.iterdir())
+        except OSError:
+            return []
+        for path in candidates:
+            match = pattern.match(path.name)
+            if not match:
+                continue
+            stamp, is_gz = match.group(1), bool(match.group(2))
+            if stamp not in by_stamp or not is_gz:
+                by_stamp[stamp] = path
+        return [by_stamp[stamp] for stamp in sorted(by_stamp)]
+
+    def rotate(self, log_file: Path) -> Optional[Path]:
+        """
+        Закрыть активный файл: переименовать его в сегмент и запустить фоновое сжатие
+
+        Вызывается писателем, пока его дескриптор файла закрыт.
+
+        Returns:
+            Путь к новому сегменту или None, если переименовать не удалось
+            (например, файл сейчас открыт другим процессом) - повторим позже
+        """
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        segment = log_file.with_name(f"{log_file.name}.{stamp}")
+        try:
+            log_file.replace(segment)
+        except OSError:
+            return None
+        threading.Thread(
+            target=self.maintain, args=(log_file,), name="log-rotate", daemon=True
+        ).start()
+        return segment
+
+    def maintain(self, log_file: Path) -> None:
+        """Сжать несжатые закрытые сегменты и удалить лишние (безопасно вызывать в любой момент)"""
+        with self._maintenance_lock:
+            if self.compress:
+                for segment in self.segments(log_file):
+                    if segment.suffix != ".gz":
+                        self._compress(segment)
+            segments = self.segments(log_file)
+            excess = len(segments) - self.max_segments
+            for segment in segments[:max(0, excess)]:
+                self._remove_segment(segment)
+
+    @staticmethod
+    def _compress(segment: Path) -> None:
+        """Сжать сегмент: сначала во временный файл, чтобы не оставить битый .gz"""
+        gz_path = segment.with_name(segment.name + ".gz")
+        tmp_path = segment.with_name(segment.name + ".gz.tmp")
+        try:
+            with segment.open("rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            tmp_path.replace(gz_path)
+            segment.unlink()
+        except OSError:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _remove_segment(segment: Path) -> None:
+        """Удалить сегмент в обоих видах (сжатом и несжатом)"""
+        base = segment.with_name(segment.name[:-3]) if segment.suffix == ".gz" else segment
+        for path in (base, base.with_name(base.name + ".gz")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def read_segments_tail(log_file: Path, max_bytes: int, rotator: Optional[LogRotator] = None) -> List[str]:
+    """
+    Последние строки закрытых сегментов (без активного файла)
+
+    Сегменты читаются от новых к старым, пока не наберется max_bytes.
+
+    Returns:
+        Строки в хронологическом порядке
+    """
+    rotator = rotator or LOG_ROTATOR
+    chunks: List[bytes] = []
+    total = 0
+    for segment in reversed(rotator.segments(log_file)):
+        if total >= max_bytes:
+            break
+        try:
+            if segment.suffix == ".gz":
+                with gzip.open(segment, "rb") as f:
+                    data = f.read()
+            else:
+                data = segment.read_bytes()
+        except (OSError, EOFError):
+            continue
+        chunks.append(data)
+        total += len(data)
+    if not chunks:
+        return []
+    data = b"".join(reversed(chunks))
+    truncated = len(data) > max_bytes
+    if truncated:
+        data = data[-max_bytes:]
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    # Начали с середины сегмента - первая строка неполная
+    if truncated and lines:
+        lines.pop(0)
+    return lines
+
+
+def read_log_history(tail: "LogFileTail", rotator: Optional[LogRotator] = None) -> List[str]:
+    """
+    История лога для окна логов: хвост активного файла, а если он мал - и последних сегментов
+
+    Читает файл через tail (смещение остается в конце прочитанного),
+    в сумме не больше tail.initial_bytes. Сегменты могут быть сжаты,
+    поэтому функция вызывается из фонового потока.
+    """
+    lines, _ = tail.read_new()
+    if tail.offset < tail.initial_bytes:
+        lines = read_segments_tail(tail.log_file, tail.initial_bytes - tail.offset, rotator) + lines
+    return lines
+
+
+# Общая политика для log_to_file и SingBoxLogReaderThread
+LOG_ROTATOR = LogRotator()
@@ -0,0 +1,176 @@
+"""Буферизованная запись логов с пакетным сбросом на диск"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Callable, BinaryIO
+from utils.log_rotation import LogRotator
+
+
+class BatchLogWriter:
+    """
+    Запись строк лога через постоянно открытый файл
+
+    Строки копятся в буфере файла и сбрасываются на диск пакетами:
+    когда накопилось flush_bytes байт или прошло flush_interval секунд
+    с последнего сброса. Фоновый поток сбрасывает хвост буфера, если новых
+    строк нет (иначе последние строки не попали бы в файл до следующей записи).
+
+    Если задан rotator, после сброса проверяется размер файла, и при превышении
+    файл закрывается, уходит в сегмент и открывается заново.
+    """
+
+    FLUSH_INTERVAL = 0.2  # секунд
+    FLUSH_BYTES = 64 * 1024
+
+    def __init__(
+        self,
+        log_file: Path,
+        flush_interval: float = FLUSH_INTERVAL,
+        flush_bytes: int = FLUSH_BYTES,
+        rotator: Optional[LogRotator] = None
+    ) -> None:
+        """
+        Инициализация (файл открывается в open())
+
+        Args:
+            log_file: Путь к файлу лога
+            flush_interval: Максимальная задержка строки в буфере в секундах
+            flush_bytes: Размер буфера, при котором сброс выполняется сразу
+            rotator: Политика ротации (None - без ротации)
+        """
+        self.log_file = log_file
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.rotator = rotator
+        self._file: Optional[BinaryIO] = None
+        self._pending = 0  # байт записано с последнего сброса
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def open(self) -> None:
+        """Открыть файл и запустить фоновый сброс"""
+        self._open_file()
+        self._closed.clear()
+        self._flusher = threading.Thread(target=self._flush_loop, name="log-flush", daemon=True)
+        self._flusher.start()
+
+    def _open_file(self) -> None:
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        # Режим "a": после очистки файла запись продолжается с начала, без дыр.
+        # Файл двоичный: строки кодируются в write_line, и _pending считает
+        # те же байты, что лежат в буфере (кириллица и CJK - 2-3 байта на символ)
+        self._file = self.log_file.open("ab", buffering=self.flush_bytes * 2)
+
+    def write_line(self, line: str) -> None:
+        """Добавить строку в буфер (сброс на диск - по размеру или времени)"""
+        with self._lock:
+            if self._file is None:
+                return
+            data = (line + "\n").encode("utf-8", errors="replace")
+            self._file.write(data)
+            self._pending += len(data)
+            if self._pending >= self.flush_bytes or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Сбросить буфер на диск"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """Сбросить буфер и закрыть файл"""
+        self._closed.set()
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.flush()
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=1)
+
+    def _flush_locked(self) -> None:
+        if self._file is None or not self._pending:
+            return
+        try:
+            self._file.flush()
+        except Exception:
+            pass
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        if self.rotator is not None:
+            self._rotate_if_needed_locked()
+
+    def _rotate_if_needed_locked(self) -> None:
+        """Закрыть файл и отдать его в ротацию, если он превысил лимит"""
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+        except (OSError, ValueError):
+            return
+        if not self.rotator.should_rotate(size):
+            return
+        try:
+            self._file.close()
+        except Exception:
+            pass
+        # Сжатие сегмента идет в фоне; если переименовать не удалось, пишем дальше в тот же файл
+        self.rotator.rotate(self.log_file)
+        try:
+            self._open_file()
+        except OSError:
+            self._file = None
+
+    def _flush_loop(self) -> None:
+        """Фоновый сброс хвоста буфера, пока файл открыт"""
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if self._pending and time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._flush_locked()
+
+    def __enter__(self) -> 'BatchLogWriter':
+        self.open()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def pump_lines(
+    stream: BinaryIO,
+    writer: Optional[BatchLogWriter],
+    on_line: Optional[Callable[[str], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None
+) -> int:
+    """
+    Читать строки из потока до EOF и писать их в лог
+
+    Чтение блокирующее, без пауз между строками: если данных нет, поток
+    ждет их в readline(), а EOF означает завершение процесса.
+
+    Args:
+        stream: Буферизованный бинарный поток (stdout процесса)
+        writer: Открытый BatchLogWriter (None - запись в файл решает on_line)
+        on_line: Вызывается для каждой непустой строки
+        should_stop: Проверяется после каждой строки; True - прекратить чтение
+
+    Returns:
+        Количество прочитанных строк
+    """
+    count = 0
+    for line_bytes in iter(stream.readline, b""):
+        line = line_bytes.decode("utf-8", errors="replace").rstrip()
+        if line:
+            count += 1
+            if on_line is not None:
+                on_line(line)
+            if writer is not None:
+                writer.write_line(line)
+        if should_stop is not None and should_stop():
+            break
+    return count
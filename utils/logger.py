@@ -1,11 +1,33 @@
 """Модуль для логирования (можно использовать до инициализации MainWindow)"""
 import sys
+import queue
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
-from config.paths import LOG_FILE
+from typing import Optional, Dict, List, Tuple, Any
+from config.paths import LOG_FILE, STRUCTURED_LOG_FILE
+from utils.log_buffer import APP_LOG_BUFFER
+from utils.log_rotation import LOG_ROTATOR
+from utils.structured_log import StructuredLogSink, make_record
+
+# Уровни логирования
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+_LEVEL_NAMES = {DEBUG: "DEBUG", WARNING: "WARN", ERROR: "ERROR"}
+# Имена уровней в настройке log_level
+_LEVELS_BY_NAME = {"debug": DEBUG, "info": INFO, "warn": WARNING, "warning": WARNING, "error": ERROR}
 
 # Глобальная ссылка на MainWindow для показа логов в UI при isDebug
 _main_window_instance = None
+# Сообщения ниже этого уровня отбрасываются до постановки в очередь
+_min_level = DEBUG
+# Дублировать сообщения приложения в структурированный лог (JSONL)
+_structured_enabled = False
+# Поток записи остановлен (shutdown_logging): дальше сообщения пишутся синхронно
+_shut_down = False
 
 
 def set_main_window(main_window):
@@ -14,29 +36,237 @@ def set_main_window(main_window):
     _main_window_instance = main_window
 
 
-def log_to_file(msg: str, log_file: Path = None):
-    """Логирование в файл логов приложения (всегда пишет в singbox-ui.log, UI обновляется автоматически при чтении файла)"""
+def set_log_level(level: int) -> None:
+    """Минимальный уровень сообщений, которые попадают в лог"""
+    global _min_level
+    _min_level = level
+
+
+def log_level_from_name(name: Optional[str], default: int = DEBUG) -> int:
+    """Уровень по имени из настроек ("debug", "info", "warn", "error"); неизвестное имя - default"""
+    return _LEVELS_BY_NAME.get(str(name or "").lower(), default)
+
+
+def set_structured_logging(enabled: bool) -> None:
+    """Включить/выключить запись структурированного лога singbox-ui.jsonl"""
+    global _structured_enabled
+    _structured_enabled = bool(enabled)
+
+
+class _FlushRequest:
+    """Метка в очереди: writer выставляет event, когда все записи до нее на диске"""
+
+    def __init__(self):
+        self.event = threading.Event()
+
+
+_STOP = object()
+
+
+class _AsyncLogWriter(threading.Thread):
+    """
+    Фоновый поток записи логов
+
+    Вызывающие потоки только кладут строку в очередь (queue.SimpleQueue
+    не блокирует при put), а этот поток забирает записи пачками и пишет
+    каждую пачку одним открытием файла. Так log_to_file не ждет диска,
+    в том числе в UI-потоке.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self):
+        super().__init__(name="log-writer", daemon=True)
+        self.queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._known_dirs = set()
+        self._structured_sink = StructuredLogSink(STRUCTURED_LOG_FILE)
+
+    def run(self) -> None:
+        while True:
+            item = self.queue.get()
+            batch: List[Tuple[Path, str, Optional[Dict[str, Any]]]] = []
+            flush_requests: List[_FlushRequest] = []
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _FlushRequest):
+                    flush_requests.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.BATCH_SIZE:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+            for request in flush_requests:
+                request.event.set()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Tuple[Path, str, Optional[Dict[str, Any]]]]) -> None:
+        """Записать пачку строк: одно открытие на файл"""
+        by_file: Dict[Path, List[str]] = {}
+        records = []
+        for log_file, line, record in batch:
+            by_file.setdefault(log_file, []).append(line)
+            if record is not None:
+                records.append(record)
+
+        if records:
+            try:
+                self._structured_sink.write(records)
+            except Exception as e:
+                if not getattr(sys, 'frozen', False):
+                    print(f"[LOG ERROR] Не удалось записать структурированный лог: {e}")
+
+        for log_file, lines in by_file.items():
+            try:
+                if log_file.parent not in self._known_dirs:
+                    log_file.parent.mkdir(parents=True, exist_ok=True)
+                    self._known_dirs.add(log_file.parent)
+                with log_file.open("a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    size = f.tell()
+                if LOG_ROTATOR.should_rotate(size):
+                    LOG_ROTATOR.rotate(log_file)
+            except Exception as e:
+                # Если не удалось записать в файл, хотя бы в консоль
+                if not getattr(sys, 'frozen', False):
+                    print(f"[LOG ERROR] Не удалось записать в лог: {e}")
+                    for line in lines:
+                        print(f"[LOG] {line}")
+                continue
+
+            # Окно логов читает новые строки из буфера, а не перечитывает файл
+            if log_file == LOG_FILE:
+                APP_LOG_BUFFER.extend(lines)
+
+            # Также выводим в консоль, если доступна (только в режиме разработки)
+            if not getattr(sys, 'frozen', False):
+                print("\n".join(lines))
+
+
+_writer: Optional[_AsyncLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> _AsyncLogWriter:
+    """Поток записи (создается при первом сообщении; после shutdown_logging не запускается)"""
+    global _writer
+    writer = _writer
+    if writer is not None and (writer.is_alive() or _shut_down):
+        return writer
+    with _writer_lock:
+        if _writer is None or not (_writer.is_alive() or _shut_down):
+            _writer = _AsyncLogWriter()
+            if not _shut_down:
+                _writer.start()
+        return _writer
+
+
+def _drain_stopped_writer() -> None:
+    """Синхронно записать то, что осталось в очереди остановленного потока записи"""
+    with _writer_lock:
+        writer = _writer
+        if writer is None or writer.is_alive():
+            return
+        batch = []
+        flush_requests = []
+        while True:
+            try:
+                item = writer.queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushRequest):
+                flush_requests.append(item)
+            elif item is not _STOP:
+                batch.append(item)
+        if batch:
+            writer._write_batch(batch)
+        for request in flush_requests:
+            request.event.set()
+
+
+def log_to_file(
+    msg: str,
+    log_file: Path = None,
+    level: int = INFO,
+    component: Optional[str] = None,
+    fields: Optional[Dict[str, Any]] = None
+):
+    """
+    Логирование в файл логов приложения (по умолчанию singbox-ui.log)
+
+    Строка ставится в очередь и записывается фоновым потоком, вызывающий
+    поток не ждет диска. Чтобы дождаться записи, используйте flush_logs().
+    После shutdown_logging() строка записывается сразу в вызывающем потоке.
+    Если включен структурированный лог, сообщения для LOG_FILE дублируются
+    в singbox-ui.jsonl с уровнем, компонентом и полями.
+
+    Args:
+        msg: Сообщение
+        log_file: Файл лога (по умолчанию LOG_FILE)
+        level: Уровень сообщения (DEBUG, INFO, WARNING, ERROR)
+        component: Компонент (по умолчанию из префикса [Component] сообщения)
+        fields: Дополнительные поля для структурированного лога
+    """
+    if level < _min_level:
+        return
     # Всегда записываем в основной файл логов
     if log_file is None:
         log_file = LOG_FILE
-    
+
+    now = time.time()
+    ts = datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")
+    level_name = _LEVEL_NAMES.get(level)
+    line = f"[{ts}] [{level_name}] {msg}" if level_name else f"[{ts}] {msg}"
+    record = None
+    if _structured_enabled and log_file == LOG_FILE:
+        record = make_record(now, level, msg, component, fields)
     try:
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        line = f"[{ts}] {msg}"
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write(line + "\n")
-        
-        # Не отправляем напрямую в UI - только через файл логов
-        # UI будет обновляться автоматически при чтении файла
-        
-        # Также выводим в консоль, если доступна (только в режиме разработки)
+        _get_writer().queue.put((log_file, line, record))
+        if _shut_down:
+            # Поток записи остановлен (или останавливается): записываем сами,
+            # иначе строки, поставленные в очередь после _STOP, потеряются
+            _drain_stopped_writer()
+    except Exception:
         if not getattr(sys, 'frozen', False):
-            print(line)
-    except Exception as e:
-        # Если не удалось записать в файл, хотя бы в консоль
-        error_msg = f"[LOG ERROR] Не удалось записать в лог: {e}"
-        if not getattr(sys, 'frozen', False):
-            print(error_msg)
-            print(f"[LOG] {msg}")
+            print(f"[LOG] {line}")
+
+
+def flush_logs(timeout: float = 2.0) -> bool:
+    """
+    Дождаться записи всех сообщений, поставленных в очередь
+
+    Returns:
+        True если очередь записана за timeout секунд
+    """
+    writer = _writer
+    if writer is None or not writer.is_alive():
+        return True
+    request = _FlushRequest()
+    writer.queue.put(request)
+    return request.event.wait(timeout)
+
+
+def shutdown_logging(timeout: float = 2.0) -> None:
+    """
+    Записать очередь и остановить поток записи (при выходе из приложения)
 
+    Сообщения после остановки пишутся синхронно в вызывающем потоке:
+    новый фоновый поток не запускается, иначе интерпретатор завершил бы его
+    при выходе вместе с незаписанными строками.
+    """
+    global _shut_down
+    with _writer_lock:
+        _shut_down = True
+        writer = _writer
+    if writer is not None and writer.is_alive():
+        writer.queue.put(_STOP)
+        writer.join(timeout)
+    # Строки, поставленные в очередь после _STOP
+    _drain_stopped_writer()
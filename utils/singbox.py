@@ -2,10 +2,13 @@
 import subprocess
 import re
 import sys
-import requests
 from pathlib import Path
 from typing import Optional
 from config.paths import CORE_EXE
+from utils.lazy_import import lazy_import
+
+# requests загружается при первой проверке обновлений, а не при запуске
+requests = lazy_import("requests")
 
 # Импортируем log_to_file если доступен
 try:
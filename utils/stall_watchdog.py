@@ -0,0 +1,167 @@
+"""Сторож зависаний главного потока (отладочный режим)"""
+import json
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict
+from PyQt5.QtCore import QObject, QTimer
+from config.paths import STALL_LOG_FILE, STALL_HISTOGRAM_FILE
+from utils.logger import log_to_file, WARNING
+
+# Границы корзин гистограммы длительности зависаний, мс
+HISTOGRAM_BOUNDS_MS = (100, 250, 500, 1000, 2000, 5000, 10000)
+# Сколько стеков снимать за одно зависание (первый - при обнаружении, далее раз в STACK_SAMPLE_INTERVAL)
+MAX_STACK_SAMPLES = 5
+STACK_SAMPLE_INTERVAL = 1.0  # секунд
+
+
+def _bucket_label(duration_ms: float) -> str:
+    lower = 0
+    for bound in HISTOGRAM_BOUNDS_MS:
+        if duration_ms < bound:
+            return f"{lower}-{bound}" if lower else f"<{bound}"
+        lower = bound
+    return f">={lower}"
+
+
+class StallWatchdog(QObject):
+    """
+    Обнаружение зависаний цикла событий Qt
+
+    Таймер в главном потоке каждые interval_ms отмечает время "тика".
+    Фоновый поток проверяет, как давно был последний тик: если дольше
+    threshold_ms, главный поток чем-то занят. В этот момент через
+    sys._current_frames() снимается его Python-стек (и повторно, пока
+    зависание длится). Когда тики возобновляются, зависание со стеками
+    пишется в stalls.log, а длительность - в гистограмму stalls-histogram.json.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: int = 250,
+        interval_ms: int = 50,
+        log_file: Path = STALL_LOG_FILE,
+        histogram_file: Path = STALL_HISTOGRAM_FILE,
+        parent: Optional[QObject] = None
+    ):
+        """
+        Args:
+            threshold_ms: Задержка тика, после которой главный поток считается зависшим
+            interval_ms: Период тиков таймера главного потока
+            log_file: Файл для записей о зависаниях со стеками
+            histogram_file: Файл гистограммы длительностей (JSON)
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.threshold_ms = threshold_ms
+        self.interval_ms = interval_ms
+        self.log_file = log_file
+        self.histogram_file = histogram_file
+        self.histogram: Dict[str, int] = {}
+        self.stall_count = 0
+        self.max_stall_ms = 0.0
+        self.total_stall_ms = 0.0
+        self._started_at: Optional[str] = None
+        self._main_ident: Optional[int] = None
+        self._last_tick = 0.0
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Запустить сторож (вызывать из главного потока)"""
+        if self._thread is not None:
+            return
+        self._main_ident = threading.get_ident()
+        self._started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._last_tick = time.monotonic()
+        self._timer.start()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+        log_to_file(f"[Stall Watchdog] Запущен: порог {self.threshold_ms} мс, файл {self.log_file.name}")
+
+    def stop(self) -> None:
+        """Остановить сторож и записать гистограмму"""
+        if self._thread is None:
+            return
+        self._timer.stop()
+        self._stop_event.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+        self._write_histogram()
+
+    def _tick(self) -> None:
+        self._last_tick = time.monotonic()
+
+    def _capture_stack(self) -> Optional[str]:
+        """Python-стек главного потока в текущий момент"""
+        frame = sys._current_frames().get(self._main_ident)
+        if frame is None:
+            return None
+        return "".join(traceback.format_stack(frame))
+
+    def _watch(self) -> None:
+        """Цикл проверки тиков (фоновый поток)"""
+        check_interval = self.interval_ms / 1000
+        threshold = self.threshold_ms / 1000
+        stall_tick: Optional[float] = None  # последний тик перед зависанием
+        samples: List[str] = []
+        next_sample = 0.0
+        while not self._stop_event.wait(check_interval):
+            last_tick = self._last_tick
+            now = time.monotonic()
+            if now - last_tick >= threshold:
+                if stall_tick is None:
+                    stall_tick = last_tick
+                    samples = []
+                    next_sample = now
+                if now >= next_sample and len(samples) < MAX_STACK_SAMPLES:
+                    stack = self._capture_stack()
+                    if stack and stack not in samples:
+                        samples.append(stack)
+                    next_sample = now + STACK_SAMPLE_INTERVAL
+            elif stall_tick is not None:
+                # Тики возобновились: зависание длилось от последнего тика до нового, минус период таймера
+                duration_ms = max(0.0, (last_tick - stall_tick) * 1000 - self.interval_ms)
+                self._record_stall(duration_ms, samples)
+                stall_tick = None
+
+    def _record_stall(self, duration_ms: float, samples: List[str]) -> None:
+        """Записать зависание в лог и гистограмму"""
+        self.stall_count += 1
+        self.total_stall_ms += duration_ms
+        self.max_stall_ms = max(self.max_stall_ms, duration_ms)
+        label = _bucket_label(duration_ms)
+        self.histogram[label] = self.histogram.get(label, 0) + 1
+
+        parts = [f"[Stall] Главный поток не отвечал {duration_ms:.0f} мс"]
+        for i, stack in enumerate(samples, 1):
+            parts.append(f"--- стек {i}/{len(samples)} ---\n{stack.rstrip()}")
+        log_to_file("\n".join(parts), log_file=self.log_file, level=WARNING)
+        log_to_file(f"[Stall Watchdog] Зависание главного потока: {duration_ms:.0f} мс (стек в {self.log_file.name})")
+        self._write_histogram()
+
+    def _write_histogram(self) -> None:
+        """Сохранить гистограмму (через временный файл, чтобы не оставить битый JSON)"""
+        order = [_bucket_label(bound - 1) for bound in HISTOGRAM_BOUNDS_MS] + [_bucket_label(HISTOGRAM_BOUNDS_MS[-1])]
+        data = {
+            "since": self._started_at,
+            "threshold_ms": self.threshold_ms,
+            "stalls": self.stall_count,
+            "max_ms": round(self.max_stall_ms),
+            "total_ms": round(self.total_stall_ms),
+            "histogram_ms": {label: self.histogram.get(label, 0) for label in order},
+        }
+        tmp_path = self.histogram_file.with_name(self.histogram_file.name + ".tmp")
+        try:
+            self.histogram_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+            tmp_path.replace(self.histogram_file)
+        except OSError as e:
+            log_to_file(f"[Stall Watchdog] Не удалось записать гистограмму: {e}")
@@ -0,0 +1,270 @@
+"""Трассировка запуска приложения в формате Chrome Trace (chrome://tracing, Perfetto)"""
+import atexit
+import builtins
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterator
+
+# Флаг командной строки: "--trace-startup" или "--trace-startup=путь.json"
+TRACE_FLAG = "--trace-startup"
+# Сколько самых долгих импортов верхнего уровня выводить в лог
+SUMMARY_TOP_IMPORTS = 10
+
+
+def _absolute_module_name(name: str, globals_: Optional[dict], level: int) -> str:
+    """Полное имя модуля для относительного импорта (from . import x)"""
+    if level == 0 or not globals_:
+        return name
+    package = globals_.get("__package__") or ""
+    if level > 1:
+        package = package.rsplit(".", level - 1)[0]
+    return f"{package}.{name}" if name else package
+
+
+class StartupTracer:
+    """
+    Запись этапов запуска с монотонными отметками времени
+
+    Включается только флагом --trace-startup (без него все методы ничего
+    не делают). Время отсчитывается от импорта этого модуля - он
+    импортируется первым в main.py, до остальных модулей приложения.
+
+    Импорты отслеживаются подменой builtins.__import__: каждый импорт,
+    который действительно загрузил модули, становится отрезком трассы,
+    вложенные импорты - вложенными отрезками. Фоновые потоки (QThread)
+    записываются асинхронными отрезками от start() до finished.
+
+    Результат - JSON Chrome Trace: открывается в chrome://tracing или
+    ui.perfetto.dev, трассы разных запусков можно сравнивать между собой.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.output: Optional[Path] = None
+        self.events: List[Dict[str, Any]] = []
+        self.metadata: Dict[str, Any] = {}
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._thread_names: Dict[int, str] = {}
+        self._async_ids: Dict[str, int] = {}
+        self._local = threading.local()
+        self._original_import = None
+        self._finished = False
+
+    def enable_from_argv(self, argv: Optional[List[str]] = None) -> bool:
+        """
+        Включить трассировку, если в аргументах есть --trace-startup
+
+        Флаг удаляется из argv, чтобы не попасть в QApplication и в
+        аргументы, передаваемые уже запущенному экземпляру.
+        """
+        argv = sys.argv if argv is None else argv
+        for arg in argv[1:]:
+            if arg == TRACE_FLAG or arg.startswith(TRACE_FLAG + "="):
+                argv.remove(arg)
+                _, _, path = arg.partition("=")
+                self.enable(Path(path) if path else None)
+                break
+        return self.enabled
+
+    def enable(self, output: Optional[Path] = None) -> None:
+        """
+        Включить трассировку
+
+        Args:
+            output: Файл трассы; None - STARTUP_TRACE_FILE в папке логов
+        """
+        if self.enabled or self._finished:
+            return
+        self.enabled = True
+        self.output = output
+        self.metadata.update({
+            "started_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "python": platform.python_version(),
+            "platform": sys.platform,
+        })
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._traced_import
+        # Если запуск не дошел до конца (ошибка, выход другого экземпляра) - пишем то, что есть
+        atexit.register(self.finish)
+
+    def _now(self) -> float:
+        """Микросекунды от начала трассировки"""
+        return round((time.perf_counter() - self._origin) * 1_000_000, 1)
+
+    def _tid(self) -> int:
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def _traced_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """builtins.__import__ с записью импортов, которые загрузили новые модули"""
+        loaded_before = len(sys.modules)
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start = self._now()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._local.depth = depth
+            if len(sys.modules) != loaded_before and self.enabled:
+                self.events.append({
+                    "name": _absolute_module_name(name, globals, level),
+                    "cat": "import",
+                    "ph": "X",
+                    "ts": start,
+                    "dur": round(self._now() - start, 1),
+                    "pid": self._pid,
+                    "tid": self._tid(),
+                    "args": {"depth": depth},
+                })
+
+    def complete(self, name: str, start: float, cat: str = "startup", **args) -> None:
+        """Записать отрезок от start (см. now()) до текущего момента"""
+        if not self.enabled:
+            return
+        event = {
+            "name": name, "cat": cat, "ph": "X", "ts": start, "dur": round(self._now() - start, 1),
+            "pid": self._pid, "tid": self._tid(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def now(self) -> float:
+        """Текущая отметка трассы (для complete())"""
+        return self._now()
+
+    @contextmanager
+    def phase(self, name: str, cat: str = "startup", **args) -> Iterator[None]:
+        """Этап запуска: with STARTUP_TRACE.phase("create_application"): ..."""
+        if not self.enabled:
+            yield
+            return
+        start = self._now()
+        try:
+            yield
+        finally:
+            self.complete(name, start, cat, **args)
+
+    def begin(self, name: str, cat: str = "startup") -> None:
+        """Начало этапа, который заканчивается в другом месте кода того же потока (см. end())"""
+        if self.enabled:
+            self.events.append({"name": name, "cat": cat, "ph": "B", "ts": self._now(), "pid": self._pid, "tid": self._tid()})
+
+    def end(self, name: str, cat: str = "startup") -> None:
+        """Конец этапа, начатого begin()"""
+        if self.enabled:
+            self.events.append({"name": name, "cat": cat, "ph": "E", "ts": self._now(), "pid": self._pid, "tid": self._tid()})
+
+    def instant(self, name: str, cat: str = "startup", **args) -> None:
+        """Отметка момента (например, первая отрисовка окна)"""
+        if not self.enabled:
+            return
+        event = {"name": name, "cat": cat, "ph": "i", "s": "p", "ts": self._now(), "pid": self._pid, "tid": self._tid()}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def _async_event(self, name: str, phase: str) -> None:
+        if phase == "b":
+            self._async_ids[name] = len(self._async_ids) + 1
+        async_id = self._async_ids.get(name)
+        if async_id is None:
+            return
+        self.events.append({
+            "name": name, "cat": "worker", "ph": phase, "id": async_id, "ts": self._now(),
+            "pid": self._pid, "tid": self._tid(),
+        })
+
+    def trace_worker(self, name: str, worker) -> None:
+        """
+        Записать работу фонового потока от запуска до завершения
+
+        Вызывать перед worker.start(); конец отрезка - сигнал QThread.finished.
+        """
+        if not self.enabled:
+            return
+        self._async_event(name, "b")
+        worker.finished.connect(lambda: self.enabled and self._async_event(name, "e"))
+
+    def mark_first_paint(self, widget) -> None:
+        """Отметить первую отрисовку виджета (событие Paint), вызывать до show()"""
+        if not self.enabled:
+            return
+        from PyQt5.QtCore import QObject, QEvent
+
+        tracer = self
+
+        class _FirstPaintFilter(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint:
+                    obj.removeEventFilter(self)
+                    tracer.instant("first paint")
+                    tracer.metadata["first_paint_ms"] = round(tracer.now() / 1000, 1)
+                return False
+
+        self._paint_filter = _FirstPaintFilter(widget)
+        widget.installEventFilter(self._paint_filter)
+
+    def _import_summary(self) -> str:
+        """Суммарное время импортов верхнего уровня и самые долгие из них"""
+        top = [e for e in self.events if e["cat"] == "import" and e["args"]["depth"] == 0]
+        total_ms = sum(e["dur"] for e in top) / 1000
+        slowest = sorted(top, key=lambda e: e["dur"], reverse=True)[:SUMMARY_TOP_IMPORTS]
+        items = ", ".join(f"{e['name']} {e['dur'] / 1000:.0f} мс" for e in slowest)
+        return f"импорты {total_ms:.0f} мс ({len(top)} верхнего уровня): {items}"
+
+    def finish(self) -> None:
+        """Остановить трассировку и записать файл (повторные вызовы ничего не делают)"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._finished = True
+        if builtins.__import__ == self._traced_import:
+            builtins.__import__ = self._original_import
+        self.metadata["finished_ms"] = round(self._now() / 1000, 1)
+
+        if self.output is None:
+            from config.paths import STARTUP_TRACE_FILE
+            self.output = STARTUP_TRACE_FILE
+        thread_events = [
+            {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self._thread_names.items()
+        ]
+        data = {
+            "traceEvents": thread_events + self.events,
+            "displayTimeUnit": "ms",
+            "otherData": self.metadata,
+        }
+        # Через временный файл, чтобы не оставить битый JSON
+        tmp_path = self.output.with_name(self.output.name + ".tmp")
+        try:
+            from utils.logger import log_to_file
+        except ImportError:
+            def log_to_file(msg, log_file=None):
+                print(msg)
+        try:
+            self.output.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(self.output)
+        except OSError as e:
+            log_to_file(f"[Startup Trace] Не удалось записать трассу: {e}")
+            return
+        log_to_file(
+            f"[Startup Trace] Трасса запуска записана в {self.output} "
+            f"({len(self.events)} событий, {self.metadata['finished_ms']:.0f} мс); {self._import_summary()}"
+        )
+
+
+# Трассировщик запуска (включается в main.py флагом --trace-startup)
+STARTUP_TRACE = StartupTracer()
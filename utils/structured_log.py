@@ -0,0 +1,289 @@
+"""Структурированный лог приложения (JSONL) с разреженным индексом по времени"""
+import gzip
+import json
+import re
+from bisect import bisect_right
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Iterator, Iterable, Union
+from utils.log_rotation import LogRotator, LOG_ROTATOR
+
+# Числовые значения уровней совпадают с utils.logger
+LEVEL_VALUES = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+LEVEL_NAMES = {value: name for name, value in LEVEL_VALUES.items()}
+
+# Точка индекса ставится не реже, чем через столько байт файла
+INDEX_INTERVAL_BYTES = 256 * 1024
+# Записи из разных потоков могут прийти в очередь с небольшой перестановкой времени
+TIME_SKEW = 1.0
+
+# Компонент берется из префикса сообщения: "[Version Check] ..." -> "Version Check"
+_COMPONENT_RE = re.compile(r"^\[([^\[\]]{1,64})\]\s*")
+# Запись всегда начинается с {"ts":<число>, - время читается без разбора JSON
+_TS_PREFIX = b'{"ts":'
+
+
+def make_record(
+    ts: float,
+    level: int,
+    message: str,
+    component: Optional[str] = None,
+    fields: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Запись структурированного лога
+
+    Если компонент не указан, он берется из префикса [Component] сообщения.
+    Порядок ключей важен: ts всегда первым (см. _read_ts).
+    """
+    if component is None:
+        match = _COMPONENT_RE.match(message)
+        if match:
+            component = match.group(1)
+            message = message[match.end():]
+    record = {
+        "ts": round(ts, 3),
+        "level": LEVEL_NAMES.get(level, "INFO"),
+        "component": component or "",
+        "msg": message,
+    }
+    if fields:
+        record["fields"] = fields
+    return record
+
+
+def _dumps(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _read_ts(raw: bytes) -> Optional[float]:
+    """Время записи из начала строки без json.loads"""
+    if not raw.startswith(_TS_PREFIX):
+        return None
+    end = raw.find(b",", len(_TS_PREFIX))
+    try:
+        return float(raw[len(_TS_PREFIX):end])
+    except ValueError:
+        return None
+
+
+def _index_path(log_file: Path) -> Path:
+    return log_file.with_name(log_file.name + ".idx")
+
+
+class StructuredLogSink:
+    """
+    Запись структурированного лога (вызывается только из потока записи логов)
+
+    Рядом с файлом ведется разреженный индекс <файл>.idx: строки "время смещение"
+    не чаще одной на INDEX_INTERVAL_BYTES. Индекс описывает только активный файл
+    и удаляется при его ротации.
+    """
+
+    def __init__(self, log_file: Path, rotator: Optional[LogRotator] = None):
+        """
+        Args:
+            log_file: Путь к JSONL-файлу
+            rotator: Политика ротации (по умолчанию общая LOG_ROTATOR)
+        """
+        self.log_file = log_file
+        self.rotator = rotator or LOG_ROTATOR
+        self._last_indexed: Optional[int] = None  # смещение последней точки индекса
+
+    def write(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Дописать пачку записей"""
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        index_lines = []
+        with self.log_file.open("ab") as f:
+            offset = f.tell()
+            if self._last_indexed is None or offset < self._last_indexed:
+                self._last_indexed = self._load_last_indexed(offset)
+            for record in records:
+                data = (_dumps(record) + "\n").encode("utf-8")
+                if self._last_indexed < 0 or offset - self._last_indexed >= INDEX_INTERVAL_BYTES:
+                    index_lines.append(f"{record['ts']} {offset}\n")
+                    self._last_indexed = offset
+                f.write(data)
+                offset += len(data)
+        if index_lines:
+            with _index_path(self.log_file).open("a", encoding="utf-8") as f:
+                f.writelines(index_lines)
+        if self.rotator.should_rotate(offset) and self.rotator.rotate(self.log_file):
+            try:
+                _index_path(self.log_file).unlink()
+            except OSError:
+                pass
+            self._last_indexed = None
+
+    def _load_last_indexed(self, file_size: int) -> int:
+        """Смещение последней точки индекса (-1 если индекса нет или он от другого файла)"""
+        entries = _load_index(self.log_file)
+        if entries and entries[-1][1] <= file_size:
+            return entries[-1][1]
+        # Индекс от другого файла (или его нет) - начинаем заново; начало файла
+        # без точек индекса читатель доиндексирует сам
+        try:
+            _index_path(self.log_file).unlink()
+        except OSError:
+            pass
+        return -1
+
+
+def _load_index(log_file: Path) -> List[Tuple[float, int]]:
+    entries = []
+    try:
+        with _index_path(log_file).open("r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2:
+                    entries.append((float(parts[0]), int(parts[1])))
+    except (OSError, ValueError):
+        return []
+    return entries
+
+
+class StructuredLogQuery:
+    """
+    Запросы к структурированному логу по уровню, компоненту и времени
+
+    Начало диапазона ищется двоичным поиском по разреженному индексу, поэтому
+    запрос за последние минуты не читает весь файл. Участок после последней
+    точки индекса дочитывается и индексируется в памяти при каждом запросе.
+    """
+
+    def __init__(self, log_file: Path, rotator: Optional[LogRotator] = None):
+        """
+        Args:
+            log_file: Путь к JSONL-файлу
+            rotator: Политика ротации (для чтения закрытых сегментов)
+        """
+        self.log_file = log_file
+        self.rotator = rotator or LOG_ROTATOR
+        self._entries: List[Tuple[float, int]] = []
+        self._scanned_to = 0
+        self._file_id = None
+
+    def _refresh_index(self) -> None:
+        """Загрузить индекс с диска и доиндексировать хвост файла"""
+        try:
+            st = self.log_file.stat()
+        except OSError:
+            self._entries, self._scanned_to, self._file_id = [], 0, None
+            return
+        file_id = (st.st_dev, st.st_ino)
+        if file_id != self._file_id or st.st_size < self._scanned_to:
+            self._entries = [e for e in _load_index(self.log_file) if e[1] < st.st_size]
+            self._scanned_to = self._entries[-1][1] if self._entries else 0
+            self._file_id = file_id
+        if st.st_size <= self._scanned_to:
+            return
+        last_offset = self._entries[-1][1] if self._entries else -INDEX_INTERVAL_BYTES
+        with self.log_file.open("rb") as f:
+            f.seek(self._scanned_to)
+            offset = self._scanned_to
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # запись еще не дописана
+                if offset - last_offset >= INDEX_INTERVAL_BYTES:
+                    ts = _read_ts(raw)
+                    if ts is not None:
+                        self._entries.append((ts, offset))
+                        last_offset = offset
+                offset += len(raw)
+            self._scanned_to = offset
+
+    def _start_offset(self, since: Optional[float]) -> int:
+        if since is None or not self._entries:
+            return 0
+        times = [entry[0] for entry in self._entries]
+        i = bisect_right(times, since - TIME_SKEW) - 1
+        return self._entries[i][1] if i >= 0 else 0
+
+    def query(
+        self,
+        level: Optional[str] = None,
+        component: Optional[Union[str, Iterable[str]]] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+        include_rotated: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Записи, подходящие под фильтр, в хронологическом порядке
+
+        Args:
+            level: Минимальный уровень ("DEBUG", "INFO", "WARN", "ERROR")
+            component: Компонент или набор компонентов
+            since: Начало диапазона (unix time, включительно)
+            until: Конец диапазона (unix time, включительно)
+            limit: Максимум записей
+            include_rotated: Читать также закрытые сегменты (без индекса, целиком)
+        """
+        min_level = LEVEL_VALUES.get(level, 0) if level else 0
+        components = {component} if isinstance(component, str) else (set(component) if component else None)
+        # Быстрая проверка по подстроке, прежде чем разбирать JSON
+        needles = [
+            f'"component":{json.dumps(c, ensure_ascii=False)}'.encode("utf-8") for c in components
+        ] if components else None
+
+        def matches(raw: bytes) -> Optional[Dict[str, Any]]:
+            if needles is not None and not any(n in raw for n in needles):
+                return None
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                return None
+            if min_level and LEVEL_VALUES.get(record.get("level"), 0) < min_level:
+                return None
+            if components is not None and record.get("component") not in components:
+                return None
+            return record
+
+        count = 0
+        for raw in self._iter_raw(since, until, include_rotated):
+            record = matches(raw)
+            if record is None:
+                continue
+            yield record
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+    def _iter_raw(self, since: Optional[float], until: Optional[float], include_rotated: bool) -> Iterator[bytes]:
+        """Строки в диапазоне времени: сначала закрытые сегменты, затем активный файл"""
+        def in_range(raw: bytes) -> Tuple[bool, bool]:
+            ts = _read_ts(raw)
+            if ts is None:
+                return False, False
+            if until is not None and ts > until + TIME_SKEW:
+                return False, True
+            return (since is None or ts >= since) and (until is None or ts <= until), False
+
+        if include_rotated:
+            for segment in self.rotator.segments(self.log_file):
+                opener = gzip.open if segment.suffix == ".gz" else open
+                try:
+                    with opener(segment, "rb") as f:
+                        for raw in f:
+                            ok, past_end = in_range(raw)
+                            if past_end:
+                                return
+                            if ok:
+                                yield raw
+                except (OSError, EOFError):
+                    continue
+
+        self._refresh_index()
+        try:
+            f = self.log_file.open("rb")
+        except OSError:
+            return
+        with f:
+            f.seek(self._start_offset(since))
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                ok, past_end = in_range(raw)
+                if past_end:
+                    return
+                if ok:
+                    yield raw
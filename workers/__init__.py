@@ -2,8 +2,12 @@
 from .base_worker import BaseWorker
 from .init_worker import InitOperationsWorker
 from .version_worker import CheckVersionWorker, CheckAppVersionWorker
+from .subscription_worker import SubscriptionRefreshWorker, SubscriptionBulkRefreshWorker
+from .latency_worker import LatencyTestWorker
+from .log_search_worker import LogSearchWorker
+from .log_history_worker import LogHistoryWorker
 
-__all__ = ['BaseWorker', 'InitOperationsWorker', 'CheckVersionWorker', 'CheckAppVersionWorker']
+__all__ = ['BaseWorker', 'InitOperationsWorker', 'CheckVersionWorker', 'CheckAppVersionWorker', 'SubscriptionRefreshWorker', 'SubscriptionBulkRefreshWorker', 'LatencyTestWorker', 'LogSearchWorker', 'LogHistoryWorker']
 
 
 
@@ -12,7 +12,7 @@ class InitOperationsWorker(BaseWorker):
     """
     Поток для инициализации тяжелых операций при старте
     
-    Выполняет загрузку подписок, проверку версий и очистку логов
+    Выполняет загрузку подписок, проверку версий и обслуживание ротации логов
     в фоновом режиме для ускорения запуска приложения.
     """
     subscriptions_loaded = pyqtSignal(list)  # список имен подписок
@@ -52,7 +52,7 @@ class InitOperationsWorker(BaseWorker):
         1. Загрузку списка подписок
         2. Проверку версии sing-box
         3. Загрузку информации о профилях
-        4. Очистку логов (если нужно)
+        4. Обслуживание ротации логов
         """
         # Загружаем подписки
         if self._check_stop():
@@ -93,35 +93,15 @@ class InitOperationsWorker(BaseWorker):
         except Exception:
             self.profile_info_loaded.emit({'running_sub': None, 'selected_sub': None})
         
-        # Очистка логов
+        # Обслуживание ротации логов (сжатие оставшихся сегментов, удаление лишних)
         if self._check_stop():
             return
         try:
-            from datetime import datetime
-            from config.paths import LOG_FILE
-            last_cleanup = self.settings_manager.get("last_log_cleanup", None)
-            now = datetime.now()
-            
-            if last_cleanup:
-                try:
-                    last_date = datetime.fromisoformat(last_cleanup)
-                    time_diff = now - last_date
-                    if time_diff.total_seconds() < 24 * 60 * 60:
-                        self.cleanup_finished.emit()
-                        return
-                except (ValueError, TypeError):
-                    pass
-            
-            if LOG_FILE.exists():
-                try:
-                    LOG_FILE.write_text("", encoding="utf-8")
-                except Exception:
-                    pass
-            
-            self.settings_manager.data["last_log_cleanup"] = now.isoformat()
-            self.settings_manager.save()
+            from config.paths import LOG_FILE, SINGBOX_CORE_LOG_FILE, STRUCTURED_LOG_FILE
+            from utils.log_rotation import LOG_ROTATOR
+            for log_file in (LOG_FILE, SINGBOX_CORE_LOG_FILE, STRUCTURED_LOG_FILE):
+                LOG_ROTATOR.maintain(log_file)
         except Exception:
             pass
         finally:
             self.cleanup_finished.emit()
-
@@ -0,0 +1,84 @@
+"""Поток для проверки задержки до серверов профиля"""
+import json
+import time
+from typing import Optional, TYPE_CHECKING
+from workers.base_worker import BaseWorker
+from PyQt5.QtCore import pyqtSignal, QObject
+from utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    from managers.subscriptions import SubscriptionManager
+
+# asyncio и ssl загружаются при первой проверке задержки, а не при запуске
+latency_tester = lazy_import("core.latency_tester")
+
+# Импортируем log_to_file если доступен
+try:
+    from utils.logger import log_to_file
+except ImportError:
+    # Если модуль еще не загружен, используем простой print
+    def log_to_file(msg: str, log_file=None):
+        print(msg)
+
+
+class LatencyTestWorker(BaseWorker):
+    """
+    Поток для проверки задержки до всех серверов профиля
+
+    Конфиг берется из профиля (готовый конфиг) или из кэша подписки;
+    подписка скачивается только если кэша еще нет. config.json не изменяется.
+    """
+    endpoint_tested = pyqtSignal(dict)  # результат по одному серверу (по мере готовности)
+    test_finished = pyqtSignal(int, list, float)  # индекс профиля, ранжированные результаты, общее время в мс
+
+    def __init__(
+        self,
+        subs_manager: 'SubscriptionManager',
+        index: int,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        parent: Optional[QObject] = None
+    ) -> None:
+        """
+        Инициализация worker
+
+        Args:
+            subs_manager: Менеджер подписок
+            index: Индекс профиля
+            concurrency: Максимум одновременных проверок (None - DEFAULT_CONCURRENCY)
+            timeout: Таймаут каждой стадии проверки в секундах (None - DEFAULT_TIMEOUT)
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.subs_manager = subs_manager
+        self.index = index
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def _load_config(self) -> Optional[bytes]:
+        """Конфиг профиля без записи в config.json"""
+        if self.subs_manager.is_subscription(self.index):
+            content = self.subs_manager.get_cached_config(self.index)
+            if content is None:
+                content = self.subs_manager.fetch_config(self.index)
+            return content
+        return self.subs_manager.get_profile_config(self.index)
+
+    def _run(self) -> None:
+        """Проверка задержки"""
+        content = self._load_config()
+        if content is None:
+            raise RuntimeError("не удалось получить конфиг профиля")
+        config = json.loads(content)
+
+        started = time.perf_counter()
+        results = latency_tester.run_latency_test(
+            config,
+            concurrency=self.concurrency or latency_tester.DEFAULT_CONCURRENCY,
+            timeout=self.timeout or latency_tester.DEFAULT_TIMEOUT,
+            on_result=self.endpoint_tested.emit
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        reachable = sum(1 for r in results if r["error"] is None)
+        log_to_file(f"[Latency Test] Проверено серверов: {len(results)}, доступно: {reachable}, время: {elapsed_ms:.0f} мс")
+        self.test_finished.emit(self.index, results, elapsed_ms)
@@ -0,0 +1,40 @@
+"""Поток для загрузки истории логов с диска"""
+from typing import Optional, List
+from workers.base_worker import BaseWorker
+from PyQt5.QtCore import pyqtSignal, QObject
+from utils.log_buffer import LogFileTail
+from utils.log_rotation import read_log_history
+
+
+class LogHistoryWorker(BaseWorker):
+    """
+    Поток чтения хвоста логов и их закрытых сегментов
+
+    Чтение (до LogFileTail.initial_bytes на файл, с распаковкой сжатых
+    сегментов) не должно блокировать главный поток: окно логов получает
+    историю сигналом history_loaded, а новые строки тем временем
+    приходят в буферы от писателей.
+    """
+    history_loaded = pyqtSignal(str, list)  # путь к файлу лога, строки истории
+
+    def __init__(self, tails: List[LogFileTail], parent: Optional[QObject] = None) -> None:
+        """
+        Инициализация worker
+
+        Args:
+            tails: Файлы логов для чтения (смещения остаются в конце прочитанного)
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.tails = tails
+
+    def cancel(self) -> None:
+        """Остановить загрузку (проверяется между файлами, без terminate)"""
+        self._should_stop = True
+
+    def _run(self) -> None:
+        """Чтение истории по очереди для каждого файла"""
+        for tail in self.tails:
+            if self._check_stop():
+                return
+            self.history_loaded.emit(str(tail.log_file), read_log_history(tail))
@@ -0,0 +1,108 @@
+"""Поток для поиска по файлам логов"""
+import time
+from pathlib import Path
+from typing import Optional, List, Iterator
+from workers.base_worker import BaseWorker
+from PyQt5.QtCore import pyqtSignal, QObject
+from utils.log_index import LogSearch, compile_query, parse_line_meta, search_log_entries
+from utils.log_buffer import LogEntry, normalize_log_line
+
+
+class LogSearchWorker(BaseWorker):
+    """
+    Поток поиска по логу и его закрытым сегментам
+    
+    Строки, которые есть только в окне логов (строки ядра ниже уровня записи
+    на диск), ищутся в переданном снимке буфера и вставляются между
+    строками файла по времени.
+    
+    Найденные строки отправляются пачками по мере нахождения (results_found),
+    чтобы окно логов показывало результаты, не дожидаясь конца поиска
+    по большому файлу. Поиск прекращается после max_results строк.
+    """
+    results_found = pyqtSignal(list)  # нормализованные строки (время, уровень, текст)
+    search_finished = pyqtSignal(int, int, float, bool)  # найдено, просмотрено строк, время в мс, достигнут лимит
+    
+    BATCH_SIZE = 200
+    BATCH_INTERVAL = 0.1  # секунд
+    
+    def __init__(
+        self,
+        log_file: Path,
+        query: str,
+        use_regex: bool = False,
+        min_level: Optional[str] = None,
+        since: Optional[str] = None,
+        max_results: int = 10000,
+        memory_entries: Optional[List[LogEntry]] = None,
+        parent: Optional[QObject] = None
+    ) -> None:
+        """
+        Инициализация worker
+        
+        Args:
+            log_file: Активный файл лога
+            query: Строка поиска (пустая - все строки, подходящие под фильтры)
+            use_regex: Искать по регулярному выражению
+            min_level: Минимальный уровень строк; None - все
+            since: Начало диапазона "YYYY-MM-DD HH:MM:SS"; None - без ограничения
+            max_results: Максимум найденных строк
+            memory_entries: Строки окна логов, которых нет в файле (LogUIManager.get_memory_only_entries)
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.log_file = log_file
+        self.query = query
+        self.use_regex = use_regex
+        self.min_level = min_level
+        self.since = since
+        self.max_results = max_results
+        self.memory_entries = memory_entries or []
+    
+    def cancel(self) -> None:
+        """Остановить поиск (проверяется между блоками, без terminate)"""
+        self._should_stop = True
+    
+    def _run(self) -> None:
+        """Поиск (re.error для неверного регулярного выражения уходит в сигнал error)"""
+        pattern = compile_query(self.query, self.use_regex) if self.query else None
+        search = LogSearch(self.log_file, pattern, self.min_level, self.since)
+        
+        started = time.perf_counter()
+        memory = search_log_entries(self.memory_entries, pattern, self.min_level, self.since)
+        batch: List[tuple] = []
+        last_emit = started
+        found = 0
+        limited = False
+        for entry in self._merge(search.run(self._check_stop), memory):
+            batch.append(entry)
+            found += 1
+            now = time.perf_counter()
+            if len(batch) >= self.BATCH_SIZE or now - last_emit >= self.BATCH_INTERVAL:
+                self.results_found.emit(batch)
+                batch = []
+                last_emit = now
+            if found >= self.max_results:
+                limited = True
+                break
+        if batch:
+            self.results_found.emit(batch)
+        if self._check_stop():
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        scanned = search.scanned_lines + len(self.memory_entries)
+        self.search_finished.emit(found, scanned, elapsed_ms, limited)
+    
+    @staticmethod
+    def _merge(lines: Iterator[str], memory: List[tuple]) -> Iterator[LogEntry]:
+        """Строки файла вперемешку с найденными строками буфера, по времени"""
+        pending = 0
+        for line in lines:
+            if pending < len(memory):
+                key = parse_line_meta(line)[0]
+                while pending < len(memory) and key is not None and (memory[pending][0] or "") <= key:
+                    yield memory[pending][1]
+                    pending += 1
+            yield normalize_log_line(line)
+        for _, entry in memory[pending:]:
+            yield entry
@@ -0,0 +1,91 @@
+"""Потоки для обновления подписок"""
+import time
+from typing import Optional, TYPE_CHECKING
+from workers.base_worker import BaseWorker
+from PyQt5.QtCore import pyqtSignal, QObject
+from managers.subscriptions import config_hash
+
+if TYPE_CHECKING:
+    from managers.subscriptions import SubscriptionManager
+
+
+class SubscriptionRefreshWorker(BaseWorker):
+    """
+    Поток для фонового обновления подписки
+
+    Скачивает конфиг подписки в кэш (config.json не трогается) и сообщает
+    канонический хэш содержимого. Решение о применении нового конфига
+    (сравнение с хэшем примененного) остается на стороне UI-потока.
+    """
+    refresh_finished = pyqtSignal(int, bool, str)  # индекс профиля, успех, хэш скачанного конфига
+
+    def __init__(
+        self,
+        subs_manager: 'SubscriptionManager',
+        index: int,
+        parent: Optional[QObject] = None
+    ) -> None:
+        """
+        Инициализация worker
+
+        Args:
+            subs_manager: Менеджер подписок
+            index: Индекс профиля-подписки
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.subs_manager = subs_manager
+        self.index = index
+
+    def _run(self) -> None:
+        """
+        Обновление подписки
+
+        Отправляет канонический хэш скачанного конфига через сигнал refresh_finished
+        (хэш считается в фоне, чтобы не парсить большой JSON в UI-потоке).
+        """
+        content = self.subs_manager.fetch_config(self.index)
+        if content is None:
+            self.refresh_finished.emit(self.index, False, "")
+            return
+        # Хэш обычно уже посчитан при скачивании; иначе (старый кэш, не-JSON) считаем здесь
+        content_hash = self.subs_manager.get_cached_config_hash(self.index) or config_hash(content)
+        self.refresh_finished.emit(self.index, True, content_hash)
+
+
+class SubscriptionBulkRefreshWorker(BaseWorker):
+    """
+    Поток для параллельного обновления всех подписок
+
+    Запросы выполняются пулом потоков через общую keep-alive сессию
+    менеджера подписок. Результат по каждому профилю приходит сразу по готовности.
+    """
+    profile_refreshed = pyqtSignal(dict)  # index, name, status, latency_ms, size
+    all_refreshed = pyqtSignal(list, float)  # результаты по всем профилям, общее время в мс
+
+    def __init__(
+        self,
+        subs_manager: 'SubscriptionManager',
+        max_workers: Optional[int] = None,
+        parent: Optional[QObject] = None
+    ) -> None:
+        """
+        Инициализация worker
+
+        Args:
+            subs_manager: Менеджер подписок
+            max_workers: Размер пула потоков (по умолчанию из SubscriptionManager)
+            parent: Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.subs_manager = subs_manager
+        self.max_workers = max_workers
+
+    def _run(self) -> None:
+        """Обновление всех подписок"""
+        started = time.perf_counter()
+        results = self.subs_manager.refresh_all(
+            on_result=self.profile_refreshed.emit,
+            max_workers=self.max_workers
+        )
+        self.all_refreshed.emit(results, (time.perf_counter() - started) * 1000)